@@ -74,9 +74,145 @@ CREATE TABLE Invoices (
     FOREIGN KEY (SalesID) REFERENCES Sales(SalesID) ON DELETE RESTRICT
 );
 
+CREATE TABLE ProductBarcode (
+    Barcode TEXT PRIMARY KEY NOT NULL,
+    ProductID INTEGER NOT NULL,
+    FOREIGN KEY (ProductID) REFERENCES Product(ProductID) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE TABLE BillArchive (
+    SalesID INTEGER PRIMARY KEY NOT NULL,
+    InvoiceID INTEGER NOT NULL UNIQUE,
+    FilePath TEXT NOT NULL,
+    FOREIGN KEY (SalesID) REFERENCES Sales(SalesID) ON DELETE RESTRICT,
+    FOREIGN KEY (InvoiceID) REFERENCES Invoices(InvoiceID) ON DELETE RESTRICT
+);
+
+CREATE INDEX idx_Sales_SaleDate ON Sales (SaleDate);
+CREATE INDEX idx_SaleDetails_SalesID ON SaleDetails (SalesID);
+CREATE UNIQUE INDEX idx_Product_ProductName ON Product (ProductName);
+CREATE INDEX idx_Discount_DiscountValue ON Discount (DiscountValue);
+CREATE INDEX idx_Category_CategoryName ON Category (CategoryName);
+CREATE INDEX idx_Suppliers_SupplierName ON Suppliers (SupplierName);
+CREATE INDEX idx_InventoryTransactions_ProductID ON InventoryTransactions (ProductID);
+CREATE INDEX idx_SaleDetails_ProductID ON SaleDetails (ProductID);
+CREATE INDEX idx_ProductBarcode_ProductID ON ProductBarcode (ProductID);
+CREATE INDEX idx_Invoices_InvoiceDate ON Invoices (InvoiceDate);
+CREATE INDEX idx_Invoices_SalesID ON Invoices (SalesID);
+CREATE INDEX idx_Invoices_PaymentMethod ON Invoices (PaymentMethod, InvoiceDate);
+CREATE INDEX idx_Invoices_TotalAmount ON Invoices (TotalAmount);
+
 CREATE TRIGGER Product_DiscountID_Default
 BEFORE DELETE ON Discount
 FOR EACH ROW
 BEGIN
     UPDATE Product SET DiscountID = 1 WHERE DiscountID = OLD.DiscountID;
 END;
+
+-- One counter per cached catalog table, bumped on every write so other tills notice the change
+CREATE TABLE CatalogVersion (
+    TableName TEXT PRIMARY KEY NOT NULL,
+    Version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+INSERT INTO CatalogVersion (TableName)
+VALUES ('Product'), ('Category'), ('Suppliers'), ('Discount'), ('ProductBarcode');
+
+CREATE TRIGGER Product_Version_Insert AFTER INSERT ON Product
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Product'; END;
+-- Not StockLevel: sales and restocks would reload every till's product cache
+CREATE TRIGGER Product_Version_Update
+AFTER UPDATE OF ProductName, Price, CategoryID, SupplierID, DiscountID, RestockLevel ON Product
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Product'; END;
+CREATE TRIGGER Product_Version_Delete AFTER DELETE ON Product
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Product'; END;
+CREATE TRIGGER Category_Version_Insert AFTER INSERT ON Category
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Category'; END;
+CREATE TRIGGER Category_Version_Update AFTER UPDATE ON Category
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Category'; END;
+CREATE TRIGGER Category_Version_Delete AFTER DELETE ON Category
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Category'; END;
+CREATE TRIGGER Suppliers_Version_Insert AFTER INSERT ON Suppliers
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Suppliers'; END;
+CREATE TRIGGER Suppliers_Version_Update AFTER UPDATE ON Suppliers
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Suppliers'; END;
+CREATE TRIGGER Suppliers_Version_Delete AFTER DELETE ON Suppliers
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Suppliers'; END;
+CREATE TRIGGER Discount_Version_Insert AFTER INSERT ON Discount
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Discount'; END;
+CREATE TRIGGER Discount_Version_Update AFTER UPDATE ON Discount
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Discount'; END;
+CREATE TRIGGER Discount_Version_Delete AFTER DELETE ON Discount
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Discount'; END;
+CREATE TRIGGER ProductBarcode_Version_Insert AFTER INSERT ON ProductBarcode
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'ProductBarcode'; END;
+CREATE TRIGGER ProductBarcode_Version_Update AFTER UPDATE ON ProductBarcode
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'ProductBarcode'; END;
+CREATE TRIGGER ProductBarcode_Version_Delete AFTER DELETE ON ProductBarcode
+BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'ProductBarcode'; END;
+
+
+-- Pre-aggregated sales rollups read by the reports (kept in sync by the triggers below)
+CREATE TABLE SalesDaily (
+    SaleDay TEXT PRIMARY KEY,
+    TotalAmount REAL NOT NULL DEFAULT 0,
+    Transactions INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE SalesMonthly (
+    YearMonth TEXT PRIMARY KEY,
+    TotalAmount REAL NOT NULL DEFAULT 0,
+    Transactions INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE ProductSalesDaily (
+    SaleDay TEXT NOT NULL,
+    ProductID INTEGER NOT NULL,
+    Quantity INTEGER NOT NULL DEFAULT 0,
+    Subtotal REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (SaleDay, ProductID)
+) WITHOUT ROWID;
+
+CREATE TABLE ProductSalesMonthly (
+    YearMonth TEXT NOT NULL,
+    ProductID INTEGER NOT NULL,
+    Quantity INTEGER NOT NULL DEFAULT 0,
+    Subtotal REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (YearMonth, ProductID)
+) WITHOUT ROWID;
+
+CREATE TRIGGER Sales_Rollup
+AFTER INSERT ON Sales
+FOR EACH ROW
+BEGIN
+    INSERT INTO SalesDaily (SaleDay, TotalAmount, Transactions)
+    VALUES (substr(NEW.SaleDate, 1, 10), NEW.TotalAmount, 1)
+    ON CONFLICT (SaleDay) DO UPDATE SET
+        TotalAmount = TotalAmount + excluded.TotalAmount,
+        Transactions = Transactions + 1;
+
+    INSERT INTO SalesMonthly (YearMonth, TotalAmount, Transactions)
+    VALUES (substr(NEW.SaleDate, 1, 7), NEW.TotalAmount, 1)
+    ON CONFLICT (YearMonth) DO UPDATE SET
+        TotalAmount = TotalAmount + excluded.TotalAmount,
+        Transactions = Transactions + 1;
+END;
+
+CREATE TRIGGER SaleDetails_Rollup
+AFTER INSERT ON SaleDetails
+FOR EACH ROW
+BEGIN
+    INSERT INTO ProductSalesDaily (SaleDay, ProductID, Quantity, Subtotal)
+    SELECT substr(SaleDate, 1, 10), NEW.ProductID, NEW.Quantity, NEW.Subtotal
+    FROM Sales WHERE SalesID = NEW.SalesID
+    ON CONFLICT (SaleDay, ProductID) DO UPDATE SET
+        Quantity = Quantity + excluded.Quantity,
+        Subtotal = Subtotal + excluded.Subtotal;
+
+    INSERT INTO ProductSalesMonthly (YearMonth, ProductID, Quantity, Subtotal)
+    SELECT substr(SaleDate, 1, 7), NEW.ProductID, NEW.Quantity, NEW.Subtotal
+    FROM Sales WHERE SalesID = NEW.SalesID
+    ON CONFLICT (YearMonth, ProductID) DO UPDATE SET
+        Quantity = Quantity + excluded.Quantity,
+        Subtotal = Subtotal + excluded.Subtotal;
+END;
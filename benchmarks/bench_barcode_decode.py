@@ -0,0 +1,91 @@
+"""Barcode decoding over recorded camera frames: full-frame pyzbar vs AdaptiveDecoder.
+
+Replays the frames in a directory (any format cv2.imread reads, in file
+name order) through both decoders and reports frames per second, decodes
+per second and CPU time per frame. It also counts how often each adaptive
+stage was used, and the frames where the adaptive result differs from a
+full-frame decode.
+
+Record a session first with --record, e.g. 300 frames of someone scanning
+a few items:
+
+    python benchmarks/bench_barcode_decode.py frames/ --record 300
+    python benchmarks/bench_barcode_decode.py frames/
+"""
+import argparse
+import os
+import time
+
+import common  # noqa: F401  (puts pages/ on sys.path)
+
+import cv2
+from pyzbar.pyzbar import decode
+
+from barcode_decoder import AdaptiveDecoder, STAGES
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".pgm")
+
+
+def record(directory, count, camera_index=0):
+    os.makedirs(directory, exist_ok=True)
+    cap = cv2.VideoCapture(camera_index)
+    if not cap.isOpened():
+        raise SystemExit("Could not open camera.")
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    saved = 0
+    while saved < count:
+        ret, frame = cap.read()
+        if ret:
+            cv2.imwrite(os.path.join(directory, f"frame_{saved:05d}.png"), frame)
+            saved += 1
+    cap.release()
+    print(f"recorded {saved} frames to {directory}")
+
+
+def load_frames(directory):
+    names = sorted(name for name in os.listdir(directory) if name.lower().endswith(IMAGE_EXTENSIONS))
+    return [cv2.imread(os.path.join(directory, name), cv2.IMREAD_GRAYSCALE) for name in names]
+
+
+def run(frames, decode_frame):
+    """(results per frame, wall seconds, CPU seconds)."""
+    results = []
+    wall, cpu = time.perf_counter(), time.process_time()
+    for gray in frames:
+        results.append(decode_frame(gray))
+    return results, time.perf_counter() - wall, time.process_time() - cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("frames", help="directory of recorded frames")
+    parser.add_argument("--record", type=int, metavar="N", help="record N frames from the camera first")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.frames, args.record)
+    frames = load_frames(args.frames)
+    if not frames:
+        raise SystemExit(f"No frames in {args.frames}")
+
+    full, full_wall, full_cpu = run(frames, lambda gray: {b.data.decode('utf-8') for b in decode(gray)})
+    decoder = AdaptiveDecoder()
+    adaptive, adaptive_wall, adaptive_cpu = run(
+        frames, lambda gray: {d.data for d in decoder.decode(gray)[0]})
+
+    print(f"{len(frames)} frames")
+    print(f"{'decoder':<9} {'frames/s':>9} {'decodes/s':>10} {'CPU/frame':>10}")
+    for name, results, wall, cpu in (("full", full, full_wall, full_cpu),
+                                     ("adaptive", adaptive, adaptive_wall, adaptive_cpu)):
+        decodes = sum(1 for found in results if found)
+        print(f"{name:<9} {len(frames) / wall:>9.1f} {decodes / wall:>10.1f} {cpu / len(frames) * 1000:>8.2f}ms")
+    print("adaptive stages: " + ", ".join(f"{stage} {decoder.stage_counts[stage]}" for stage in STAGES))
+
+    missed = sum(1 for a, f in zip(adaptive, full) if f - a)
+    extra = sum(1 for a, f in zip(adaptive, full) if a - f)
+    print(f"frames where adaptive missed a full-frame code: {missed}; found a code full-frame missed: {extra}")
+
+
+if __name__ == "__main__":
+    main()
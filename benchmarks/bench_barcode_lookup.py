@@ -0,0 +1,84 @@
+"""Barcode to product resolution at catalogue scale: catalog hash index vs a query per scan.
+
+Builds a scratch database with --products products, each with one or two
+ProductBarcode rows, then times loading the catalog's barcode index and
+resolving random scans through CatalogCache.product_for_barcode against a
+SELECT on ProductBarcode per scan.
+
+Usage: python benchmarks/bench_barcode_lookup.py [--products 300000] [--scans 100000]
+"""
+import argparse
+import random
+import time
+
+from common import create_db, scratch_db_path
+
+from catalog import CatalogCache, BARCODE, PRODUCT
+from db import connect
+from migrations import migrate
+from store import LocalStore
+
+
+def ean13(n):
+    digits = f"890{n:09d}"
+    check = (10 - sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits)) % 10) % 10
+    return digits + str(check)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=300000)
+    parser.add_argument("--scans", type=int, default=100000)
+    args = parser.parse_args()
+
+    db_path = create_db(scratch_db_path(), args.products)
+    conn = connect(db_path)
+    migrate(conn)
+    conn.execute("BEGIN")
+    conn.executemany("INSERT INTO ProductBarcode (Barcode, ProductID) VALUES (?, ?)",
+                     ((ean13(n), 1 + n % args.products) for n in range(args.products + args.products // 2)))
+    conn.execute("COMMIT")
+    codes = [row[0] for row in conn.execute("SELECT Barcode FROM ProductBarcode")]
+    rng = random.Random(0)
+    scans = [rng.choice(codes) for _ in range(args.scans)] + ["0000000000000"] * 10
+
+    store = LocalStore(db_path, pool_size=1)
+    catalog = CatalogCache(store)
+    start = time.perf_counter()
+    catalog.products()
+    products_s = time.perf_counter() - start
+    start = time.perf_counter()
+    catalog.product_for_barcode(codes[0])
+    index_s = time.perf_counter() - start
+    print(f"{len(codes)} barcodes over {args.products} products; catalog load {products_s:.2f}s, "
+          f"barcode index load {index_s:.2f}s")
+
+    start = time.perf_counter()
+    resolved = [catalog.product_for_barcode(code) for code in scans]
+    cached_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with store.connection() as store_conn:
+        queried = []
+        for code in scans:
+            row = store_conn.execute("SELECT ProductID FROM ProductBarcode WHERE Barcode = ?", (code,)).fetchone()
+            queried.append(row[0] if row else None)
+    query_s = time.perf_counter() - start
+
+    print(f"{'lookup':<14} {'scans/s':>12} {'us/scan':>8}")
+    for name, seconds in (("catalog index", cached_s), ("SQL per scan", query_s)):
+        print(f"{name:<14} {len(scans) / seconds:>12.0f} {seconds / len(scans) * 1e6:>8.2f}")
+
+    mismatched = sum(1 for product, product_id in zip(resolved, queried)
+                     if (product.product_id if product is not None else None) != product_id)
+    catalog.invalidate(BARCODE, PRODUCT)
+    store.close()
+    conn.close()
+    if mismatched:
+        print(f"FAIL {mismatched} scans resolved differently from the database")
+        raise SystemExit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
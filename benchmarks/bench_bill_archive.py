@@ -0,0 +1,142 @@
+"""Bill lookup at archive scale: BillArchive index vs searching a flat Bills folder.
+
+Builds a scratch database with --sales sales, busy enough that many share
+a second, and indexes each one's bill in BillArchive. It times lookups by
+SalesID and by InvoiceID through BillArchive.lookup. For comparison it times
+finding a bill by listing a flat folder of --files bills named the old way
+(bill_<yyyy-MM-dd hh:mm:ss>.pdf), and counts how many old-style names the
+same sales would have overwritten. Finally it replays the one-time import
+of old bills into the archive.
+
+Exits with status 1 if two sales share an archive path, a lookup returns
+the wrong bill, or the legacy import claims an ambiguous file.
+
+Usage: python benchmarks/bench_bill_archive.py [--sales 500000] [--files 20000] [--lookups 20000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from common import create_db, scratch_db_path
+
+from bill_archive import BillArchive, LEGACY_BILL_NAME, bill_path
+from db import connect
+
+SALES_PER_SECOND_PEAK = 3  # a busy multi-till shop at peak
+
+
+def sale_dates(count):
+    """Sale times one to SALES_PER_SECOND_PEAK per second, starting 2024-01-01."""
+    rng = random.Random(0)
+    now = datetime(2024, 1, 1, 9, 0, 0)
+    dates = []
+    while len(dates) < count:
+        for _ in range(rng.randint(1, SALES_PER_SECOND_PEAK)):
+            dates.append(now.strftime("%Y-%m-%d %H:%M:%S"))
+        now += timedelta(seconds=rng.choice((1, 1, 2, 30, 300)))
+    return dates[:count]
+
+
+def build(db_path, dates):
+    conn = connect(db_path)
+    conn.execute("BEGIN")
+    conn.executemany("INSERT INTO Sales (SalesID, SaleDate, TotalAmount, PaymentMethod, AmountPaid, BalanceDue) "
+                     "VALUES (?, ?, 100, 'Cash', 100, 0)", enumerate(dates, 1))
+    conn.executemany("INSERT INTO Invoices (InvoiceID, SalesID, InvoiceDate, TotalAmount, AmountPaid, BalanceDue, "
+                     "PaymentMethod) VALUES (?, ?, ?, 100, 100, 0, 'Cash')",
+                     ((n, n, date) for n, date in enumerate(dates, 1)))
+    conn.executemany("INSERT INTO BillArchive (SalesID, InvoiceID, FilePath) VALUES (?, ?, ?)",
+                     ((n, n, bill_path(n, n, date)) for n, date in enumerate(dates, 1)))
+    conn.execute("COMMIT")
+    return conn
+
+
+def check_legacy_import(failures):
+    """Import three old bills: two unique seconds and one second with two sales."""
+    dates = ["2025-03-24 21:47:41", "2025-03-24 21:48:16", "2025-03-25 11:01:06", "2025-03-25 11:01:06"]
+    conn = connect(create_db(scratch_db_path("legacy.db"), 1))
+    for n, date in enumerate(dates, 1):
+        conn.execute("INSERT INTO Sales (SalesID, SaleDate, TotalAmount, PaymentMethod, AmountPaid, BalanceDue) "
+                     "VALUES (?, ?, 100, 'Cash', 100, 0)", (n, date))
+        conn.execute("INSERT INTO Invoices (SalesID, InvoiceDate, TotalAmount, AmountPaid, BalanceDue, PaymentMethod) "
+                     "VALUES (?, ?, 100, 100, 0, 'Cash')", (n, date))
+    archive = BillArchive(tempfile.mkdtemp(prefix="sms_bench_bills_"))
+    for date in sorted(set(dates)):
+        with open(os.path.join(archive.root, f"bill_{date}.pdf"), "wb") as f:
+            f.write(b"%PDF-1.4\n")
+    moved = archive.import_legacy_bills(conn)
+    found = [archive.lookup(conn, sales_id=n) for n in range(1, len(dates) + 1)]
+    left = sorted(name for name in os.listdir(archive.root) if LEGACY_BILL_NAME.match(name))
+    print(f"legacy import: moved {moved}, left {left}")
+    if moved != 2 or not all(record and record.exists() for record in found[:2]) or any(found[2:]):
+        failures.append("legacy import moved the wrong bills")
+    if left != ["bill_2025-03-25 11:01:06.pdf"]:
+        failures.append(f"legacy import left {left}")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=500000)
+    parser.add_argument("--files", type=int, default=20000, help="bills in the flat folder baseline")
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    dates = sale_dates(args.sales)
+    start = time.perf_counter()
+    conn = build(create_db(scratch_db_path(), 1), dates)
+    print(f"{args.sales} sales from {dates[0][:10]} to {dates[-1][:10]} indexed in "
+          f"{time.perf_counter() - start:.1f}s")
+
+    failures = []
+    paths = [bill_path(n, n, date) for n, date in enumerate(dates, 1)]
+    if len(set(paths)) != len(paths):
+        failures.append(f"{len(paths) - len(set(paths))} archive paths are shared by two sales")
+    overwritten = len(dates) - len(set(dates))
+    per_day = Counter(date[:10] for date in dates)
+    print(f"old flat names would overwrite {overwritten} bills; archive: {len(per_day)} day folders, "
+          f"at most {max(per_day.values())} bills in one")
+
+    archive = BillArchive(tempfile.mkdtemp(prefix="sms_bench_bills_"))
+    rng = random.Random(1)
+    wanted = [rng.randint(1, args.sales) for _ in range(args.lookups)]
+    timings = []
+    for key in ("sales_id", "invoice_id"):
+        start = time.perf_counter()
+        records = [archive.lookup(conn, **{key: n}) for n in wanted]
+        timings.append((f"BillArchive by {key}", time.perf_counter() - start, len(wanted)))
+        if any(record is None or record.sales_id != n or not record.path.endswith(f"bill_{n}_{n}.pdf")
+               for record, n in zip(records, wanted)):
+            failures.append(f"lookup by {key} returned the wrong bill")
+
+    flat = tempfile.mkdtemp(prefix="sms_bench_flat_")
+    flat_names = sorted({f"bill_{date}.pdf" for date in dates[:args.files]})
+    for name in flat_names:
+        open(os.path.join(flat, name), "wb").close()
+    flat_lookups = wanted[:max(1, args.lookups // 100)]
+    start = time.perf_counter()
+    for n in flat_lookups:
+        # Reprinting used to mean finding the file by the sale's time in the folder listing
+        target = f"bill_{dates[(n - 1) % args.files]}.pdf"
+        next(name for name in os.listdir(flat) if name == target)
+    timings.append((f"flat folder ({len(flat_names)} files)", time.perf_counter() - start, len(flat_lookups)))
+
+    print(f"{'lookup':<28} {'us/lookup':>10}")
+    for name, seconds, count in timings:
+        print(f"{name:<28} {seconds / count * 1e6:>10.1f}")
+    conn.close()
+
+    check_legacy_import(failures)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        raise SystemExit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
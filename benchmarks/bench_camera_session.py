@@ -0,0 +1,112 @@
+"""Time to first decode: reopening the camera per scan vs one warm camera session.
+
+Runs --sessions scan sessions twice. The first run opens and releases the
+camera for every session, the way each scan dialog used to. The second run
+opens it once and starts every session on the already-streaming camera, the
+way CameraService does. For each session it reports the time to the first
+frame and, if a barcode is held in front of the camera, to its first
+decode with an AdaptiveDecoder.
+
+Exits with status 1 if warm sessions do not reach their first frame at
+least --min-speedup times faster than reopened ones.
+
+Usage: python benchmarks/bench_camera_session.py [--sessions 5] [--timeout 5] [--min-speedup 5]
+"""
+import argparse
+import time
+
+import common  # noqa: F401  (puts pages/ on sys.path)
+
+import cv2
+
+from barcode_decoder import AdaptiveDecoder
+
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+
+
+def open_camera(camera_index):
+    cap = cv2.VideoCapture(camera_index)
+    if not cap.isOpened():
+        raise SystemExit("Could not open camera.")
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+    return cap
+
+
+def session(cap, start, timeout):
+    """(ms to the first frame, ms to the first decode or None) for a session begun at start."""
+    decoder = AdaptiveDecoder()
+    first_frame_ms = None
+    while time.perf_counter() - start < timeout:
+        ret, frame = cap.read()
+        if not ret:
+            continue
+        if first_frame_ms is None:
+            first_frame_ms = (time.perf_counter() - start) * 1000
+        detections, _ = decoder.decode(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        if detections:
+            return first_frame_ms, (time.perf_counter() - start) * 1000
+    return first_frame_ms, None
+
+
+def reopened(camera_index, sessions, timeout):
+    results = []
+    for _ in range(sessions):
+        start = time.perf_counter()
+        cap = open_camera(camera_index)
+        results.append(session(cap, start, timeout))
+        cap.release()
+    return results
+
+
+def warm(camera_index, sessions, timeout):
+    cap = open_camera(camera_index)
+    cap.read()  # the service opens the camera once, before the first session it serves
+    results = []
+    for _ in range(sessions):
+        results.append(session(cap, time.perf_counter(), timeout))
+    cap.release()
+    return results
+
+
+def median(values):
+    values = sorted(v for v in values if v is not None)
+    return values[len(values) // 2] if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=5.0, help="seconds to wait for a decode per session")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--min-speedup", type=float, default=5.0)
+    args = parser.parse_args()
+
+    runs = (("reopened", reopened(args.camera, args.sessions, args.timeout)),
+            ("warm", warm(args.camera, args.sessions, args.timeout)))
+
+    print(f"{args.sessions} sessions each")
+    print(f"{'camera':<9} {'first frame':>12} {'first decode':>13} {'decoded':>8}")
+    medians = {}
+    for name, results in runs:
+        frame_ms = median(r[0] for r in results)
+        decode_ms = median(r[1] for r in results)
+        medians[name] = frame_ms
+        decoded = sum(1 for r in results if r[1] is not None)
+        print(f"{name:<9} {frame_ms or 0:>10.0f}ms "
+              f"{(f'{decode_ms:.0f}ms' if decode_ms is not None else '-'):>13} {decoded:>5}/{len(results)}")
+
+    if medians["reopened"] is None or medians["warm"] is None:
+        print("FAIL the camera delivered no frames")
+        raise SystemExit(1)
+    speedup = medians["reopened"] / max(medians["warm"], 0.001)
+    print(f"warm sessions reach the first frame {speedup:.1f}x sooner")
+    if speedup < args.min_speedup:
+        print(f"FAIL {speedup:.1f}x is below the {args.min_speedup}x target")
+        raise SystemExit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Checkout throughput: per-row autocommitted statements vs the single-transaction engine.
+
+Usage: python benchmarks/bench_checkout.py [--baskets 20] [--lines 40]
+"""
+import argparse
+import time
+
+from common import create_db, scratch_db_path
+
+from checkout import commit_sale
+from db import connect
+
+SALE_DATE = "2025-03-01 10:00:00"
+
+
+def make_basket(basket_no, num_lines, num_products):
+    """Return (ProductID, ProductName, Quantity, UnitPrice, DiscountValue, DiscountID) rows."""
+    rows = []
+    for i in range(num_lines):
+        product_id = 1 + (basket_no * num_lines + i) % num_products
+        discount_id = 1 + product_id % 3
+        rows.append((product_id, f"Product {product_id:06d}", 1 + i % 3, 10.0 + product_id % 500,
+                     {1: 0.0, 2: 15.0, 3: 5.0}[discount_id], discount_id))
+    return rows
+
+
+def legacy_checkout(conn, basket, total):
+    """The pre-engine BillingPage.checkout: every statement commits on its own."""
+    cur = conn.execute("INSERT INTO Sales (SaleDate, TotalAmount, PaymentMethod, AmountPaid, BalanceDue) "
+                       "VALUES (?, ?, ?, ?, ?)", (SALE_DATE, total, "Cash", total, 0))
+    sales_id = cur.lastrowid
+    for _, name, quantity, unit_price, discount_value, _ in basket:
+        product_id, stock_level = conn.execute(
+            "SELECT ProductID, StockLevel FROM Product WHERE ProductName = ?", (name,)).fetchone()
+        discount_id = conn.execute(
+            "SELECT DiscountID FROM Discount WHERE DiscountValue = ?", (discount_value,)).fetchone()[0]
+        conn.execute("INSERT INTO SaleDetails (SalesID, ProductID, Quantity, UnitPrice, Subtotal, DiscountID) "
+                     "VALUES (?, ?, ?, ?, ?, ?)",
+                     (sales_id, product_id, quantity, unit_price, unit_price * quantity, discount_id))
+        conn.execute("UPDATE Product SET StockLevel = ? WHERE ProductID = ?", (stock_level - quantity, product_id))
+    conn.execute("INSERT INTO Invoices (SalesID, InvoiceDate, TotalAmount, AmountPaid, BalanceDue, PaymentMethod) "
+                 "VALUES (?, ?, ?, ?, ?, ?)", (sales_id, SALE_DATE, total, total, 0, "Cash"))
+
+
+def engine_checkout(conn, basket, total):
+    lines = [(product_id, quantity, unit_price, discount_id)
+             for product_id, _, quantity, unit_price, _, discount_id in basket]
+    commit_sale(conn, lines, total, "Cash", total, SALE_DATE)
+
+
+def run(label, checkout_fn, baskets, num_lines, num_products):
+    conn = connect(create_db(scratch_db_path(), num_products))
+    start = time.perf_counter()
+    for basket_no in range(baskets):
+        checkout_fn(conn, make_basket(basket_no, num_lines, num_products), 1000)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    lines_per_sec = baskets * num_lines / elapsed
+    print(f"{label:<12} {baskets} baskets x {num_lines} lines in {elapsed:8.3f}s  "
+          f"-> {lines_per_sec:10.0f} lines/s")
+    return lines_per_sec
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baskets", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--products", type=int, default=500)
+    args = parser.parse_args()
+
+    before = run("per-row", legacy_checkout, args.baskets, args.lines, args.products)
+    after = run("batched", engine_checkout, args.baskets, args.lines, args.products)
+    print(f"speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
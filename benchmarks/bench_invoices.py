@@ -0,0 +1,177 @@
+"""Invoice search and reprint at scale: keyset pages, bill regeneration and the PDF cache.
+
+Builds a scratch database with --sales sales (with SaleDetails and
+Invoices), then times:
+
+- the first page and page 100 of each search (date range, payment method,
+  amount, SalesID), and page 100 fetched with OFFSET instead
+- rendering a bill from Sales and SaleDetails against serving it from the
+  LRU cache
+- reprinting an invoice whose archived file is missing, then again
+
+Exits with status 1 if paging skips or repeats an invoice, a rebuilt bill
+has the wrong total, or reprints are slower than --max-reprint-ms.
+
+Usage: python benchmarks/bench_invoices.py [--sales 200000] [--lines 4] [--max-reprint-ms 5]
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from common import create_db, scratch_db_path
+
+from bill_archive import BillArchive
+from cart import to_paise
+from db import connect
+from invoices import InvoiceService, search_invoices
+from migrations import migrate
+from store import LocalStore
+
+NUM_PRODUCTS = 2000
+METHODS = ("Cash", "Card", "UPI")
+PAGE = 50
+
+
+def build(db_path, num_sales, num_lines):
+    conn = connect(db_path)
+    migrate(conn)
+    rng = random.Random(0)
+    sales, details, invoices = [], [], []
+    when = datetime(2024, 1, 1, 9, 0, 0)
+    for sales_id in range(1, num_sales + 1):
+        when += timedelta(seconds=rng.randint(1, 120))
+        sale_date = when.strftime("%Y-%m-%d %H:%M:%S")
+        total = 0.0
+        for _ in range(num_lines):
+            product_id = rng.randint(1, NUM_PRODUCTS)
+            unit_price = 10.0 + product_id % 500
+            quantity = rng.randint(1, 3)
+            details.append((sales_id, product_id, quantity, unit_price, unit_price * quantity))
+            total += unit_price * quantity
+        method = rng.choice(METHODS)
+        sales.append((sales_id, sale_date, total, method, total, 0))
+        invoices.append((sales_id, sales_id, sale_date, total, total, 0, method))
+    conn.execute("BEGIN")
+    conn.executemany("INSERT INTO Sales (SalesID, SaleDate, TotalAmount, PaymentMethod, AmountPaid, BalanceDue) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", sales)
+    conn.executemany("INSERT INTO SaleDetails (SalesID, ProductID, Quantity, UnitPrice, Subtotal) "
+                     "VALUES (?, ?, ?, ?, ?)", details)
+    conn.executemany("INSERT INTO Invoices (InvoiceID, SalesID, InvoiceDate, TotalAmount, AmountPaid, BalanceDue, "
+                     "PaymentMethod) VALUES (?, ?, ?, ?, ?, ?, ?)", invoices)
+    conn.execute("COMMIT")
+    return conn, sales
+
+
+def ms(start):
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=200000)
+    parser.add_argument("--lines", type=int, default=4)
+    parser.add_argument("--max-reprint-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    db_path = create_db(scratch_db_path(), NUM_PRODUCTS)
+    start = time.perf_counter()
+    conn, sales = build(db_path, args.sales, args.lines)
+    print(f"{args.sales} sales from {sales[0][1][:10]} to {sales[-1][1][:10]} built in "
+          f"{time.perf_counter() - start:.1f}s")
+
+    middle = sales[len(sales) // 2][1][:10]
+    searches = [
+        ("one month", dict(date_from=middle[:8] + "01", date_to=middle[:8] + "28")),
+        ("payment method", dict(payment_method="UPI")),
+        ("amount range", dict(min_amount=900.0, max_amount=950.0)),
+        ("month + method + amount", dict(date_from=middle[:8] + "01", date_to=middle[:8] + "28",
+                                         payment_method="Card", min_amount=500.0)),
+        ("SalesID", dict(sales_id=len(sales) // 3)),
+    ]
+    failures = []
+    print(f"{'search':<24} {'matches':>8} {'first page':>11} {'page 100':>9}")
+    for name, filters in searches:
+        start = time.perf_counter()
+        page = search_invoices(conn, limit=PAGE, **filters)
+        first_ms = ms(start)
+        seen = [row.invoice_id for row in page.rows]
+        deep_ms = None
+        while page.next_after is not None:
+            start = time.perf_counter()
+            page = search_invoices(conn, after=page.next_after, limit=PAGE, **filters)
+            if len(seen) // PAGE == 99:
+                deep_ms = ms(start)
+            seen.extend(row.invoice_id for row in page.rows)
+
+        expected = [s[0] for s in sales
+                    if (filters.get("sales_id") is None or s[0] == filters["sales_id"])
+                    and (filters.get("date_from") is None or s[1][:10] >= filters["date_from"])
+                    and (filters.get("date_to") is None or s[1][:10] <= filters["date_to"])
+                    and (filters.get("payment_method") is None or s[3] == filters["payment_method"])
+                    and (filters.get("min_amount") is None or s[2] >= filters["min_amount"])
+                    and (filters.get("max_amount") is None or s[2] <= filters["max_amount"])]
+        if sorted(seen) != sorted(expected) or len(seen) != len(set(seen)):
+            failures.append(f"paging '{name}' returned {len(seen)} invoices for {len(expected)} matches")
+
+        print(f"{name:<24} {len(expected):>8} {first_ms:>9.2f}ms "
+              f"{(f'{deep_ms:.2f}ms' if deep_ms is not None else '-'):>9}")
+
+    # Page 100 the way a LIMIT/OFFSET pager would fetch it: every skipped row is still read
+    start = time.perf_counter()
+    conn.execute("SELECT * FROM Invoices WHERE PaymentMethod = ? ORDER BY InvoiceDate DESC, InvoiceID DESC "
+                 "LIMIT ? OFFSET ?", ("UPI", PAGE, 99 * PAGE)).fetchall()
+    print(f"{'payment method, OFFSET':<24} {'':>8} {'':>11} {ms(start):>7.2f}ms")
+    conn.close()
+
+    store = LocalStore(db_path, pool_size=1)
+    archive = BillArchive(tempfile.mkdtemp(prefix="sms_bench_bills_"))
+    service = InvoiceService(store=store, archive=archive, cache_size=64)
+    rng = random.Random(1)
+    recent = [rng.randint(len(sales) - 200, len(sales)) for _ in range(2000)]
+
+    start = time.perf_counter()
+    for sales_id in set(recent):
+        pdf = service.bill_pdf(sales_id)
+        total = sales[sales_id - 1][2]
+        if f"Subtotal: ${to_paise(total) // 100}.{to_paise(total) % 100:02d}".encode() not in pdf:
+            failures.append(f"rebuilt bill of sale {sales_id} does not show its total")
+            break
+    render_ms = ms(start) / len(set(recent))
+    service.cache.hits = service.cache.misses = 0
+    start = time.perf_counter()
+    for sales_id in recent:
+        service.bill_pdf(sales_id)
+    cached_ms = ms(start) / len(recent)
+    print(f"bill PDF: rebuilt {render_ms:.3f}ms, through the 64-entry LRU {cached_ms:.3f}ms "
+          f"({service.cache.hits} hits, {service.cache.misses} misses over the last 200 sales)")
+    if len(service.cache.pdfs) > 64:
+        failures.append(f"PDF cache holds {len(service.cache.pdfs)} bills, over its capacity")
+
+    invoice_id = len(sales) // 2
+    start = time.perf_counter()
+    path = service.reprint(invoice_id)
+    first_reprint_ms = ms(start)
+    start = time.perf_counter()
+    again = service.reprint(invoice_id)
+    second_reprint_ms = ms(start)
+    print(f"reprint of a sale without a bill file: {first_reprint_ms:.2f}ms, then {second_reprint_ms:.2f}ms")
+    if path is None or path != again or not path.endswith(f"bill_{invoice_id}_{invoice_id}.pdf"):
+        failures.append(f"reprint of invoice {invoice_id} returned {path}, then {again}")
+    if service.reprint(len(sales) + 1) is not None:
+        failures.append("reprint of an unknown invoice returned a file")
+    if max(first_reprint_ms, second_reprint_ms) > args.max_reprint_ms:
+        failures.append(f"reprint took {max(first_reprint_ms, second_reprint_ms):.2f}ms, "
+                        f"over {args.max_reprint_ms}ms")
+    store.close()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        raise SystemExit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Receipts per second: template PDF renderer, thermal text and ESC/POS, and the background writer.
+
+Renders --receipts receipts of --lines items each in memory with each
+renderer. If reportlab is installed, the canvas bill that checkout used to
+draw is timed too. It then submits the same receipts to a ReceiptWriter in
+a temporary directory. It reports how long submit() holds up checkout and
+how many bills per second reach the disk.
+
+Exits with status 1 if a PDF's cross-reference table does not point at
+its objects, if the writer loses a bill, or if submit() takes longer than
+--max-submit-ms.
+
+Usage: python benchmarks/bench_receipts.py [--receipts 2000] [--lines 12] [--max-submit-ms 1]
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+import common  # noqa: F401  (puts pages/ on sys.path)
+
+from cart import format_rupees
+from receipts import PdfReceiptTemplate, Receipt, ReceiptWriter, ThermalReceiptTemplate, SHOP_ADDRESS, SHOP_NAME
+
+
+def make_receipts(count, lines):
+    return [Receipt("2025-06-15", f"{10 + n // 3600 % 10:02d}:{n // 60 % 60:02d}:{n % 60:02d}",
+                    [(f"Product {(n * 7 + i) % 5000:06d}", 1000 + 37 * i) for i in range(lines)],
+                    sum(1000 + 37 * i for i in range(lines)), n + 1, n + 1)
+            for n in range(count)]
+
+
+def reportlab_bill(receipt, file_path):
+    """The canvas bill checkout drew before receipts.py, for comparison."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(file_path, pagesize=letter)
+    width, height = letter
+    y = height - 50
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, y, SHOP_NAME)
+    c.setFont("Helvetica", 12)
+    c.drawString(50, y - 20, SHOP_ADDRESS)
+    c.drawString(50, y - 40, f"Date: {receipt.date}")
+    c.drawString(50, y - 60, f"Time: {receipt.time}")
+    y -= 100
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, y, "Item No.")
+    c.drawString(150, y, "Name")
+    c.drawString(350, y, "Price")
+    c.line(50, y - 10, 550, y - 10)
+    y -= 30
+    c.setFont("Helvetica", 12)
+    for row, (name, gross_paise) in enumerate(receipt.lines):
+        c.drawString(50, y, str(row + 1))
+        c.drawString(150, y, name)
+        c.drawString(350, y, f"${format_rupees(gross_paise)}")
+        y -= 20
+        if y < 50:
+            c.showPage()
+            y = height - 50
+            c.setFont("Helvetica", 12)
+    y -= 20
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, y, f"Subtotal: ${format_rupees(receipt.total_paise)}")
+    c.setFont("Helvetica-Oblique", 12)
+    c.drawString(50, y - 40, "Visit us again!")
+    c.save()
+
+
+def xref_errors(pdf):
+    """Objects whose cross-reference offset does not point at them."""
+    start = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", pdf).group(1))
+    match = re.match(rb"xref\n0 (\d+)\n", pdf[start:])
+    count = int(match.group(1))
+    table = pdf[start + match.end():start + match.end() + 20 * count]
+    errors = []
+    for object_id in range(1, count):
+        offset = int(table[20 * object_id:20 * object_id + 10])
+        if not pdf.startswith(b"%d 0 obj\n" % object_id, offset):
+            errors.append(object_id)
+    return errors
+
+
+def timed(receipts, render):
+    start = time.perf_counter()
+    for receipt in receipts:
+        render(receipt)
+    return len(receipts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--receipts", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=12)
+    parser.add_argument("--max-submit-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    receipts = make_receipts(args.receipts, args.lines)
+    pdf = PdfReceiptTemplate()
+    thermal = ThermalReceiptTemplate()
+    rates = [("template PDF", timed(receipts, pdf.render_bytes)),
+             ("thermal text", timed(receipts, thermal.render_text)),
+             ("ESC/POS", timed(receipts, thermal.render_escpos))]
+    try:
+        import reportlab  # noqa: F401
+    except ImportError:
+        print("reportlab not installed; skipping the canvas baseline")
+    else:
+        directory = tempfile.mkdtemp(prefix="sms_bench_bills_")
+        sample = receipts[:max(1, len(receipts) // 10)]
+        rates.append(("reportlab canvas", timed(
+            sample, lambda r: reportlab_bill(r, os.path.join(directory, f"bill_{r.sales_id}.pdf")))))
+
+    print(f"{args.receipts} receipts of {args.lines} lines")
+    print(f"{'renderer':<17} {'receipts/s':>11}")
+    for name, rate in rates:
+        print(f"{name:<17} {rate:>11.0f}")
+
+    failures = []
+    for lines in (0, 1, 29, 30, 31, 200):
+        bad = xref_errors(pdf.render_bytes(make_receipts(1, lines)[0]))
+        if bad:
+            failures.append(f"{lines}-line PDF has bad xref offsets for objects {bad}")
+
+    directory = tempfile.mkdtemp(prefix="sms_bench_bills_")
+    writer = ReceiptWriter()
+    saved, failed = [], []
+    submit_times = []
+    start = time.perf_counter()
+    for receipt in receipts:
+        submitted = time.perf_counter()
+        writer.submit(receipt, os.path.join(directory, f"bill_{receipt.sales_id}.pdf"),
+                      on_saved=saved.append, on_failed=lambda path, message: failed.append(message))
+        submit_times.append((time.perf_counter() - submitted) * 1000)
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    writer.close()
+
+    submit_times.sort()
+    submit_p99 = submit_times[int(len(submit_times) * 0.99)]
+    print(f"background writer: {len(saved) / elapsed:.0f} bills/s to disk, "
+          f"submit p50 {submit_times[len(submit_times) // 2] * 1000:.1f}us, p99 {submit_p99 * 1000:.1f}us")
+
+    if len(saved) != len(receipts) or failed or len(os.listdir(directory)) != len(receipts):
+        failures.append(f"{len(saved)} of {len(receipts)} bills saved, {len(failed)} failed")
+    if submit_p99 > args.max_submit_ms:
+        failures.append(f"submit p99 {submit_p99:.2f}ms is over the {args.max_submit_ms}ms budget")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        raise SystemExit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Report wall-clock time for day, month and year reports: serial vs. parallel chart rendering.
+
+Runs SalesAnalyzer headless end to end (queries, charts, PDF) with 1, 2, ... worker
+processes. Reports are written under a temporary HOME, not ~/Documents.
+
+Usage: python benchmarks/bench_report_render.py [--years 1] [--workers 1 2 4] [--products 60]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import bench_reports
+import report_charts
+from gen_report import SalesAnalyzer
+from store import LocalStore
+
+
+def run_report(store, analysis_type, period, workers):
+    analyzer = SalesAnalyzer(store=store, headless=True, workers=workers)
+    start = time.perf_counter()
+    args = {'day': (period, None, None), 'month': (None, period, None), 'year': (None, None, period)}[analysis_type]
+    pdf_path = analyzer.main(*args, analysis_type)
+    elapsed = time.perf_counter() - start
+    assert pdf_path is not None, f"{analysis_type} report produced no PDF"
+    return elapsed * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--sales-per-day", type=int, default=20)
+    parser.add_argument("--products", type=int, default=60,
+                        help="products in the catalog; bar chart and table height grows with it")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ["HOME"] = tempfile.mkdtemp(prefix="sms_bench_home_")
+    bench_reports.NUM_PRODUCTS = args.products
+    conn, num_sales = bench_reports.build_history(args.years, args.sales_per_day)
+    store = LocalStore(conn.execute("PRAGMA database_list").fetchone()[2])
+    conn.close()
+
+    periods = [("day", "2025-06-15"), ("month", "2025-06"), ("year", "2025")]
+    workers_list = sorted(set(args.workers))
+    print(f"{num_sales} sales, {args.products} products, {os.cpu_count()} cores")
+    print(f"{'report':>6} " + " ".join(f"{f'{w} worker(s) (ms)':>17}" for w in workers_list))
+    for analysis_type, period in periods:
+        timings = []
+        for workers in workers_list:
+            run_report(store, analysis_type, period, workers)  # warm the pool and the page cache
+            timings.append(min(run_report(store, analysis_type, period, workers) for _ in range(args.repeat)))
+        print(f"{analysis_type:>6} " + " ".join(f"{ms:>17.0f}" for ms in timings))
+    report_charts.shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
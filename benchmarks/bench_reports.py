@@ -0,0 +1,95 @@
+"""Report query latency vs. history size: full-table loads, SQL pushdown and the sales rollups.
+
+Usage: python benchmarks/bench_reports.py [--years 1 4 16] [--sales-per-day 40]
+"""
+import argparse
+import sqlite3
+import time
+from datetime import date, timedelta
+
+from common import create_db, scratch_db_path
+
+from migrations import migrate
+import rollups
+import sales_queries
+
+LINES_PER_SALE = 3
+NUM_PRODUCTS = 500
+
+
+def build_history(years, sales_per_day):
+    """Database with `years` of history ending on 2025-12-31, rollups built by the catch-up path."""
+    conn = sqlite3.connect(create_db(scratch_db_path(), NUM_PRODUCTS), isolation_level=None)
+    conn.execute("DROP TRIGGER Sales_Rollup")
+    conn.execute("DROP TRIGGER SaleDetails_Rollup")
+    conn.execute("BEGIN")
+    day = date(2025 - years + 1, 1, 1)
+    sales_id = 0
+    while day.year <= 2025:
+        sales, details = [], []
+        for n in range(sales_per_day):
+            sales_id += 1
+            sales.append((sales_id, f"{day.isoformat()} {9 + n % 12:02d}:{n % 60:02d}:00", 300.0, "Cash", 300.0, 0.0))
+            for line in range(LINES_PER_SALE):
+                product_id = 1 + (sales_id * 7 + line * 13) % NUM_PRODUCTS
+                details.append((sales_id, product_id, 1 + line, 50.0, 50.0 * (1 + line), 1))
+        conn.executemany("INSERT INTO Sales VALUES (?, ?, ?, ?, ?, ?)", sales)
+        conn.executemany("INSERT INTO SaleDetails (SalesID, ProductID, Quantity, UnitPrice, Subtotal, DiscountID) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", details)
+        day += timedelta(days=1)
+    conn.execute("COMMIT")
+    migrate(conn)  # the report indexes and the rollups, as login applies them at start-up
+    return conn, sales_id
+
+
+def full_load_report(conn, analysis_type, period):
+    """What load_data_from_db + analyze_sales_for_* used to do: load everything, filter in Python."""
+    sales = conn.execute("SELECT * FROM Sales").fetchall()
+    details = conn.execute("SELECT * FROM SaleDetails").fetchall()
+    names = {row[0]: row[1] for row in conn.execute("SELECT * FROM Product")}
+    sale_ids = {row[0] for row in sales if row[1].startswith(period)}
+    total = sum(row[2] for row in sales if row[0] in sale_ids)
+    per_product = {}
+    for _, sales_id, product_id, quantity, _, subtotal, _ in details:
+        if sales_id in sale_ids and product_id in names:
+            quantity_sum, subtotal_sum = per_product.get(product_id, (0, 0.0))
+            per_product[product_id] = (quantity_sum + quantity, subtotal_sum + subtotal)
+    return total, len(sale_ids), per_product
+
+
+def query_layer_report(queries, conn, analysis_type, period):
+    result = (queries.sales_summary(conn, analysis_type, period), queries.product_sales(conn, analysis_type, period))
+    if analysis_type == 'year':
+        result += (queries.monthly_totals(conn, period),)
+    return result
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--sales-per-day", type=int, default=40)
+    args = parser.parse_args()
+
+    periods = [("day", "2025-06-15"), ("month", "2025-06"), ("year", "2025")]
+    print(f"{'history':>16} {'report':>6} {'full load (ms)':>15} {'pushdown (ms)':>14} {'rollups (ms)':>13}")
+    for years in args.years:
+        conn, num_sales = build_history(years, args.sales_per_day)
+        for analysis_type, period in periods:
+            before = timed(full_load_report, conn, analysis_type, period)
+            pushdown = timed(query_layer_report, sales_queries, conn, analysis_type, period)
+            after = timed(query_layer_report, rollups, conn, analysis_type, period)
+            print(f"{num_sales:>10} sales {analysis_type:>6} {before:>15.1f} {pushdown:>14.2f} {after:>13.2f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Simulated lane scanner feeding the headless scan pipeline.
+
+A writer thread plays a serial scanner: it writes newline-terminated codes
+into a pipe at --rate scans per second, and repeats some reads the way a
+real scanner double-reads an item. A StreamSource reads the pipe and hands
+the codes to a consumer thread through a queue, the same hand-off the queued
+Qt signal does. The consumer runs ScanPipeline against a CatalogCache and
+adds each product to a Cart. The keyboard-wedge path is also replayed with
+scanner and human keystroke timings through WedgeBuffer, checking that a
+fast typist's keys all reach the focus widget in order.
+
+Exits with status 1 if the pipeline cannot sustain --min-rate scans per
+second, if a scan is lost or added twice, or if typing is taken for a scan
+or loses keys.
+
+Usage: python benchmarks/bench_scanner_feed.py [--scans 2000] [--rate 0 (as fast as possible)] [--min-rate 10]
+"""
+import argparse
+import os
+import queue
+import random
+import threading
+import time
+
+from common import create_db, scratch_db_path
+
+from cart import Cart
+from catalog import CatalogCache
+from db import connect
+from migrations import migrate
+from scanner_input import ScanDebouncer, ScanPipeline, StreamSource, WedgeBuffer
+from store import LocalStore
+
+NUM_PRODUCTS = 5000
+DOUBLE_READ_EVERY = 7  # every 7th scan is read twice, 20ms apart
+
+
+def barcode(product_id):
+    return f"8900000{product_id:06d}"
+
+
+def scanner(write_fd, codes, rate, sent_times):
+    """Write codes to the pipe, double-reading some, at rate scans/s (0 = no pacing)."""
+    with os.fdopen(write_fd, "wb", buffering=0) as pipe:
+        start = time.perf_counter()
+        for n, code in enumerate(codes):
+            if rate:
+                delay = start + n / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            sent_times.append(time.perf_counter())
+            pipe.write(code.encode() + b"\n")
+            if n % DOUBLE_READ_EVERY == 0:
+                time.sleep(0.02)
+                pipe.write(code.encode() + b"\n")
+
+
+def replay_wedge():
+    """(codes from a scanner burst, codes from a person typing the same digits)."""
+    scanned, typed = [], []
+    buffer = WedgeBuffer()
+    now = 0.0
+    for char in "8900000000042\r":
+        now += 0.004  # scanners send a key every few milliseconds
+        code = buffer.feed(char, now)
+        if code:
+            scanned.append(code)
+    now += 1.0
+    for char in "8900000000042\r":
+        now += 0.15  # a fast typist
+        code = buffer.feed(char, now)
+        if code:
+            typed.append(code)
+    return scanned, typed
+
+
+def replay_focus_widget(keys):
+    """What the focus widget receives for (char, seconds since the previous key) keystrokes, and the codes scanned.
+
+    Plays ScannerService's part: held keys are delivered when the buffer
+    releases them, and the expiry timer runs after the last key.
+    """
+    buffer = WedgeBuffer()
+    received, scanned = [], []
+    now = 0.0
+    for char, gap in keys:
+        now += gap
+        code = buffer.feed(char, now)
+        received.extend(buffer.released)
+        if code:
+            scanned.append(code)
+        elif not buffer.hold:
+            received.append(char)
+    received.extend(buffer.expire(now + 1.0))
+    return "".join(received), scanned
+
+
+def check_fast_typing(failures):
+    cases = [
+        # (description, keystrokes, text the focus widget must get, codes)
+        ("two fast keys", [("1", 0.5), ("2", 0.03)], "12", []),
+        ("two fast keys, then a slow one", [("1", 0.5), ("2", 0.03), ("3", 0.2)], "123", []),
+        ("short code and Enter", [("1", 0.5), ("2", 0.01), ("3", 0.01), ("\r", 0.01)], "123\r", []),
+        ("scanner burst", [(char, 0.004) for char in "8900000000042\r"], "", ["8900000000042"]),
+        ("typing, then a scan", [("5", 0.5), ("8", 0.5)] + [(char, 0.004) for char in "900000000042\r"],
+         "5", ["8900000000042"]),
+    ]
+    for description, keys, text, codes in cases:
+        received, scanned = replay_focus_widget(keys)
+        print(f"keyboard wedge, {description}: widget got {received!r}, scanned {scanned}")
+        if received != text or scanned != codes:
+            failures.append(f"keyboard wedge, {description}: expected {text!r} and {codes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scans", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=0.0, help="scans per second, 0 for as fast as possible")
+    parser.add_argument("--min-rate", type=float, default=10.0)
+    args = parser.parse_args()
+
+    db_path = create_db(scratch_db_path(), NUM_PRODUCTS)
+    conn = connect(db_path)
+    migrate(conn)
+    conn.executemany("INSERT INTO ProductBarcode (Barcode, ProductID) VALUES (?, ?)",
+                     [(barcode(pid), pid) for pid in range(1, NUM_PRODUCTS + 1)])
+    conn.close()
+    store = LocalStore(db_path, pool_size=1)
+    catalog = CatalogCache(store)
+    catalog.product_for_barcode(barcode(1))  # load the index up front, as the billing page does
+
+    rng = random.Random(0)
+    codes = [barcode(rng.randint(1, NUM_PRODUCTS)) for _ in range(args.scans)]
+    # Consecutive identical codes would be debounced as one item; keep the feed unambiguous
+    for n in range(1, len(codes)):
+        if codes[n] == codes[n - 1]:
+            codes[n] = barcode(1 + int(codes[n][-6:]) % NUM_PRODUCTS)
+
+    cart = Cart()
+    added_times = []
+    unknown = []
+
+    def on_product(product):
+        cart.add(product, 1, catalog.discount_value(product.discount_id))
+        added_times.append(time.perf_counter())
+
+    pipeline = ScanPipeline(catalog, on_product, unknown.append, ScanDebouncer())
+    handoff = queue.Queue()
+    read_fd, write_fd = os.pipe()
+    source = StreamSource(os.fdopen(read_fd, "rb", buffering=0), handoff.put).start()
+
+    sent_times = []
+    start = time.perf_counter()
+    writer = threading.Thread(target=scanner, args=(write_fd, codes, args.rate, sent_times))
+    writer.start()
+    while len(added_times) < len(codes):
+        try:
+            code = handoff.get(timeout=2.0)
+        except queue.Empty:
+            break
+        pipeline.feed(code)
+    elapsed = time.perf_counter() - start
+    writer.join()
+    source.stop()
+    store.close()
+
+    latencies = sorted((added - sent) * 1000 for sent, added in zip(sent_times, added_times))
+    rate = len(added_times) / elapsed
+    print(f"{len(codes)} scans ({len(codes) // DOUBLE_READ_EVERY + 1} double reads) in {elapsed:.2f}s: "
+          f"{rate:.0f} scans/s into the cart")
+    if latencies:
+        print(f"scan to cart latency: p50 {latencies[len(latencies) // 2]:.2f}ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)]:.2f}ms")
+
+    failures = []
+    if rate < args.min_rate:
+        failures.append(f"{rate:.1f} scans/s is below the {args.min_rate} target")
+    if [line.product_id for line in cart] != [int(code[-6:]) for code in codes]:
+        failures.append(f"cart has {len(cart)} lines for {len(codes)} scans (lost, reordered or doubled)")
+    if unknown:
+        failures.append(f"{len(unknown)} registered barcodes were reported unknown")
+    scanned, typed = replay_wedge()
+    print(f"keyboard wedge: scanner burst -> {scanned}, typed digits -> {typed}")
+    if scanned != ["8900000000042"] or typed:
+        failures.append("keyboard wedge timing did not separate scans from typing")
+    check_fast_typing(failures)
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        raise SystemExit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
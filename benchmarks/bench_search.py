@@ -0,0 +1,116 @@
+"""Type-ahead search over a large catalogue: ProductSearchIndex vs a linear substring scan.
+
+Builds an index over --products generated names, then times search() for
+name-prefix, word-prefix, substring and multi-word queries, incremental
+add/rename/remove, and checks contains() against a brute-force scan.
+Exits with status 1 if a result disagrees or a search misses the budget.
+
+Usage: python benchmarks/bench_search.py [--products 100000] [--budget-ms 1.0]
+"""
+import argparse
+import random
+import time
+
+import common  # noqa: F401  (puts pages/ on sys.path)
+
+from search_index import ProductSearchIndex
+
+BRANDS = ["Amul", "Britannia", "Parle", "Haldiram", "Nestle", "Tata", "Dabur", "Patanjali", "Cadbury", "Colgate",
+          "Surf", "Lays", "Maggi", "Kissan", "Fortune", "Aashirvaad", "Everest", "MDH", "Lipton", "Bru"]
+ITEMS = ["Butter", "Milk", "Biscuits", "Namkeen", "Noodles", "Tea", "Coffee", "Atta", "Rice", "Dal", "Oil", "Ghee",
+         "Soap", "Shampoo", "Toothpaste", "Chips", "Ketchup", "Jam", "Masala", "Sugar", "Salt", "Paneer", "Curd"]
+SIZES = ["100g", "200g", "500g", "1kg", "5kg", "250ml", "500ml", "1L", "Pack of 6", "Family Pack"]
+QUERIES = {
+    "name prefix": ["am", "brit", "haldiram n", "tata t", "m", "kissan ketchup 5"],
+    "word prefix": ["ketch", "noodl", "500g", "pack", "pan", "ghee 1"],
+    "substring": ["itan", "eetc", "ppack", "ldira", "oodle"],
+    "multi-word": ["amul butter", "tea 250", "maggi masala 1", "rice family"],
+}
+
+
+def make_names(count, seed=0):
+    rng = random.Random(seed)
+    return {product_id: f"{rng.choice(BRANDS)} {rng.choice(ITEMS)} {rng.choice(SIZES)} {product_id:06d}"
+            for product_id in range(1, count + 1)}
+
+
+def linear_search(names, text, limit):
+    """What filtering the combo box by substring costs without an index."""
+    needle = text.lower()
+    return [pid for pid, name in names.items() if needle in name.lower()][:limit]
+
+
+def time_queries(fn, queries, repeat):
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            fn(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return sum(samples) / len(samples), samples[int(len(samples) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="p99 search budget")
+    args = parser.parse_args()
+
+    names = make_names(args.products)
+    start = time.perf_counter()
+    index = ProductSearchIndex(names)
+    print(f"built index over {len(index)} products in {time.perf_counter() - start:.2f}s")
+
+    failures = []
+    print(f"{'query kind':<12} {'index avg':>10} {'index p99':>10} {'linear avg':>11}")
+    for kind, queries in QUERIES.items():
+        avg, p99 = time_queries(index.search, queries, args.repeat)
+        linear_avg, _ = time_queries(lambda q: linear_search(names, q, 20), queries, 1)
+        print(f"{kind:<12} {avg:>8.3f}ms {p99:>8.3f}ms {linear_avg:>9.2f}ms")
+        if p99 > args.budget_ms:
+            failures.append(f"{kind} p99 {p99:.3f}ms over the {args.budget_ms}ms budget")
+
+    for queries in QUERIES.values():
+        for query in queries:
+            needle = query.lower()
+            for product_id in index.search(query):
+                if needle not in names[product_id].lower() and not all(
+                        any(token.startswith(word) for token in names[product_id].lower().split())
+                        for word in needle.split()):
+                    failures.append(f"search({query!r}) returned non-matching {names[product_id]!r}")
+
+    rng = random.Random(1)
+    edits = 1000
+    start = time.perf_counter()
+    for n in range(edits):
+        new_id = args.products + n + 1
+        names[new_id] = f"{rng.choice(BRANDS)} {rng.choice(ITEMS)} Special {n}"
+        index.add(new_id, names[new_id])
+        renamed = rng.randint(1, args.products)
+        names[renamed] = f"{rng.choice(BRANDS)} {rng.choice(ITEMS)} Renamed {n}"
+        index.add(renamed, names[renamed])
+        removed = rng.randint(1, args.products)
+        if removed in names and removed != renamed:
+            del names[removed]
+            index.remove(removed)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"incremental add + rename + remove: {elapsed / edits:.3f}ms per round")
+
+    if not index.search("renamed 999") or names[index.search("renamed 999")[0]].lower().find("renamed 999") < 0:
+        failures.append("renamed product not found by its new name")
+    for query in ["a", "ma", "special", "renamed 1", "ketchup 5", "zzz", "Amul Butter 1kg"]:
+        expected = sorted(pid for pid, name in names.items() if query.lower() in name.lower())
+        if index.contains(query) != expected:
+            failures.append(f"contains({query!r}) disagrees with a linear scan")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        raise SystemExit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
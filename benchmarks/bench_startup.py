@@ -0,0 +1,84 @@
+"""Startup latency: launch to login form, and login to dashboard shown.
+
+Each run is a fresh Python process (cold imports) on the offscreen Qt
+platform against a scratch database. The child imports login.py, shows the
+LoginForm, then logs in the way check_credentials does and times until the
+dashboard has been shown and painted. --eager also builds every page right
+after login, which is what MainWindow did before pages were created on first
+navigation.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--products 5000] [--eager] [--budget-ms N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from common import PAGES_DIR, create_db, scratch_db_path
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+import login
+from dashboard import PAGES
+imported = time.perf_counter()
+
+app = QApplication(sys.argv)
+form = login.LoginForm()
+form.show()
+app.processEvents()
+login_shown = time.perf_counter()
+
+form.textbox_username.setText("admin")
+form.textbox_password.setText("password")
+clicked = time.perf_counter()
+form.check_credentials()
+if "--eager" in sys.argv:
+    for key in PAGES:
+        form.main_window.page(key)
+app.processEvents()
+dashboard_shown = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "login_form_ms": (login_shown - start) * 1000,
+    "login_to_dashboard_ms": (dashboard_shown - clicked) * 1000,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def run_once(db_path, eager):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", SMS_STORE_URL=f"sqlite:///{db_path}")
+    args = [sys.executable, "-c", CHILD] + (["--eager"] if eager else [])
+    result = subprocess.run(args, cwd=PAGES_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--eager", action="store_true", help="also build every page after login")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if the median login-to-dashboard time exceeds this")
+    args = parser.parse_args()
+
+    db_path = create_db(scratch_db_path(), args.products)
+    runs = [run_once(db_path, args.eager) for _ in range(args.runs)]
+    for key in ("import_ms", "login_form_ms", "login_to_dashboard_ms"):
+        values = [run[key] for run in runs]
+        print(f"{key:<22} median {statistics.median(values):8.1f}ms   max {max(values):8.1f}ms")
+    print(f"{'modules loaded':<22} {runs[-1]['modules']}")
+
+    median = statistics.median(run["login_to_dashboard_ms"] for run in runs)
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f"FAIL login to dashboard {median:.1f}ms is over the {args.budget_ms}ms budget")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
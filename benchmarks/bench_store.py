@@ -0,0 +1,113 @@
+"""Multi-till checkout throughput against one shared store, local file vs. store_server.py.
+
+Each client process plays a till committing small baskets through
+checkout.commit_sale for a fixed time. The remote runs go through a
+store_server.py process on localhost. After every run the stock levels are
+checked against the quantities the clients report as sold, so lost updates
+show up as a failure rather than as a fast number.
+
+Usage: python benchmarks/bench_store.py [--clients 1 2 4 8] [--seconds 3]
+"""
+import argparse
+import multiprocessing
+import random
+import time
+
+from common import create_db, scratch_db_path
+
+from checkout import commit_sale
+from db import connect
+from store import LocalStore, RemoteStore
+from store_server import StoreServer
+
+NUM_PRODUCTS = 50
+INITIAL_STOCK = 10 ** 9
+BASKET_LINES = 4
+STORE_KEY = "bench"
+
+
+def serve(db_path, ready, port):
+    with StoreServer(("127.0.0.1", 0), db_path, STORE_KEY) as server:
+        port.value = server.server_address[1]
+        ready.set()
+        server.serve_forever()
+
+
+def till(args):
+    """Commit baskets until the deadline; returns (sales, {ProductID: quantity sold})."""
+    store_spec, seed, deadline = args
+    kind, location = store_spec
+    store = LocalStore(location, pool_size=1) if kind == "local" else RemoteStore("127.0.0.1", location, pool_size=1, key=STORE_KEY)
+    rng = random.Random(seed)
+    sold = {}
+    sales = 0
+    while time.time() < deadline:
+        lines = []
+        for product_id in rng.sample(range(1, NUM_PRODUCTS + 1), BASKET_LINES):
+            quantity = rng.randint(1, 3)
+            lines.append((product_id, quantity, 10.0, 1))
+        with store.connection() as conn:
+            commit_sale(conn, lines, 100.0, "Cash", 100.0, "2025-06-15 10:00:00")
+        for product_id, quantity, _, _ in lines:
+            sold[product_id] = sold.get(product_id, 0) + quantity
+        sales += 1
+    store.close()
+    return sales, sold
+
+
+def run(store_spec, db_path, clients, seconds):
+    deadline = time.time() + seconds
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.map(till, [(store_spec, seed, deadline) for seed in range(clients)])
+
+    sales = sum(count for count, _ in results)
+    sold = {}
+    for _, per_product in results:
+        for product_id, quantity in per_product.items():
+            sold[product_id] = sold.get(product_id, 0) + quantity
+
+    conn = connect(db_path)
+    stock = dict(conn.execute("SELECT ProductID, StockLevel FROM Product"))
+    conn.close()
+    lost = [pid for pid in stock if stock[pid] != INITIAL_STOCK - sold.get(pid, 0)]
+    return sales / seconds, lost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(f"{'clients':>7} {'local (sales/s)':>16} {'remote (sales/s)':>17}")
+    failed = False
+    for clients in args.clients:
+        row = []
+        for kind in ("local", "remote"):
+            db_path = create_db(scratch_db_path(), NUM_PRODUCTS, INITIAL_STOCK)
+            server = None
+            if kind == "local":
+                store_spec = ("local", db_path)
+            else:
+                ready, port = multiprocessing.Event(), multiprocessing.Value("i", 0)
+                server = multiprocessing.Process(target=serve, args=(db_path, ready, port), daemon=True)
+                server.start()
+                ready.wait()
+                store_spec = ("remote", port.value)
+            try:
+                rate, lost = run(store_spec, db_path, clients, args.seconds)
+            finally:
+                if server is not None:
+                    server.terminate()
+                    server.join()
+            if lost:
+                failed = True
+                print(f"{kind}: stock of products {lost} does not match the quantities sold")
+            row.append(rate)
+        print(f"{clients:>7} {row[0]:>16.0f} {row[1]:>17.0f}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Memory behind the Products table: catalog rows alone vs one formatted cell per item.
+
+CatalogTableModel keeps only the cached ProductRows and formats cells as
+the view paints them. The old QTableWidget needed a formatted string (plus a
+QTableWidgetItem, not counted here) for every cell up front. Qt is not
+needed; this measures the Python side with tracemalloc.
+
+Usage: python benchmarks/bench_table_memory.py [--products 10000 100000]
+"""
+import argparse
+import time
+import tracemalloc
+
+from common import create_db, scratch_db_path
+
+from catalog import CatalogCache, PRODUCT
+from store import LocalStore
+
+COLUMNS = ["product_id", "name", "category_id", "price", "stock_level", "restock_level", "supplier_id", "discount_id"]
+VISIBLE_ROWS = 30
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size / 2 ** 20, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'products':>9} {'catalog rows':>13} {'+ visible cells':>16} {'+ every cell':>13}")
+    for count in args.products:
+        store = LocalStore(create_db(scratch_db_path(), count), pool_size=1)
+        catalog = CatalogCache(store)
+        rows, rows_mb, load_s = measure(lambda: catalog.products())
+
+        def format_cells(limit):
+            return [[str(getattr(row, col)) for col in COLUMNS] for row in rows[:limit]]
+
+        _, visible_mb, _ = measure(lambda: format_cells(VISIBLE_ROWS))
+        _, every_mb, fill_s = measure(lambda: format_cells(len(rows)))
+        print(f"{count:>9} {rows_mb:>11.1f}MB {visible_mb:>14.3f}MB {every_mb:>11.1f}MB"
+              f"   (load {load_s:.2f}s, formatting every cell {fill_s:.2f}s)")
+        catalog.invalidate(PRODUCT)
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
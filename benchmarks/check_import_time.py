@@ -0,0 +1,78 @@
+"""Fail if launching the app imports too much.
+
+Runs `python -X importtime -c "import <module>"` in a fresh process for
+login.py and for the pages that front the heavy subsystems, then checks
+two things for each one. The total cumulative import time must be within
+budget. None of the barcode or analytics stacks may be loaded; those are
+imported when the operator first scans or runs a report. Exits with
+status 1 on any failure.
+
+Usage: python benchmarks/check_import_time.py [--budget-ms 400] [--runs 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from common import PAGES_DIR
+
+# Modules that must not be imported at start-up, and why they are heavy
+DEFERRED = {
+    "cv2": "barcode camera",
+    "pyzbar": "barcode decoding",
+    "pandas": "reports",
+    "matplotlib": "report charts",
+    "seaborn": "report charts",
+}
+ENTRY_MODULES = ["login", "billing", "report"]
+
+
+def import_times(module):
+    """({top-level import: cumulative microseconds}, every module name loaded) for a cold import of module."""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=PAGES_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    times = {}
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        loaded.add(name.strip())
+        # Nested imports are already in their parent's cumulative time
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=400.0, help="per entry module")
+    parser.add_argument("--runs", type=int, default=3, help="best of this many cold imports")
+    args = parser.parse_args()
+
+    failures = []
+    for module in ENTRY_MODULES:
+        runs = [import_times(module) for _ in range(args.runs)]
+        best = min((times for times, _ in runs), key=lambda times: sum(times.values()))
+        total_ms = sum(best.values()) / 1000
+        slowest = sorted(best.items(), key=lambda item: item[1], reverse=True)[:5]
+        print(f"{module}: {total_ms:.0f}ms  (" + ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in slowest) + ")")
+        if total_ms > args.budget_ms:
+            failures.append(f"import {module} took {total_ms:.0f}ms, budget {args.budget_ms:.0f}ms")
+        loaded = {name.split(".")[0] for _, names in runs for name in names}
+        for heavy, purpose in DEFERRED.items():
+            if heavy in loaded:
+                failures.append(f"import {module} loads {heavy}, which should wait until {purpose} is used")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        raise SystemExit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
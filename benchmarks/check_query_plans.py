@@ -0,0 +1,141 @@
+"""Fail if a known hot query falls back to a full table scan.
+
+Copies the database (sms.db by default) to a scratch file, applies the
+schema migrations and runs EXPLAIN QUERY PLAN over each hot query. Exits
+with status 1 and prints the offending plans if any query scans a table
+without an index, if a catalog load has to sort its table, or if a page
+statement below no longer appears in the application.
+
+Statements are imported from the modules that run them. The pages are Qt
+widgets that can't be imported here, so their statements are written out
+and checked against the statement catalogue (every SQL literal in pages/)
+instead, so a copy that has drifted from the page fails rather than
+checking a query nobody runs.
+
+Usage: python benchmarks/check_query_plans.py [path/to/sms.db]
+"""
+import os
+import shutil
+import sys
+
+from common import ROOT, scratch_db_path
+
+from bill_archive import LOOKUP_QUERIES
+from catalog import LOAD_QUERIES
+from checkout import DECREMENT_STOCK_QUERY, SHORTAGES_QUERY
+from db import connect
+from invoices import NO_DATE_FROM, NO_DATE_TO, NO_MAX_AMOUNT, NO_MIN_AMOUNT, RECEIPT_QUERIES, SEARCH_QUERIES
+from migrations import migrate
+from sales_queries import MONTHLY_TOTALS_QUERY, PRODUCT_SALES_QUERY, SUMMARY_QUERY
+from store_statements import build_catalogue, statement_name
+
+BASKET = '[[1, 2], [2, 1]]'
+
+# (description, SQL, parameters) for the lookups run on every sale, reprint and report
+HOT_QUERIES = [
+    ("checkout stock decrement", DECREMENT_STOCK_QUERY, (BASKET,)),
+    ("checkout shortages", SHORTAGES_QUERY, ('[1, 2]',)),
+    ("bill archive lookup by sale", LOOKUP_QUERIES["sale"], (1,)),
+    ("bill archive lookup by invoice", LOOKUP_QUERIES["invoice"], (1,)),
+    ("receipt of a sale", RECEIPT_QUERIES["sale"], (1,)),
+    ("receipt lines of a sale", RECEIPT_QUERIES["lines"], (1,)),
+    ("report sales in a period", SUMMARY_QUERY, ("2025-03-01", "2025-04-01")),
+    ("report product sales in a period", PRODUCT_SALES_QUERY, ("2025-03-01", "2025-04-01")),
+    ("report monthly totals", MONTHLY_TOTALS_QUERY, ("2025-01-01", "2026-01-01")),
+    ("invoice search by date range, next page",
+     SEARCH_QUERIES["date"], ("2025-03-01", "2025-04-01", NO_MIN_AMOUNT, NO_MAX_AMOUNT, "2025-03-15", 10, 51)),
+    ("invoice search by payment method", SEARCH_QUERIES["method"],
+     ("Cash", NO_DATE_FROM, NO_DATE_TO, NO_MIN_AMOUNT, NO_MAX_AMOUNT, NO_DATE_TO, 0, 51)),
+    ("invoice search by amount", SEARCH_QUERIES["amount"],
+     (100.0, 200.0, NO_DATE_FROM, NO_DATE_TO, NO_DATE_TO, 0, 51)),
+    ("invoice search by sale", SEARCH_QUERIES["sale"],
+     (1, NO_DATE_FROM, NO_DATE_TO, NO_MIN_AMOUNT, NO_MAX_AMOUNT, NO_DATE_TO, 0, 51)),
+]
+
+# The same, for statements of the Qt pages (products.py, category.py, discount.py, supplier.py)
+PAGE_QUERIES = [
+    ("products duplicate check on add",
+     "SELECT COUNT(*) FROM Product WHERE ProductName = ?", ("x",)),
+    ("products duplicate check on update",
+     "SELECT COUNT(*) FROM Product WHERE ProductName = ? AND ProductID != ?", ("x", 1)),
+    ("products replace barcodes",
+     "DELETE FROM ProductBarcode WHERE ProductID = ?", (1,)),
+    ("discount duplicate check",
+     "SELECT COUNT(*) FROM Discount WHERE DiscountValue = ?", (5.0,)),
+    ("category duplicate check",
+     "SELECT COUNT(*) FROM Category WHERE CategoryName = ?", ("x",)),
+    ("supplier duplicate check",
+     "SELECT COUNT(*) FROM Suppliers WHERE SupplierName = ?", ("x",)),
+]
+
+# Lookups SQLite runs itself to enforce the foreign keys when a product is deleted
+FOREIGN_KEY_CHECKS = [
+    ("product delete foreign key check on SaleDetails",
+     "SELECT 1 FROM SaleDetails WHERE ProductID = ?", (1,)),
+    ("product delete foreign key check on InventoryTransactions",
+     "SELECT 1 FROM InventoryTransactions WHERE ProductID = ?", (1,)),
+    ("product delete cascade on ProductBarcode",
+     "SELECT 1 FROM ProductBarcode WHERE ProductID = ?", (1,)),
+]
+
+
+def query_plan(conn, sql, params=()):
+    return [detail for _, _, _, detail in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def full_scans(conn, sql, params):
+    """Plan steps of sql that scan a table without using an index.
+
+    A json_each() of the statement's own parameter is a virtual table
+    scan over that parameter, not over a table, so it doesn't count.
+    """
+    return [detail for detail in query_plan(conn, sql, params)
+            if detail.startswith("SCAN ") and " USING " not in detail and " VIRTUAL TABLE " not in detail]
+
+
+def sorts(conn, sql):
+    """Plan steps of sql that sort the rows in a temporary b-tree."""
+    return [detail for detail in query_plan(conn, sql) if detail.startswith("USE TEMP B-TREE")]
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "sms.db")
+    db_path = scratch_db_path("plans.db")
+    shutil.copyfile(source, db_path)
+
+    conn = connect(db_path)
+    applied = migrate(conn)
+    print(f"Applied migrations {applied} to a copy of {source}")
+
+    failures = 0
+    catalogue = build_catalogue()
+    for description, sql, _ in PAGE_QUERIES:
+        if statement_name(sql) not in catalogue:
+            failures += 1
+            print(f"STALE      {description}: no page runs {' '.join(sql.split())}")
+
+    for description, sql, params in HOT_QUERIES + PAGE_QUERIES + FOREIGN_KEY_CHECKS:
+        scans = full_scans(conn, sql, params)
+        if scans:
+            failures += 1
+            print(f"FULL SCAN  {description}: {'; '.join(scans)}")
+        else:
+            print(f"ok         {description}")
+
+    # The catalog loads read whole tables by design, but in key order, not through a sort
+    for table, sql in LOAD_QUERIES.items():
+        steps = sorts(conn, sql)
+        if steps:
+            failures += 1
+            print(f"SORT       catalog load of {table}: {'; '.join(steps)}")
+        else:
+            print(f"ok         catalog load of {table}")
+    conn.close()
+
+    if failures:
+        print(f"{failures} hot queries fail their plan check")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(ROOT, "pages")
+INIT_SQL = os.path.join(ROOT, "DB Init Files", "init.sql")
+
+# The app modules are imported by bare name, exactly as login.py does
+if PAGES_DIR not in sys.path:
+    sys.path.insert(0, PAGES_DIR)
+
+
+def scratch_db_path(name="bench.db"):
+    """Return a path for a throwaway database inside a fresh temporary directory."""
+    return os.path.join(tempfile.mkdtemp(prefix="sms_bench_"), name)
+
+
+def create_db(db_path, num_products=200, stock_level=10 ** 9):
+    """Create a database from init.sql seeded with discounts, a category, a supplier and products."""
+    conn = sqlite3.connect(db_path)
+    with open(INIT_SQL) as f:
+        conn.executescript(f.read())
+    conn.executemany("INSERT INTO Discount (DiscountID, DiscountValue) VALUES (?, ?)",
+                     [(1, 0.0), (2, 15.0), (3, 5.0)])
+    conn.execute("INSERT INTO Category (CategoryID, CategoryName, AisleNumber) VALUES (1, 'General', 'A1')")
+    conn.execute("INSERT INTO Suppliers (SupplierID, SupplierName, ContactNumber, Address) "
+                 "VALUES (1, 'Bench Supplier', '000', 'Nowhere')")
+    conn.executemany("""
+        INSERT INTO Product (ProductID, ProductName, CategoryID, Price, StockLevel, RestockLevel, SupplierID, DiscountID)
+        VALUES (?, ?, 1, ?, ?, 10, 1, ?)
+    """, [(i, f"Product {i:06d}", 10.0 + i % 500, stock_level, 1 + i % 3) for i in range(1, num_products + 1)])
+    conn.commit()
+    conn.close()
+    return db_path
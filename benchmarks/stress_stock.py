@@ -0,0 +1,142 @@
+"""Concurrency stress test for stock changes: many tills selling one product while it is restocked.
+
+Seller threads commit sales of the same product through checkout.commit_sale;
+restock threads add stock with the same relative UPDATE StockPage uses. At
+the end the stock level must equal initial + restocked - sold, must never
+have gone negative, and every rejected sale must have been an
+InsufficientStockError. Exits with status 1 otherwise.
+
+Usage: python benchmarks/stress_stock.py [--sellers 16] [--restockers 2] [--seconds 5] [--remote]
+"""
+import argparse
+import random
+import threading
+import time
+
+from common import create_db, scratch_db_path
+
+from checkout import commit_sale, InsufficientStockError
+from store import LocalStore, RemoteStore
+from store_server import StoreServer
+from store_statements import build_catalogue, sql_literals
+
+PRODUCT_ID = 1
+INITIAL_STOCK = 50
+STORE_KEY = "stress"
+
+
+class Totals:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sold = 0
+        self.sales = 0
+        self.rejected = 0
+        self.restocked = 0
+        self.errors = []
+
+
+def seller(store, totals, deadline, seed):
+    rng = random.Random(seed)
+    while time.time() < deadline:
+        quantity = rng.randint(1, 5)
+        try:
+            with store.connection() as conn:
+                commit_sale(conn, [(PRODUCT_ID, quantity, 10.0, 1)], 10.0 * quantity, "Cash",
+                            10.0 * quantity, "2025-06-15 10:00:00")
+        except InsufficientStockError:
+            with totals.lock:
+                totals.rejected += 1
+        except Exception as e:
+            with totals.lock:
+                totals.errors.append(repr(e))
+        else:
+            with totals.lock:
+                totals.sold += quantity
+                totals.sales += 1
+
+
+def restocker(store, totals, deadline, seed):
+    rng = random.Random(seed)
+    while time.time() < deadline:
+        quantity = rng.randint(1, 10)
+        try:
+            with store.connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("UPDATE Product SET StockLevel = StockLevel + ? WHERE ProductID = ?",
+                             (quantity, PRODUCT_ID))
+                conn.execute("""
+                    INSERT INTO InventoryTransactions (ProductID, TransactionType, Quantity, TransactionDate, SupplierID)
+                    VALUES (?, 'In', ?, '2025-06-15 10:00:00', 1)
+                """, (PRODUCT_ID, quantity))
+                conn.execute("COMMIT")
+        except Exception as e:
+            with totals.lock:
+                totals.errors.append(repr(e))
+        else:
+            with totals.lock:
+                totals.restocked += quantity
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sellers", type=int, default=16)
+    parser.add_argument("--restockers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--remote", action="store_true", help="go through a store_server.py on localhost")
+    args = parser.parse_args()
+
+    db_path = create_db(scratch_db_path(), num_products=1, stock_level=INITIAL_STOCK)
+    server = None
+    if args.remote:
+        # The restocks and final checks below are this script's own SQL
+        server = StoreServer(("127.0.0.1", 0), db_path, STORE_KEY, build_catalogue(extra=sql_literals(__file__)))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        store = RemoteStore("127.0.0.1", server.server_address[1], pool_size=args.sellers + args.restockers,
+                            key=STORE_KEY)
+    else:
+        store = LocalStore(db_path, pool_size=args.sellers + args.restockers)
+
+    totals = Totals()
+    deadline = time.time() + args.seconds
+    threads = [threading.Thread(target=seller, args=(store, totals, deadline, n)) for n in range(args.sellers)]
+    threads += [threading.Thread(target=restocker, args=(store, totals, deadline, 1000 + n))
+                for n in range(args.restockers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with store.connection() as conn:
+        final = conn.execute("SELECT StockLevel FROM Product WHERE ProductID = ?", (PRODUCT_ID,)).fetchone()[0]
+        sold_rows = conn.execute("SELECT COALESCE(SUM(Quantity), 0) FROM SaleDetails WHERE ProductID = ?",
+                                 (PRODUCT_ID,)).fetchone()[0]
+    store.close()
+    if server is not None:
+        server.shutdown()
+
+    expected = INITIAL_STOCK + totals.restocked - totals.sold
+    print(f"{totals.sales} sales ({totals.sold} units), {totals.rejected} rejected for stock, "
+          f"{totals.restocked} units restocked")
+    print(f"final stock {final}, expected {expected}; SaleDetails quantity {sold_rows}")
+
+    failures = []
+    if final != expected:
+        failures.append("lost update: final stock does not match the committed changes")
+    if final < 0:
+        failures.append("oversold: stock went negative")
+    if sold_rows != totals.sold:
+        failures.append("SaleDetails disagree with the committed sales")
+    if totals.errors:
+        failures.append(f"{len(totals.errors)} unexpected errors, first: {totals.errors[0]}")
+    if totals.rejected == 0:
+        failures.append("no sale was rejected; raise --sellers or lower INITIAL_STOCK to exercise the conflict path")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        raise SystemExit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
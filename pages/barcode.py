@@ -1,10 +1,14 @@
 import sys
 import os
 os.environ['DYLD_LIBRARY_PATH'] = os.path.dirname(__file__)
+import threading
+import time
+from collections import deque
 import cv2
-from pyzbar.pyzbar import decode
+from barcode_decoder import AdaptiveDecoder
+from catalog import get_catalog
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QApplication
-from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtCore import QThread, pyqtSignal, Qt
 from PyQt5.QtGui import QImage, QPixmap
 
 # import time
@@ -12,38 +16,189 @@ from PyQt5.QtGui import QImage, QPixmap
 # from PyObjCTools import AppHelper
 # import AVFoundation
 
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+FRAME_QUEUE_SIZE = 2
+STATS_INTERVAL = 1.0  # seconds between stats updates
+
+
+class FrameQueue:
+    """Bounded hand-off from the capture thread to the decoder.
+
+    put() never blocks: when the queue is full the oldest frame is dropped,
+    so the decoder always works on the newest frame instead of falling
+    further behind the camera.
+    """
+
+    def __init__(self, maxsize=FRAME_QUEUE_SIZE):
+        self.frames = deque(maxlen=maxsize)
+        self.condition = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, frame):
+        with self.condition:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append(frame)
+            self.condition.notify()
+
+    def get_latest(self, timeout=None):
+        """Newest frame, discarding any older ones; None on timeout or once closed."""
+        with self.condition:
+            if not self.frames and not self.closed:
+                self.condition.wait(timeout)
+            if not self.frames:
+                return None
+            frame = self.frames.pop()
+            self.dropped += len(self.frames)
+            self.frames.clear()
+            return frame
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class ScannerWorker(QThread):
+    """Captures and decodes camera frames off the GUI thread.
+
+    A capture thread reads the camera into a FrameQueue; run() decodes the
+    newest frame with an AdaptiveDecoder, draws the overlays and emits it as
+    a QImage, so the dialog only has to put a pixmap on screen. stats reports
+    the displayed frames per second and the mean decode time over the last
+    interval.
+
+    While decoding is paused (set_decoding(False)) the camera keeps
+    streaming but frames are dropped undecoded, which keeps the device warm
+    for the next scan at almost no CPU cost.
+    """
+    frame_ready = pyqtSignal(QImage)
+    decoded = pyqtSignal(str)  # once per code per frame it is seen in
+    stats = pyqtSignal(float, float)  # frames per second, mean decode ms
+    failed = pyqtSignal(str)
+    opened = pyqtSignal(float)  # ms from start() to the first frame
+
+    def __init__(self, camera_index=0, parent=None):
+        super().__init__(parent)
+        self.camera_index = camera_index
+        self.frames = FrameQueue()
+        self.decoder = AdaptiveDecoder()
+        self.capture_thread = None
+        self.decoding = threading.Event()
+        self.decoding.set()
+
+    def set_decoding(self, enabled):
+        if enabled:
+            self.decoding.set()
+        else:
+            self.decoding.clear()
+
+    def stop(self):
+        self.requestInterruption()
+        self.frames.close()
+        self.wait()
+
+    def capture(self, cap):
+        while not self.isInterruptionRequested():
+            ret, frame = cap.read()
+            if not ret:
+                print("Error: Could not read frame.")
+                time.sleep(0.01)
+                continue
+            self.frames.put(frame)
+        cap.release()
+        self.frames.close()
+
+    def run(self):
+        open_start = time.perf_counter()
+        cap = cv2.VideoCapture(self.camera_index)  # Open the default camera (index 0)
+        if not cap.isOpened():
+            self.failed.emit("Could not open camera.")
+            return
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+        self.capture_thread = threading.Thread(target=self.capture, args=(cap,), daemon=True)
+        self.capture_thread.start()
+
+        first_frame = True
+        was_decoding = False
+        shown = 0
+        decode_seconds = 0.0
+        window_start = time.perf_counter()
+        while not self.isInterruptionRequested():
+            frame = self.frames.get_latest(timeout=0.5)
+            if frame is None:
+                continue
+            if first_frame:
+                self.opened.emit((time.perf_counter() - open_start) * 1000)
+                first_frame = False
+            if not self.decoding.is_set():
+                was_decoding = False
+                continue
+            if not was_decoding:
+                # The scene has changed since the last session; don't reuse its ROI or still frame
+                self.decoder.reset()
+                shown = 0
+                decode_seconds = 0.0
+                window_start = time.perf_counter()
+                was_decoding = True
+
+            start = time.perf_counter()
+            detections, stage = self.decoder.decode(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+            decode_seconds += time.perf_counter() - start
+
+            for detection in detections:
+                # Skipped frames count too: the scene is unchanged, so the code is still in view
+                self.decoded.emit(detection.data)
+
+                # Draw a rectangle around the barcode and its data
+                (x, y, w, h) = detection.rect
+                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+                cv2.putText(frame, f"{detection.data}", (x, y - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            h, w, ch = frame_rgb.shape
+            # copy() detaches the image from the numpy buffer before it crosses threads
+            self.frame_ready.emit(QImage(frame_rgb.data, w, h, ch * w, QImage.Format_RGB888).copy())
+
+            shown += 1
+            elapsed = time.perf_counter() - window_start
+            if elapsed >= STATS_INTERVAL:
+                self.stats.emit(shown / elapsed, decode_seconds / shown * 1000)
+                shown = 0
+                decode_seconds = 0.0
+                window_start = time.perf_counter()
+
+        self.capture_thread.join()
+
+
 class BarcodeScannerDialog(QDialog):
-    def __init__(self, parent=None):
+    """Live view of a camera scan session.
+
+    The camera belongs to the CameraService; this dialog only starts a
+    session on it and shows the frames and what was scanned. Every item
+    held up to the camera is reported through camera.code_scanned, so one
+    session can scan a whole basket until the operator presses Done.
+    """
+    def __init__(self, camera, parent=None):
         super().__init__(parent)
         self.main_window = parent
+        self.camera = camera
 
         self.setWindowTitle("Scan Barcode")
         self.setGeometry(300, 300, 640, 480)
 
-        # Hardcoded dictionary mapping barcode numbers to product names
-        self.barcode_to_product = {
-            "9780241389324": "iPhone 15 Pro",
-            "8905631871208": "Samsung Galaxy S24 Ultra"
-        }
-
         # self.request_camera_access()
 
-        # Initialize camera
-        self.cap = cv2.VideoCapture(0)  # Open the default camera (index 0)
-        if not self.cap.isOpened():
-            print("Error: Could not open camera.")
-            self.reject()
-            return
-
-        # Set camera resolution
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-
         # Layout
         layout = QVBoxLayout()
 
         # Video feed display
-        self.video_label = QLabel(self)
+        self.video_label = QLabel("Starting camera...", self)
+        self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setFixedSize(600, 400)
         layout.addWidget(self.video_label)
 
@@ -55,22 +210,30 @@ class BarcodeScannerDialog(QDialog):
         self.product_label = QLabel("Product: None")
         layout.addWidget(self.product_label)
 
+        # Scanner throughput and time to first decode, filled in by the camera service
+        self.stats_label = QLabel("")
+        layout.addWidget(self.stats_label)
+        self.first_decode_label = QLabel("")
+        layout.addWidget(self.first_decode_label)
+
         # Buttons
         button_layout = QHBoxLayout()
-        self.stop_button = QPushButton("Add Product", self)
+        self.stop_button = QPushButton("Done", self)
         self.stop_button.clicked.connect(self.stop_scanning)
         button_layout.addWidget(self.stop_button)
         layout.addLayout(button_layout)
 
         self.setLayout(layout)
 
-        # Timer for updating the video feed
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)  # Update every 30ms (~33 FPS)
+        self.catalog = get_catalog()
+        self.scanned_count = 0
 
-        self.scanned_barcode = None
-        self.last_barcode = None  # To avoid repeated printing
+        self.camera.frame_ready.connect(self.show_frame)
+        self.camera.code_scanned.connect(self.barcode_decoded)
+        self.camera.stats.connect(self.show_stats)
+        self.camera.first_decode.connect(self.show_first_decode)
+        self.camera.failed.connect(self.camera_failed)
+        self.camera.begin_session()
     
     # def request_camera_access(self):
     #     status = AVFoundation.AVCaptureDevice.authorizationStatusForMediaType_(AVFoundation.AVMediaTypeVideo)
@@ -89,74 +252,56 @@ class BarcodeScannerDialog(QDialog):
     #     else:
     #         print("Camera access denied. Please enable it in System Preferences > Security & Privacy > Camera.")
 
-    def update_frame(self):
-        """Capture a frame from the camera, process it for barcodes, and display it."""
-        if not self.cap.isOpened():
-            return
-
-        ret, frame = self.cap.read()
-        if not ret:
-            print("Error: Could not read frame.")
-            return
-
-        # Convert the frame to grayscale for barcode detection
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        # Decode barcodes in the frame
-        barcodes = decode(gray)
-        for barcode in barcodes:
-            barcode_data = barcode.data.decode('utf-8')
-            self.scanned_barcode = barcode_data
-
-            # Only update if this is a new barcode
-            if barcode_data != self.last_barcode:
-                self.result_label.setText(f"Scanned Barcode: {barcode_data}")
-                self.last_barcode = barcode_data
-
-                # Map the barcode to a product name
-                product_name = self.barcode_to_product.get(barcode_data, "Not found")
-                self.product_label.setText(f"Product: {product_name}")
-
-            # Draw a rectangle around the barcode
-            (x, y, w, h) = barcode.rect
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-
-            # Display the barcode data on the frame
-            cv2.putText(frame, f"{barcode_data}", (x, y - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-        # Convert the frame to QImage for display in PyQt
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = frame_rgb.shape
-        bytes_per_line = ch * w
-        image = QImage(frame_rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
+    def show_frame(self, image):
+        """Display the latest annotated frame from the camera."""
         pixmap = QPixmap.fromImage(image)
         self.video_label.setPixmap(pixmap.scaled(self.video_label.size(), Qt.KeepAspectRatio))
 
+    def barcode_decoded(self, barcode_data):
+        """Show each new item; the billing page adds it to the cart."""
+        self.scanned_count += 1
+        self.result_label.setText(f"Scanned Barcode: {barcode_data} ({self.scanned_count} this session)")
+
+        # Resolve the barcode through the catalog's ProductBarcode index
+        product = self.catalog.product_for_barcode(barcode_data)
+        product_name = product.name if product is not None else "Not found"
+        self.product_label.setText(f"Product: {product_name}")
+
+    def show_stats(self, fps, decode_ms):
+        self.stats_label.setText(f"{fps:.1f} fps, decode {decode_ms:.1f} ms")
+
+    def show_first_decode(self, elapsed_ms, cold):
+        self.first_decode_label.setText(
+            f"First decode after {elapsed_ms:.0f} ms ({'camera opened' if cold else 'warm camera'})")
+
+    def camera_failed(self, message):
+        print(f"Error: {message}")
+        self.reject()
+
     def stop_scanning(self):
-        """Stop the camera, timer, and close the dialog."""
-        if self.timer.isActive():
-            self.timer.stop()
-        if self.cap.isOpened():
-            self.cap.release()
+        """End the session and close the dialog."""
         self.accept()
 
-    def get_scanned_barcode(self):
-        """Return the scanned barcode data."""
-        return self.scanned_barcode
+    def end_session(self):
+        """Detach from the camera, leaving it streaming for the next session."""
+        if self.camera is None:
+            return
+        for signal, slot in ((self.camera.frame_ready, self.show_frame),
+                             (self.camera.code_scanned, self.barcode_decoded),
+                             (self.camera.stats, self.show_stats),
+                             (self.camera.first_decode, self.show_first_decode),
+                             (self.camera.failed, self.camera_failed)):
+            signal.disconnect(slot)
+        self.camera.end_session()
+        self.camera = None
 
-    def get_product_name(self):
-        """Return the product name corresponding to the scanned barcode."""
-        if self.scanned_barcode is None:
-            return None
-        return self.barcode_to_product.get(self.scanned_barcode, "Not found")
+    def done(self, result):
+        """End the session however the dialog is closed (button, Escape or window close)."""
+        self.end_session()
+        super().done(result)
 
     def closeEvent(self, event):
-        """Ensure the camera and timer are stopped when the dialog is closed."""
-        if self.timer.isActive():
-            self.timer.stop()
-        if self.cap.isOpened():
-            self.cap.release()
+        self.end_session()
         event.accept()
 
 # if __name__ == '__main__':
@@ -0,0 +1,107 @@
+"""Adaptive barcode decoding for camera frames.
+
+Decoding every full 640x480 frame with pyzbar is the scanner's main cost,
+and most frames either show nothing new or show the barcode where it was a
+moment ago. AdaptiveDecoder tries the cheapest pass likely to work:
+
+    skipped     the frame barely differs from the last decoded one, so the
+                last result is reused (at most max_skipped frames in a row,
+                and never right after a decode that lost the barcode, which
+                is more likely a missed read than the code leaving the view)
+    roi         decode only the area around the last barcode found
+    downscaled  decode the whole frame at reduced resolution
+    full        decode the whole frame at full resolution
+
+and stops at the first pass that finds a barcode.
+"""
+import cv2
+from pyzbar.pyzbar import decode
+
+MOTION_SIZE = (80, 60)  # thumbnail used for frame differencing
+MOTION_THRESHOLD = 4.0  # mean absolute grey-level difference that counts as motion
+MAX_SKIPPED = 15
+ROI_MARGIN = 40  # pixels around the last barcode
+DOWNSCALE = 0.5
+STAGES = ("skipped", "roi", "downscaled", "full", "none")
+
+
+class Detection:
+    __slots__ = ("data", "type", "rect")
+
+    def __init__(self, data, type, rect):
+        self.data = data  # decoded text
+        self.type = type  # symbology, e.g. EAN13
+        self.rect = rect  # (x, y, w, h) in full-frame pixels
+
+
+def _detections(barcodes, scale=1.0, offset=(0, 0)):
+    found = []
+    for barcode in barcodes:
+        x, y, w, h = barcode.rect
+        found.append(Detection(barcode.data.decode('utf-8'), barcode.type,
+                               (int(x / scale) + offset[0], int(y / scale) + offset[1],
+                                int(w / scale), int(h / scale))))
+    return found
+
+
+class AdaptiveDecoder:
+    def __init__(self, motion_threshold=MOTION_THRESHOLD, max_skipped=MAX_SKIPPED,
+                 roi_margin=ROI_MARGIN, downscale=DOWNSCALE):
+        self.motion_threshold = motion_threshold
+        self.max_skipped = max_skipped
+        self.roi_margin = roi_margin
+        self.downscale = downscale
+        self.last_thumbnail = None
+        self.last_detections = []
+        self.last_rect = None
+        self.skipped = 0
+        self.retry = False  # the last decode lost the barcode before it; decode the next frame too
+        self.stage_counts = dict.fromkeys(STAGES, 0)
+
+    def reset(self):
+        self.last_thumbnail = None
+        self.last_detections = []
+        self.last_rect = None
+        self.skipped = 0
+        self.retry = False
+
+    def decode(self, gray):
+        """Detections in a greyscale frame, and the stage that produced them."""
+        thumbnail = cv2.resize(gray, MOTION_SIZE, interpolation=cv2.INTER_AREA)
+        if (self.last_thumbnail is not None and self.skipped < self.max_skipped and not self.retry
+                and cv2.absdiff(thumbnail, self.last_thumbnail).mean() < self.motion_threshold):
+            self.skipped += 1
+            return self._finish("skipped", self.last_detections)
+        self.last_thumbnail = thumbnail
+        self.skipped = 0
+
+        if self.last_rect is not None:
+            detections = self._decode_roi(gray, self.last_rect)
+            if detections:
+                return self._finish("roi", detections)
+
+        if self.downscale < 1.0:
+            small = cv2.resize(gray, None, fx=self.downscale, fy=self.downscale, interpolation=cv2.INTER_AREA)
+            detections = _detections(decode(small), scale=self.downscale)
+            if detections:
+                return self._finish("downscaled", detections)
+
+        detections = _detections(decode(gray))
+        return self._finish("full" if detections else "none", detections)
+
+    def _decode_roi(self, gray, rect):
+        x, y, w, h = rect
+        height, width = gray.shape[:2]
+        left, top = max(0, x - self.roi_margin), max(0, y - self.roi_margin)
+        right, bottom = min(width, x + w + self.roi_margin), min(height, y + h + self.roi_margin)
+        if right <= left or bottom <= top:
+            return []
+        return _detections(decode(gray[top:bottom, left:right]), offset=(left, top))
+
+    def _finish(self, stage, detections):
+        self.stage_counts[stage] += 1
+        if stage != "skipped":
+            self.retry = not detections and self.last_rect is not None
+            self.last_detections = detections
+            self.last_rect = detections[0].rect if detections else None
+        return detections, stage
@@ -0,0 +1,132 @@
+"""Where bill PDFs are kept, and the BillArchive table that indexes them.
+
+Each bill is stored under its sale date and named after its SalesID and
+InvoiceID:
+
+    <root>/2025/06/15/bill_1042_1042.pdf
+
+so two sales in the same second never share a file and no directory holds
+more than one day's bills. checkout.commit_sale records the path (relative
+to the root) in BillArchive in the sale's own transaction. A bill is then
+found by SalesID or InvoiceID with one primary-key or unique-index lookup,
+without listing any directory.
+
+The root is ~/Documents/Bills unless SMS_BILLS_DIR is set.
+"""
+import os
+import re
+
+BILLS_DIR_ENV = "SMS_BILLS_DIR"
+DEFAULT_BILLS_DIR = os.path.join("~", "Documents", "Bills")
+# Bills saved before the archive: bill_<yyyy-MM-dd hh:mm:ss>.pdf, all in the root
+LEGACY_BILL_NAME = re.compile(r"^bill_(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\.pdf$")
+LOOKUP_QUERIES = {
+    "sale": "SELECT SalesID, InvoiceID, FilePath FROM BillArchive WHERE SalesID = ?",
+    "invoice": "SELECT SalesID, InvoiceID, FilePath FROM BillArchive WHERE InvoiceID = ?",
+}
+
+
+def bill_path(sales_id, invoice_id, sale_date):
+    """Archive path of a bill, relative to the root, for a 'yyyy-MM-dd hh:mm:ss' sale date."""
+    return f"{sale_date[:4]}/{sale_date[5:7]}/{sale_date[8:10]}/bill_{sales_id}_{invoice_id}.pdf"
+
+
+def record_bill(cursor, sales_id, invoice_id, sale_date):
+    """Index the bill of a sale; run it in the transaction that writes the sale."""
+    path = bill_path(sales_id, invoice_id, sale_date)
+    cursor.execute("INSERT INTO BillArchive (SalesID, InvoiceID, FilePath) VALUES (?, ?, ?)",
+                   (sales_id, invoice_id, path))
+    return path
+
+
+class BillRecord:
+    __slots__ = ("sales_id", "invoice_id", "path")
+
+    def __init__(self, sales_id, invoice_id, path):
+        self.sales_id = sales_id
+        self.invoice_id = invoice_id
+        self.path = path  # absolute
+
+    def exists(self):
+        return os.path.isfile(self.path)
+
+
+class BillArchive:
+    """Maps sales to bill files under one root directory."""
+
+    def __init__(self, root=None):
+        root = root or os.environ.get(BILLS_DIR_ENV) or DEFAULT_BILLS_DIR
+        self.root = os.path.abspath(os.path.expanduser(root))
+
+    def absolute(self, relative_path):
+        return os.path.join(self.root, *relative_path.split("/"))
+
+    def path_for(self, sales_id, invoice_id, sale_date):
+        return self.absolute(bill_path(sales_id, invoice_id, sale_date))
+
+    def lookup(self, conn, sales_id=None, invoice_id=None):
+        """BillRecord of a sale by SalesID or InvoiceID, or None if it has no archived bill."""
+        if sales_id is not None:
+            row = conn.execute(LOOKUP_QUERIES["sale"], (sales_id,)).fetchone()
+        elif invoice_id is not None:
+            row = conn.execute(LOOKUP_QUERIES["invoice"], (invoice_id,)).fetchone()
+        else:
+            raise ValueError("lookup needs a sales_id or an invoice_id")
+        if row is None:
+            return None
+        return BillRecord(row[0], row[1], self.absolute(row[2]))
+
+    def import_legacy_bills(self, conn):
+        """Move bills saved by older versions from the root into the archive.
+
+        A legacy file is only claimed when exactly one sale without an
+        archived bill has the date in its name; files of sales made in the
+        same second are left where they are, since the last one overwrote
+        the others. Returns the number of bills moved.
+        """
+        try:
+            names = [name for name in os.listdir(self.root) if LEGACY_BILL_NAME.match(name)]
+        except FileNotFoundError:
+            return 0
+        if not names:
+            return 0
+
+        moved = 0
+        cursor = conn.cursor()
+        try:
+            for name in names:
+                sale_date = LEGACY_BILL_NAME.match(name).group(1)
+                # One transaction per file, so the index row and the move succeed or fail together
+                cursor.execute("BEGIN IMMEDIATE")
+                sales = cursor.execute("""
+                    SELECT s.SalesID, i.InvoiceID FROM Sales s
+                    JOIN Invoices i ON i.SalesID = s.SalesID
+                    LEFT JOIN BillArchive b ON b.SalesID = s.SalesID
+                    WHERE s.SaleDate = ? AND b.SalesID IS NULL
+                """, (sale_date,)).fetchall()
+                if len(sales) != 1:
+                    cursor.execute("ROLLBACK")
+                    continue
+                sales_id, invoice_id = sales[0]
+                target = self.path_for(sales_id, invoice_id, sale_date)
+                record_bill(cursor, sales_id, invoice_id, sale_date)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(os.path.join(self.root, name), target)
+                cursor.execute("COMMIT")
+                moved += 1
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            cursor.close()
+        return moved
+
+
+_archive = None
+
+
+def get_bill_archive():
+    """Return the shared BillArchive, creating it on first use."""
+    global _archive
+    if _archive is None:
+        _archive = BillArchive()
+    return _archive
@@ -1,23 +1,82 @@
 # Import Modules
 from PyQt5.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QWidget, QHeaderView,\
-    QLabel, QPushButton, QTableWidget, QMessageBox, QTableWidgetItem, QComboBox, QDialog,\
-    QLineEdit, QDialogButtonBox, QSpinBox
+    QLabel, QPushButton, QTableView, QMessageBox, QComboBox, QDialog,\
+    QLineEdit, QDialogButtonBox, QSpinBox, QCompleter, QInputDialog
 from PyQt5.QtSql import QSqlDatabase, QSqlQuery
-from PyQt5.QtCore import Qt, QDateTime
-from PyQt5.QtGui import QIntValidator
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
+from PyQt5.QtCore import Qt, QDateTime, QAbstractTableModel, QModelIndex, QVariant, QStringListModel, pyqtSignal, QUrl
+from PyQt5.QtGui import QIntValidator, QDesktopServices
 import os
-from barcode import BarcodeScannerDialog
+import sqlite3
+from checkout import commit_sale, CheckoutError, InsufficientStockError
+from store import get_store
+from catalog import get_catalog, LOOKUP_REFRESH_SECONDS, PRODUCT
+from cart import Cart, format_percent, format_rupees
+from scanner_service import ScannerService
+from camera_service import get_camera_service
+from receipts import Receipt, get_receipt_writer
+from bill_archive import get_bill_archive
+from invoices import get_invoice_service
+
+class CartTableModel(QAbstractTableModel):
+    """Read-only table view over a Cart. All cart changes go through this model."""
+
+    HEADERS = ["Product Name", "Quantity", "Unit Price", "Total Price", "Discount"]
+
+    def __init__(self, cart, parent=None):
+        super().__init__(parent)
+        self.cart = cart
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.cart)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return QVariant()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return QVariant()
+        line = self.cart[index.row()]
+        column = index.column()
+        if column == 0:
+            return line.name
+        if column == 1:
+            return str(line.quantity)
+        if column == 2:
+            return format_rupees(line.unit_price_paise)
+        if column == 3:
+            return format_rupees(line.gross_paise)
+        return format_percent(line.discount_bp)
+
+    def add(self, product, quantity, discount_value):
+        row = len(self.cart)
+        self.beginInsertRows(QModelIndex(), row, row)
+        line = self.cart.add(product, quantity, discount_value)
+        self.endInsertRows()
+        return line
+
+    def remove(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        line = self.cart.remove(row)
+        self.endRemoveRows()
+        return line
+
+    def clear(self):
+        self.beginResetModel()
+        self.cart.clear()
+        self.endResetModel()
 
 class PaymentBox(QDialog):
-    def __init__(self, total_amount, parent=None):
+    def __init__(self, total_paise, parent=None):
         super().__init__(parent)
 
         self.setWindowTitle("Payment")
         self.resize(200,300)
-        self.total_amount = total_amount
+        self.total_paise = total_paise
 
         self.payment_method = QComboBox()
         self.amount_paid = QLineEdit()
@@ -46,8 +105,8 @@ class PaymentBox(QDialog):
 
     def calculate_balance(self):
         amount = int(self.amount_paid.text()) if self.amount_paid.text() else 0
-        balance = max(0, amount - int(self.total_amount))
-        self.balance.setText(str(balance))
+        balance = max(0, amount * 100 - self.total_paise)
+        self.balance.setText(format_rupees(balance))
 
     def get_payment_details(self):
         method = self.payment_method.currentText()
@@ -58,9 +117,14 @@ class PaymentBox(QDialog):
         return method, amount
 
 class BillingPage(QWidget):
+    # Emitted from the receipt writer thread; Qt queues it onto the GUI thread
+    bill_failed = pyqtSignal(str, str)  # path, error
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.main_window = parent
+        self.store = get_store()
+        self.catalog = get_catalog()
 
         self.setWindowTitle("Billing Page")
         self.resize(550,500)
@@ -68,12 +132,24 @@ class BillingPage(QWidget):
         self.back_btn = QPushButton("Back to Main Page")
         self.back_btn.clicked.connect(self.main_window.show_main)
 
-        # self.table_data = []
-        self.subtotal_amount = 0
+        self.cart = Cart()
+        self.cart_model = CartTableModel(self.cart, self)
 
         self.product_list = QComboBox()
+        self.product_list.setEditable(True)
+        self.product_list.setInsertPolicy(QComboBox.NoInsert)
+
+        # Type-ahead: the popup shows the search index's ranked matches as they are
+        self.completion_model = QStringListModel(self)
+        self.completer = QCompleter(self.completion_model, self)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.completer.setMaxVisibleItems(10)
+        self.product_list.setCompleter(self.completer)
+        self.product_list.lineEdit().textEdited.connect(self.update_completions)
+
         self.quantity = QSpinBox()
-        self.subtotal = QLabel(str(self.subtotal_amount))
+        self.subtotal = QLabel(format_rupees(self.cart.total_paise))
 
         self.add_btn = QPushButton("+")
         self.del_btn = QPushButton("-")
@@ -86,6 +162,24 @@ class BillingPage(QWidget):
         self.scan_btn.setFixedSize(100,30)
         self.scan_btn.clicked.connect(self.scan_product)
 
+        # Hardware scanners (keyboard wedge, serial or stdin) add items without any dialog
+        self.scan_status = QLabel("")
+        self.scanner = ScannerService(self.catalog, parent=self)
+        self.scanner.product_scanned.connect(self.product_scanned)
+        self.scanner.unknown_code.connect(self.unknown_barcode)
+        self.taking_payment = False  # scans are ignored while the payment dialog is open
+        # The application's camera, fetched on the first camera scan and kept warm while this page is shown
+        self.camera = None
+
+        # Bills are rendered and saved in the background after checkout
+        self.receipts = get_receipt_writer()
+        self.bill_archive = get_bill_archive()
+        self.bill_failed.connect(self.show_bill_failed)
+
+        self.reprint_btn = QPushButton("Reprint")
+        self.reprint_btn.setFixedSize(100,30)
+        self.reprint_btn.clicked.connect(self.reprint_bill)
+
         self.bill_btn = QPushButton("Checkout")
         self.cancel_btn = QPushButton("Cancel")
         self.bill_btn.setFixedSize(100,30)
@@ -93,15 +187,14 @@ class BillingPage(QWidget):
         self.bill_btn.clicked.connect(self.checkout)
         self.cancel_btn.clicked.connect(self.cancel)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["Product Name", "Quantity", "Unit Price", "Total Price", "Discount"])
+        self.table = QTableView()
+        self.table.setModel(self.cart_model)
 
         # Make the table read-only
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
 
         # Make the entire row get selected when any item in it is clicked
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
 
         # Fit the table within the screen (remove horizontal scrollbar)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)  # Stretch columns to fit the table width
@@ -112,10 +205,8 @@ class BillingPage(QWidget):
         self.quantity.setValue(1)
         self.quantity.setFixedWidth(60)
 
-        self.product_list.addItem("None")
-        self.product_list.addItems([x for x in self.set_product_list()])
-        self.product_list.setMaxVisibleItems(10)
-        self.product_list.setStyleSheet("QComboBox { combobox-popup: 0; }")
+        self.listed_names = None
+        self.load_product_list()
 
         self.master_layout = QVBoxLayout()
         self.row1 = QHBoxLayout()
@@ -140,6 +231,8 @@ class BillingPage(QWidget):
         self.row3.addWidget(self.bill_btn)
 
         self.row4.addWidget(self.scan_btn)
+        self.row4.addWidget(self.reprint_btn)
+        self.row4.addWidget(self.scan_status)
         self.row4.addStretch()
 
         self.back_btn.setFixedSize(200, 30)
@@ -158,63 +251,54 @@ class BillingPage(QWidget):
         self.setLayout(self.master_layout)
 
     def set_product_list(self):
-        query = QSqlQuery("SELECT ProductName FROM Product")
-        print("Setting Product List")
-        products = []
-        while query.next():
-            products.append(query.value(0))
-        return products
+        return self.catalog.product_names()
     
     def load_product_list(self):
+        names = self.set_product_list()
+        if names is self.listed_names:
+            # Product list hasn't changed since the combo box was filled
+            self.product_list.setCurrentIndex(0)
+            return
+        self.listed_names = names
         self.product_list.clear()
         self.product_list.addItem("None")
-        self.product_list.addItems([x for x in self.set_product_list()])
+        self.product_list.addItems(names)
         self.product_list.setMaxVisibleItems(10)
         self.product_list.setStyleSheet("QComboBox { combobox-popup: 0; }")
         self.product_list.setCurrentIndex(0)
     
+    def update_completions(self, text):
+        names = [row.name for row in self.catalog.search_products(text)]
+        self.completion_model.setStringList(names)
+        if names:
+            self.completer.complete()
+
     def add_product(self):
         product_name = self.product_list.currentText()
         quantity = self.quantity.value()
-        query1 = QSqlQuery()
-        query1.prepare("SELECT * FROM Product WHERE ProductName = ?")
-        query1.addBindValue(product_name)
-        if query1.exec_():
-            if query1.next():
-                stock_level = query1.value(4)
-
-                if stock_level < quantity:
-                    QMessageBox.critical(self, "Error", "Not enough stock available")
-                    self.quantity.setValue(1)
-                    return
-                
-                query2 = QSqlQuery()
-                query2.prepare("SELECT DiscountValue FROM Discount WHERE DiscountID = ?")
-                query2.addBindValue(query1.value(7))
-                query2.exec_()
-
-                discount = 0.0
-                if query2.next():
-                    discount = float(query2.value(0))
-                
-                row = self.table.rowCount()
-                self.table.insertRow(row)
-                self.table.setItem(row, 0, QTableWidgetItem(product_name)) # Product Name 0
-                self.table.setItem(row, 1, QTableWidgetItem(str(quantity))) # Quantity 1
-                self.table.setItem(row, 2, QTableWidgetItem(str(query1.value(3)))) # Unit Price 2
-                self.table.setItem(row, 3, QTableWidgetItem(str(query1.value(3) * quantity))) # Total Price 3
-                self.table.setItem(row, 4, QTableWidgetItem(str(discount))) # Discount 4
-                self.subtotal_amount += int((1 - discount / 100) * query1.value(3) * quantity)
-                self.subtotal.setText(str(self.subtotal_amount))
-                # QMessageBox.information(self, "Success", "Row added to the table")
-
-                self.product_list.setCurrentIndex(0)
-                self.quantity.setValue(1)
+        self.catalog.refresh(LOOKUP_REFRESH_SECONDS)
+        product = self.catalog.product_by_name(product_name)
+        if product is None:
+            return
+
+        if self.add_to_cart(product, quantity):
+            self.product_list.setCurrentIndex(0)
         else:
-            QMessageBox.critical(self, "Error", "Error adding product, Invalid Product Name")
+            QMessageBox.critical(self, "Error", "Not enough stock available")
+        self.quantity.setValue(1)
+
+    def add_to_cart(self, product, quantity):
+        """Add quantity of a ProductRow to the cart; returns False if there isn't enough stock."""
+        if product.stock_level < self.cart.quantity_of(product.product_id) + quantity:
+            return False
+
+        discount = self.catalog.discount_value(product.discount_id)
+        self.cart_model.add(product, quantity, discount)
+        self.subtotal.setText(format_rupees(self.cart.total_paise))
+        return True
 
     def rem_product(self):
-        row_id = self.table.currentRow()
+        row_id = self.table.currentIndex().row()
         if row_id == -1:
             QMessageBox.warning(self, "No row selected", "Please select a row to delete")
             return
@@ -224,186 +308,133 @@ class BillingPage(QWidget):
         if confirm == QMessageBox.No:
             return
         
-        quantity = int(self.table.item(row_id, 1).text())
-        unit_price = float(self.table.item(row_id, 2).text())
-        discount = float(self.table.item(row_id, 4).text())
-
-        amount = (1 - discount / 100) * unit_price * quantity
-
-        self.subtotal_amount -= int(amount)
-        self.subtotal.setText(str(self.subtotal_amount))
-
-        self.table.removeRow(row_id)
+        self.cart_model.remove(row_id)
+        self.subtotal.setText(format_rupees(self.cart.total_paise))
         
         QMessageBox.information(self, "Success", "Row removed from the table")
 
     def checkout(self):
-        if self.subtotal_amount == 0:
+        if len(self.cart) == 0:
             QMessageBox.warning(self, "Warning", "No products added to the bill")
             return
         
-        payment_dialog = PaymentBox(self.subtotal_amount, self)
-        payment_dialog.exec_()
+        # No scans while the cashier takes payment: the wedge would type into the
+        # amount field, and a scanned item must not join a cart that is being paid
+        payment_dialog = PaymentBox(self.cart.total_paise, self)
+        self.scanner.stop_wedge()
+        self.taking_payment = True
+        try:
+            payment_dialog.exec_()
+        finally:
+            self.taking_payment = False
+            if self.isVisible():
+                self.scanner.start_wedge()
         method, amount = payment_dialog.get_payment_details()
 
-        if amount < self.subtotal_amount:
+        if amount * 100 < self.cart.total_paise:
             QMessageBox.warning(self, "Warning", "Amount paid is less than the total amount")
             return
 
         dateTime = QDateTime.currentDateTime().toString("yyyy-MM-dd hh:mm:ss")
 
-        # Updation of Sales Relation
-        query = QSqlQuery()
-        query.prepare("""
-                      INSERT INTO Sales (SaleDate, TotalAmount, PaymentMethod, AmountPaid, BalanceDue) 
-                      VALUES (?, ?, ?, ?, ?)
-                    """)
-        query.addBindValue(dateTime)
-        query.addBindValue(self.subtotal_amount)
-        query.addBindValue(method)
-        query.addBindValue(amount)
-        query.addBindValue(amount - self.subtotal_amount)
-        query.exec_()
-
-        # Updation of SaleDetails Relation
-        sales_id = query.lastInsertId()
-        for i in range(self.table.rowCount()):
-            product_name = self.table.item(i, 0).text()
-            quantity = int(self.table.item(i, 1).text())
-            unit_price = float(self.table.item(i, 2).text())
-            
-            query1 = QSqlQuery()
-            query1.prepare("SELECT ProductID, StockLevel FROM Product WHERE ProductName = ?")
-            query1.addBindValue(product_name)
-            query1.exec_()
-            query1.next()
-            product_id = query1.value(0)
-            stock_level = query1.value(1)
-            stock_level -= quantity
-
-            query2 = QSqlQuery()
-            query2.prepare("SELECT DiscountID FROM Discount WHERE DiscountValue = ?")
-            query2.addBindValue(float(self.table.item(i, 4).text()))
-            query2.exec_()
-            query2.next()
-            discount_id = query2.value(0)
-
-            query3 = QSqlQuery()
-            query3.prepare("""
-                          INSERT INTO SaleDetails (SalesID, ProductID, Quantity, UnitPrice, Subtotal, DiscountID) 
-                          VALUES (?, ?, ?, ?, ?, ?)
-                        """)
-            query3.addBindValue(sales_id)
-            query3.addBindValue(product_id)
-            query3.addBindValue(quantity)
-            query3.addBindValue(unit_price)
-            query3.addBindValue(unit_price * quantity)
-            query3.addBindValue(discount_id)
-            query3.exec_()
-
-            query4 = QSqlQuery()
-            query4.prepare("UPDATE Product SET StockLevel = ? WHERE ProductID = ?")
-            query4.addBindValue(stock_level)
-            query4.addBindValue(product_id)
-            query4.exec_()
-
-        # Updation of Invoice Relation
-        query4 = QSqlQuery()
-        query4.prepare("""
-                      INSERT INTO Invoices (SalesID, InvoiceDate, TotalAmount, AmountPaid, BalanceDue, PaymentMethod) 
-                      VALUES (?, ?, ?, ?, ?, ?)
-                    """)
-        query4.addBindValue(sales_id)
-        query4.addBindValue(dateTime)
-        query4.addBindValue(self.subtotal_amount)
-        query4.addBindValue(amount)
-        query4.addBindValue(amount - self.subtotal_amount)
-        query4.addBindValue(method)
-        query4.exec_()
-
-        documents_dir = os.path.expanduser("~/Documents")
-        bills_directory = os.path.join(documents_dir, "Bills")
+        # The cart already holds ProductID, price and DiscountID for every line
+        total_amount = self.cart.total_paise / 100
         try:
-            os.makedirs(bills_directory, exist_ok=True)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to create directory {bills_directory}: {str(e)}")
+            with self.store.connection() as conn:
+                sales_id, invoice_id = commit_sale(conn, self.cart.checkout_lines(), total_amount, method, amount, dateTime)
+        except InsufficientStockError as e:
+            # Another till or a stock correction got there first; the cart is kept so the
+            # cashier can lower the quantities, and the cached stock levels are refreshed
+            lines = []
+            for product_id, (requested, available) in e.shortages.items():
+                product = self.catalog.product(product_id)
+                name = product.name if product is not None else f"Product {product_id}"
+                lines.append(f"{name}: {requested} requested, "
+                             + ("no longer sold" if available is None else f"{available} left"))
+            self.catalog.invalidate(PRODUCT)
+            self.load_product_list()
+            QMessageBox.critical(self, "Error", "Not enough stock to complete the sale:\n" + "\n".join(lines))
+            return
+        except (CheckoutError, sqlite3.Error) as e:
+            QMessageBox.critical(self, "Error", f"Checkout failed: {str(e)}")
             return
-        file_path = os.path.join(bills_directory, f"bill_{dateTime}.pdf")
 
-        self.create_bill(file_path, dateTime[:10], dateTime[11:])
+        self.catalog.apply_stock_deltas({
+            product_id: -quantity for product_id, quantity in self.cart.quantities().items()
+        })
+
+        file_path = self.bill_archive.path_for(sales_id, invoice_id, dateTime)
+
+        # Copy the cart now; cancel() clears it before the writer gets to this receipt
+        receipt = Receipt.from_cart(self.cart, dateTime[:10], dateTime[11:], sales_id, invoice_id)
+        self.receipts.submit(receipt, file_path, on_failed=self.bill_failed.emit)
         QMessageBox.information(self, "Success", "Bill Checked Out")
         self.cancel()
 
     def cancel(self):
         self.product_list.setCurrentIndex(0)
         self.quantity.setValue(1)
-        self.subtotal_amount = 0
-        self.subtotal.setText(str(self.subtotal_amount))
-        self.table.setRowCount(0)
-
-    def create_bill(self, file_path, date, time):
-        c = canvas.Canvas(file_path, pagesize=letter)
-        width, height = letter  # Page dimensions: 612 x 792 points
-
-        # Header Section
-        y_position = height - 50  # Start near the top
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(50, y_position, "Company Inc.")
-        y_position -= 20
-        c.setFont("Helvetica", 12)
-        c.drawString(50, y_position, "1234 Fake Street, Imaginary City, IC 56789")
-        y_position -= 20
-        c.drawString(50, y_position, f"Date: {date}")
-        y_position -= 20
-        c.drawString(50, y_position, f"Time: {time}")
-        y_position -= 40
-
-        # Table Header
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, y_position, "Item No.")
-        c.drawString(150, y_position, "Name")
-        c.drawString(350, y_position, "Price")
-        y_position -= 10
-        c.line(50, y_position, 550, y_position)  # Draw a line under the header
-        y_position -= 20
-
-        # Table Items (Dynamic)
-        c.setFont("Helvetica", 12)
-        for row in range(self.table.rowCount()):
-            item_number = str(row + 1)
-            product_name = self.table.item(row, 0).text()
-            total_price = self.table.item(row, 3).text()  # Total Price column
-
-            c.drawString(50, y_position, item_number)
-            c.drawString(150, y_position, product_name)
-            c.drawString(350, y_position, f"${float(total_price):.2f}")
-            y_position -= 20
-
-            # Check if we need a new page
-            if y_position < 50:
-                c.showPage()
-                y_position = height - 50
-                c.setFont("Helvetica", 12)
-        
-        # Subtotal Section
-        y_position -= 20
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, y_position, f"Subtotal: ${self.subtotal_amount:.2f}")
-        y_position -= 40
-
-        # Encouraging Message
-        c.setFont("Helvetica-Oblique", 12)
-        c.drawString(50, y_position, "Visit us again!")
-
-        # Finalize the PDF
-        c.save()
-        return
-    
+        self.cart_model.clear()
+        self.subtotal.setText(format_rupees(self.cart.total_paise))
+
+    def show_bill_failed(self, file_path, message):
+        QMessageBox.critical(self, "Error", f"Could not save the bill {file_path}: {message}")
+
+    def reprint_bill(self):
+        """Open the bill of an invoice, rebuilding it from the sale if its file is gone."""
+        invoice_id, ok = QInputDialog.getInt(self, "Reprint Bill", "Invoice number:", 1, 1)
+        if not ok:
+            return
+        try:
+            file_path = get_invoice_service().reprint(invoice_id)
+        except (OSError, sqlite3.Error) as e:
+            QMessageBox.critical(self, "Error", f"Could not reprint invoice {invoice_id}: {str(e)}")
+            return
+        if file_path is None:
+            QMessageBox.warning(self, "Warning", f"No invoice number {invoice_id}")
+            return
+        QDesktopServices.openUrl(QUrl.fromLocalFile(file_path))
+
     def scan_product(self):
-        dialog = BarcodeScannerDialog()
-        if dialog.exec_():
-            product_name = dialog.get_product_name()
-            self.product_list.setCurrentText(product_name)
+        """Open a camera scan session; every item it reads goes straight into the cart."""
+        # cv2 and pyzbar are only loaded once the operator actually scans
+        from barcode import BarcodeScannerDialog
+
+        if self.camera is None:
+            self.camera = get_camera_service()
+            # Camera codes take the same route as hardware scans: debounce, resolve, add one unit
+            self.camera.code_scanned.connect(self.scanner.pipeline.feed)
+        dialog = BarcodeScannerDialog(self.camera, self)
+        dialog.exec_()
+
+    def product_scanned(self, product):
+        """A hardware or camera scan resolved to a product: add one unit, reporting problems in the status line."""
+        if not self.isVisible():
+            return
+        if self.taking_payment:
+            self.scan_status.setText(f"Scan ignored during payment: {product.name}")
+            return
+        if self.add_to_cart(product, 1):
+            self.scan_status.setText(f"Added {product.name}")
+        else:
+            self.scan_status.setText(f"Not enough stock: {product.name}")
+
+    def unknown_barcode(self, code):
+        if not self.isVisible() or self.taking_payment:
+            return
+        self.scan_status.setText(f"Unknown barcode {code}")
+
+    def showEvent(self, event):
+        self.scanner.start_wedge()
+        if self.camera is not None:
+            self.camera.keep_warm()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.scanner.stop_wedge()
+        if self.camera is not None:
+            self.camera.release_later()
+        super().hideEvent(event)
 
 # database = QSqlDatabase.addDatabase("QSQLITE")
 # database.setDatabaseName("sms.db")
@@ -0,0 +1,140 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication
+import logging
+import time
+
+from scanner_input import ScanDebouncer
+
+CAMERA_REARM_SECONDS = 1.0  # a code must leave the view this long before it counts as another item
+CAMERA_IDLE_MS = 30000  # how long the camera stays open after the billing page is left
+
+
+class CameraService(QObject):
+    """The application's camera, opened once and shared by every scan session.
+
+    Opening a webcam takes hundreds of milliseconds, so the first
+    begin_session() starts a ScannerWorker and later sessions reuse it.
+    Between sessions the worker keeps streaming with decoding paused.
+    keep_warm() and release_later() let the billing page hold the camera
+    open while it is visible and close it a while after it is left.
+
+    code_scanned fires once per item held up to the camera: the worker
+    reports a code on every frame it is seen in, and each sighting restarts
+    the debouncer's window, so the same code is only reported again after it
+    has been out of view for CAMERA_REARM_SECONDS whatever the frame rate.
+    first_decode reports the time from begin_session() to the session's
+    first code.
+    """
+    frame_ready = pyqtSignal(QImage)
+    code_scanned = pyqtSignal(str)
+    stats = pyqtSignal(float, float)  # frames per second, mean decode ms
+    failed = pyqtSignal(str)
+    first_decode = pyqtSignal(float, bool)  # ms, whether the session had to open the camera
+
+    def __init__(self, camera_index=0, parent=None):
+        super().__init__(parent)
+        self.camera_index = camera_index
+        self.worker = None
+        self.camera_open = False
+        self.used = False
+        self.debouncer = ScanDebouncer(CAMERA_REARM_SECONDS)
+        self.session_start = None
+        self.cold_session = False
+        self.awaiting_first_decode = False
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self.stop)
+
+    def is_running(self):
+        return self.worker is not None
+
+    def start(self):
+        """Open the camera if it isn't already; decoding starts paused."""
+        if self.worker is not None:
+            return
+        # cv2 and pyzbar are only loaded once the camera is actually wanted
+        from barcode import ScannerWorker
+
+        self.used = True
+        self.camera_open = False
+        self.worker = ScannerWorker(self.camera_index, parent=self)
+        self.worker.set_decoding(False)
+        self.worker.opened.connect(self.camera_opened)
+        self.worker.frame_ready.connect(self.frame_ready)
+        self.worker.decoded.connect(self.code_decoded)
+        self.worker.stats.connect(self.stats)
+        self.worker.failed.connect(self.camera_failed)
+        self.worker.start()
+
+    def stop(self):
+        self.idle_timer.stop()
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker.deleteLater()
+            self.worker = None
+        self.camera_open = False
+        self.session_start = None
+
+    def begin_session(self):
+        """Start decoding for a scan session, opening the camera on first use."""
+        self.idle_timer.stop()
+        self.cold_session = not self.camera_open
+        self.start()
+        self.debouncer = ScanDebouncer(CAMERA_REARM_SECONDS)
+        self.session_start = time.perf_counter()
+        self.awaiting_first_decode = True
+        self.worker.set_decoding(True)
+
+    def end_session(self):
+        """Stop decoding but leave the camera streaming for the next session."""
+        self.session_start = None
+        if self.worker is not None:
+            self.worker.set_decoding(False)
+
+    def keep_warm(self):
+        """Cancel a pending release and reopen the camera if it has been used before."""
+        self.idle_timer.stop()
+        if self.used:
+            self.start()
+
+    def release_later(self, delay_ms=CAMERA_IDLE_MS):
+        if self.worker is not None:
+            self.idle_timer.start(delay_ms)
+
+    def camera_opened(self, open_ms):
+        self.camera_open = True
+        logging.debug(f"Camera opened in {open_ms:.0f} ms")
+
+    def code_decoded(self, code):
+        if self.session_start is None or not self.debouncer.accept(code):
+            return
+        if self.awaiting_first_decode:
+            self.awaiting_first_decode = False
+            elapsed_ms = (time.perf_counter() - self.session_start) * 1000
+            logging.debug(f"Time to first decode: {elapsed_ms:.0f} ms ({'cold' if self.cold_session else 'warm'} camera)")
+            self.first_decode.emit(elapsed_ms, self.cold_session)
+        self.code_scanned.emit(code)
+
+    def camera_failed(self, message):
+        # The worker has already returned; drop it so the next session tries again
+        self.stop()
+        self.failed.emit(message)
+
+
+_camera = None
+
+
+def get_camera_service():
+    """Return the application's CameraService, creating it on first use.
+
+    It belongs to the QApplication and releases the camera when the
+    application quits.
+    """
+    global _camera
+    if _camera is None:
+        app = QApplication.instance()
+        _camera = CameraService(parent=app)
+        app.aboutToQuit.connect(_camera.stop)
+    return _camera
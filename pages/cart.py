@@ -0,0 +1,97 @@
+def to_paise(amount):
+    """Convert a rupee amount (int, float or numeric string) to integer paise."""
+    return int(round(float(amount) * 100))
+
+
+def format_rupees(paise):
+    """Format integer paise as a rupee string with two decimals, e.g. 12345 -> '123.45'."""
+    sign = "-" if paise < 0 else ""
+    paise = abs(paise)
+    return f"{sign}{paise // 100}.{paise % 100:02d}"
+
+
+def format_percent(bp):
+    """Format basis points as a percentage without trailing zeros, e.g. 1500 -> '15%', 1250 -> '12.5%'."""
+    sign = "-" if bp < 0 else ""
+    bp = abs(bp)
+    fraction = f".{bp % 100:02d}".rstrip("0").rstrip(".")
+    return f"{sign}{bp // 100}{fraction}%"
+
+
+class CartLine:
+    __slots__ = ("product_id", "name", "unit_price_paise", "discount_id", "discount_bp", "quantity")
+
+    def __init__(self, product_id, name, unit_price_paise, discount_id, discount_bp, quantity):
+        self.product_id = product_id
+        self.name = name
+        self.unit_price_paise = unit_price_paise
+        self.discount_id = discount_id
+        self.discount_bp = discount_bp  # discount in basis points, 15% -> 1500
+        self.quantity = quantity
+
+    @property
+    def gross_paise(self):
+        """Line amount before discount."""
+        return self.unit_price_paise * self.quantity
+
+    @property
+    def total_paise(self):
+        """Line amount after discount, rounded half up to the nearest paisa."""
+        gross = self.gross_paise
+        return gross - (gross * self.discount_bp + 5000) // 10000
+
+
+class Cart:
+    """Lines of the sale in progress plus a running total in paise."""
+
+    def __init__(self):
+        self.lines = []
+        self.total_paise = 0
+        self._quantities = {}
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __getitem__(self, index):
+        return self.lines[index]
+
+    def add(self, product, quantity, discount_value):
+        """Append a line for a catalog ProductRow and return it."""
+        line = CartLine(product.product_id, product.name, to_paise(product.price),
+                        product.discount_id, to_paise(discount_value), quantity)
+        self.lines.append(line)
+        self.total_paise += line.total_paise
+        self._quantities[line.product_id] = self._quantities.get(line.product_id, 0) + quantity
+        return line
+
+    def remove(self, index):
+        """Remove and return the line at index."""
+        line = self.lines.pop(index)
+        self.total_paise -= line.total_paise
+        remaining = self._quantities[line.product_id] - line.quantity
+        if remaining:
+            self._quantities[line.product_id] = remaining
+        else:
+            del self._quantities[line.product_id]
+        return line
+
+    def clear(self):
+        self.lines = []
+        self.total_paise = 0
+        self._quantities = {}
+
+    def quantity_of(self, product_id):
+        """Total quantity of product_id across all lines."""
+        return self._quantities.get(product_id, 0)
+
+    def quantities(self):
+        """{ProductID: total quantity} for the whole cart."""
+        return dict(self._quantities)
+
+    def checkout_lines(self):
+        """(ProductID, Quantity, UnitPrice, DiscountID) tuples as expected by checkout.commit_sale."""
+        return [(line.product_id, line.quantity, line.unit_price_paise / 100, line.discount_id)
+                for line in self.lines]
@@ -0,0 +1,241 @@
+import time
+
+from store import get_store
+from search_index import ProductSearchIndex
+
+PRODUCT = "Product"
+CATEGORY = "Category"
+SUPPLIERS = "Suppliers"
+DISCOUNT = "Discount"
+BARCODE = "ProductBarcode"
+
+LOAD_QUERIES = {
+    PRODUCT: """
+        SELECT ProductID, ProductName, CategoryID, Price, StockLevel, RestockLevel, SupplierID, DiscountID
+        FROM Product ORDER BY ProductID
+    """,
+    CATEGORY: "SELECT CategoryID, CategoryName, AisleNumber FROM Category ORDER BY CategoryID",
+    SUPPLIERS: "SELECT SupplierID, SupplierName, ContactNumber, Address FROM Suppliers ORDER BY SupplierID",
+    DISCOUNT: "SELECT DiscountID, DiscountValue FROM Discount ORDER BY DiscountID",
+    BARCODE: "SELECT Barcode, ProductID FROM ProductBarcode",
+}
+VERSION_QUERY = "SELECT TableName, Version FROM CatalogVersion"
+# How stale the billing page's lookups may get between checks of CatalogVersion
+LOOKUP_REFRESH_SECONDS = 5.0
+
+
+class ProductRow:
+    __slots__ = ("product_id", "name", "category_id", "price", "stock_level",
+                 "restock_level", "supplier_id", "discount_id")
+
+    def __init__(self, product_id, name, category_id, price, stock_level, restock_level, supplier_id, discount_id):
+        self.product_id = product_id
+        self.name = name
+        self.category_id = category_id
+        self.price = price
+        self.stock_level = stock_level
+        self.restock_level = restock_level
+        self.supplier_id = supplier_id
+        self.discount_id = discount_id
+
+
+class CategoryRow:
+    __slots__ = ("category_id", "name", "aisle_number")
+
+    def __init__(self, category_id, name, aisle_number):
+        self.category_id = category_id
+        self.name = name
+        self.aisle_number = aisle_number
+
+
+class SupplierRow:
+    __slots__ = ("supplier_id", "name", "contact_number", "address")
+
+    def __init__(self, supplier_id, name, contact_number, address):
+        self.supplier_id = supplier_id
+        self.name = name
+        self.contact_number = contact_number
+        self.address = address
+
+
+class DiscountRow:
+    __slots__ = ("discount_id", "value")
+
+    def __init__(self, discount_id, value):
+        self.discount_id = discount_id
+        self.value = value
+
+
+class CatalogCache:
+    """Process-wide, lazily loaded copy of Product, Category, Suppliers, Discount and ProductBarcode.
+
+    Each table is read once and kept until a page that writes to it calls
+    invalidate(). Rows are returned in primary-key order, matching the order
+    the pages used to get from their own SELECTs.
+
+    Writes from other tills (or other processes on the same sms.db) show up
+    through refresh(): triggers bump a per-table counter in CatalogVersion on
+    every write, and refresh() drops the cached tables whose counter moved
+    since they were loaded. Stock levels are the exception: sales and
+    restocks don't move the Product counter, the writing till patches its
+    own copy with apply_stock_deltas(), and checkout rechecks stock in the
+    database, so a till may show another till's sales late but never
+    oversells.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._tables = {}
+        self._products_by_name = None
+        self._product_names = None
+        self._search_index = None
+        self._generations = {PRODUCT: 0, CATEGORY: 0, SUPPLIERS: 0, DISCOUNT: 0, BARCODE: 0}
+        self._versions = {}  # CatalogVersion of each table as of its load
+        self._checked_at = float("-inf")
+
+    def _load(self, table):
+        rows = self._tables.get(table)
+        if rows is not None:
+            return rows
+
+        if table not in LOAD_QUERIES:
+            raise KeyError(f"Unknown catalog table: {table}")
+        if self.store is None:
+            self.store = get_store()
+        with self.store.connection() as conn:
+            # Read before the rows, so a write in between is caught by the next refresh()
+            versions = dict(conn.execute(VERSION_QUERY).fetchall())
+            fetched = conn.execute(LOAD_QUERIES[table]).fetchall()
+        self._versions[table] = versions.get(table)
+
+        if table == PRODUCT:
+            rows = {r[0]: ProductRow(*r) for r in fetched}
+            self._products_by_name = {row.name: row for row in rows.values()}
+            self._product_names = [row.name for row in rows.values()]
+            if self._search_index is not None:
+                # Kept across reloads; only added, renamed and deleted products are re-indexed
+                self._search_index.sync({row.product_id: row.name for row in rows.values()})
+        elif table == CATEGORY:
+            rows = {r[0]: CategoryRow(*r) for r in fetched}
+        elif table == SUPPLIERS:
+            rows = {r[0]: SupplierRow(*r) for r in fetched}
+        elif table == BARCODE:
+            # Barcode -> ProductID; kept as plain pairs since it can be far larger than Product
+            rows = dict(fetched)
+        else:
+            rows = {r[0]: DiscountRow(*r) for r in fetched}
+
+        self._tables[table] = rows
+        return rows
+
+    def invalidate(self, *tables):
+        """Drop the cached copy of the given tables (all of them if none are given)."""
+        for table in tables or tuple(self._generations):
+            self._tables.pop(table, None)
+            self._generations[table] += 1
+            if table == PRODUCT:
+                self._products_by_name = None
+                self._product_names = None
+
+    def refresh(self, max_age=0.0):
+        """Drop the cached tables changed in the database since they were loaded; returns them.
+
+        Costs one small query; with max_age, checks at most once per max_age
+        seconds.
+        """
+        now = time.monotonic()
+        if not self._tables or now - self._checked_at < max_age:
+            return []
+        self._checked_at = now
+        if self.store is None:
+            self.store = get_store()
+        with self.store.connection() as conn:
+            versions = dict(conn.execute(VERSION_QUERY).fetchall())
+        changed = [table for table in self._tables if versions.get(table) != self._versions.get(table)]
+        if changed:
+            self.invalidate(*changed)
+        return changed
+
+    def generation(self, table):
+        """Counter that changes whenever the cached copy of table changes."""
+        return self._generations[table]
+
+    def apply_stock_deltas(self, deltas):
+        """Patch cached StockLevel values ({ProductID: change}) after a committed write."""
+        rows = self._tables.get(PRODUCT)
+        if rows is None:
+            return
+        for product_id, delta in deltas.items():
+            row = rows.get(product_id)
+            if row is not None:
+                row.stock_level += delta
+        self._generations[PRODUCT] += 1
+
+    # Products
+    def products(self):
+        return list(self._load(PRODUCT).values())
+
+    def product(self, product_id):
+        return self._load(PRODUCT).get(product_id)
+
+    def product_by_name(self, name):
+        self._load(PRODUCT)
+        return self._products_by_name.get(name)
+
+    def search_index(self):
+        """ProductSearchIndex over the product names, built on first use and kept in step with Product."""
+        products = self._load(PRODUCT)
+        if self._search_index is None:
+            self._search_index = ProductSearchIndex({row.product_id: row.name for row in products.values()})
+        return self._search_index
+
+    def search_products(self, text, limit=20):
+        """Ranked ProductRows for type-ahead completion."""
+        products = self._load(PRODUCT)
+        return [products[pid] for pid in self.search_index().search(text, limit)]
+
+    def product_for_barcode(self, barcode):
+        """The ProductRow a scanned barcode belongs to, or None if it is not registered."""
+        product_id = self._load(BARCODE).get(barcode)
+        return self.product(product_id) if product_id is not None else None
+
+    def barcodes_for(self, product_id):
+        """Barcodes registered to product_id. A linear scan, for the product dialogs only."""
+        return sorted(code for code, pid in self._load(BARCODE).items() if pid == product_id)
+
+    def product_names(self):
+        """Names in ProductID order. The same list object is returned until Product is invalidated."""
+        self._load(PRODUCT)
+        return self._product_names
+
+    # Categories, suppliers and discounts
+    def categories(self):
+        return list(self._load(CATEGORY).values())
+
+    def category(self, category_id):
+        return self._load(CATEGORY).get(category_id)
+
+    def suppliers(self):
+        return list(self._load(SUPPLIERS).values())
+
+    def supplier(self, supplier_id):
+        return self._load(SUPPLIERS).get(supplier_id)
+
+    def discounts(self):
+        return list(self._load(DISCOUNT).values())
+
+    def discount_value(self, discount_id):
+        """DiscountValue for discount_id, or 0.0 when the product has no discount."""
+        row = self._load(DISCOUNT).get(discount_id)
+        return float(row.value) if row is not None else 0.0
+
+
+_catalog = None
+
+
+def get_catalog():
+    """Return the shared CatalogCache, creating it on first use."""
+    global _catalog
+    if _catalog is None:
+        _catalog = CatalogCache()
+    return _catalog
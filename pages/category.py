@@ -1,9 +1,13 @@
 # Import Modules
 from PyQt5.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QWidget, QHeaderView, \
-    QLabel, QPushButton, QLineEdit, QTableWidget, QMessageBox, QTableWidgetItem
+    QLabel, QPushButton, QLineEdit, QTableView, QMessageBox
 from PyQt5.QtSql import QSqlDatabase, QSqlQuery
 from PyQt5.QtCore import Qt
+import sqlite3
 import sys
+from catalog import get_catalog, CATEGORY, PRODUCT
+from store import get_store
+from table_models import CatalogTableModel
 
 class CategoryPage(QWidget):
     def __init__(self, parent=None):
@@ -30,16 +34,17 @@ class CategoryPage(QWidget):
         self.add_btn.clicked.connect(self.add_category)
         self.del_btn.clicked.connect(self.delete_category)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["Category ID", "Category Name", "Aisle Number"])
+        self.model = CatalogTableModel([("Category ID", "category_id"), ("Category Name", "name"),
+                                        ("Aisle Number", "aisle_number")], parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.clicked.connect(self.load_selected_row)  # Connect click event to load row data
 
         # Make the table read-only
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
 
         # Make the entire row get selected when any item in it is clicked
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
 
         # Fit the table within the screen (remove horizontal scrollbar)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
@@ -73,21 +78,15 @@ class CategoryPage(QWidget):
         self.load_table()
 
     def load_table(self):
-        self.table.setRowCount(0)
-        query = QSqlQuery("SELECT CategoryID, CategoryName, AisleNumber FROM Category")  # Specify column order
-        while query.next():
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(str(query.value(0))))  # CategoryID
-            self.table.setItem(row, 1, QTableWidgetItem(query.value(1)))       # CategoryName
-            self.table.setItem(row, 2, QTableWidgetItem(query.value(2)))       # AisleNumber
+        self.model.set_rows(get_catalog().categories())
 
     def load_selected_row(self):
         """Populate input fields with data from the selected row."""
-        selected_row = self.table.currentRow()
-        if selected_row != -1:
-            self.category_name.setText(self.table.item(selected_row, 1).text())  # CategoryName
-            self.aisle_number.setText(self.table.item(selected_row, 2).text())   # AisleNumber
+        index = self.table.currentIndex()
+        if index.isValid():
+            category = self.model.row_at(index.row())
+            self.category_name.setText(category.name)
+            self.aisle_number.setText(category.aisle_number)
 
     def add_category(self):
         category = self.category_name.text().strip()
@@ -97,34 +96,31 @@ class CategoryPage(QWidget):
             QMessageBox.warning(self, "Input Error", "Please enter both category name and aisle number.")
             return
 
-        # Check for duplicate category name
-        check_query = QSqlQuery()
-        check_query.prepare("SELECT COUNT(*) FROM Category WHERE CategoryName = ?")
-        check_query.addBindValue(category)
-        if check_query.exec_() and check_query.next():
-            if check_query.value(0) > 0:
-                QMessageBox.warning(self, "Error", "A category with this name already exists!")
-                return
-
-        query = QSqlQuery()
-        query.prepare("INSERT INTO Category (CategoryName, AisleNumber) VALUES (?, ?)")
-        query.addBindValue(category)
-        query.addBindValue(aisle)
-        if query.exec_():
-            self.load_table()
-            self.category_name.clear()
-            self.aisle_number.clear()
-            QMessageBox.information(self, "Success", "Category added successfully")
-        else:
-            QMessageBox.critical(self, "Error", f"Error adding category: {query.lastError().text()}")
+        try:
+            with get_store().connection() as conn:
+                # Check for duplicate category name
+                if conn.execute("SELECT COUNT(*) FROM Category WHERE CategoryName = ?", (category,)).fetchone()[0] > 0:
+                    QMessageBox.warning(self, "Error", "A category with this name already exists!")
+                    return
+                conn.execute("INSERT INTO Category (CategoryName, AisleNumber) VALUES (?, ?)", (category, aisle))
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Error adding category: {e}")
+            return
+
+        get_catalog().invalidate(CATEGORY)
+        self.load_table()
+        self.category_name.clear()
+        self.aisle_number.clear()
+        QMessageBox.information(self, "Success", "Category added successfully")
 
     def delete_category(self):
-        selected_row = self.table.currentRow()
-        if selected_row == -1:
+        index = self.table.currentIndex()
+        if not index.isValid():
             QMessageBox.warning(self, "No row selected", "Please select a row to delete")
             return
-        category_id = int(self.table.item(selected_row, 0).text())
-        category_name = self.table.item(selected_row, 1).text()
+        category = self.model.row_at(index.row())
+        category_id = category.category_id
+        category_name = category.name
 
         confirm = QMessageBox.question(self, "Are you sure?", f"Delete category '{category_name}'?", 
                                      QMessageBox.Yes | QMessageBox.No)
@@ -132,20 +128,19 @@ class CategoryPage(QWidget):
         if confirm == QMessageBox.No:
             return
         
-        query = QSqlQuery()
-        query.prepare("DELETE FROM Category WHERE CategoryID = ?")
-        query.addBindValue(category_id)
-        if query.exec_():
-            self.load_table()
-            self.category_name.clear()
-            self.aisle_number.clear()
-            QMessageBox.information(self, "Success", "Category deleted successfully")
-        else:
-            QMessageBox.critical(self, "Error", f"Error deleting category: {query.lastError().text()}")
-
-# Database setup
-database = QSqlDatabase.addDatabase("QSQLITE")
-database.setDatabaseName("sms.db")
+        try:
+            with get_store().connection() as conn:
+                conn.execute("DELETE FROM Category WHERE CategoryID = ?", (category_id,))
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Error deleting category: {e}")
+            return
+
+        # Products referencing the category are updated by ON DELETE SET NULL
+        get_catalog().invalidate(CATEGORY, PRODUCT)
+        self.load_table()
+        self.category_name.clear()
+        self.aisle_number.clear()
+        QMessageBox.information(self, "Success", "Category deleted successfully")
 
 # if not database.open():
 #     QMessageBox.critical(None, "Error", "Could not open database")
@@ -0,0 +1,115 @@
+import json
+import sqlite3
+
+from bill_archive import record_bill
+
+# The basket goes in as one JSON parameter, so the statement text is the
+# same for any number of lines and stays clear of the bound-parameter limit
+DECREMENT_STOCK_QUERY = """
+    UPDATE Product SET StockLevel = StockLevel - q.Quantity
+    FROM (SELECT json_extract(value, '$[0]') AS ProductID, json_extract(value, '$[1]') AS Quantity
+          FROM json_each(?)) AS q
+    WHERE Product.ProductID = q.ProductID AND Product.StockLevel >= q.Quantity
+    RETURNING ProductID
+"""
+SHORTAGES_QUERY = "SELECT ProductID, StockLevel FROM Product WHERE ProductID IN (SELECT value FROM json_each(?))"
+
+
+class CheckoutError(Exception):
+    """Raised when a sale could not be committed. Nothing from the sale is kept."""
+
+
+class InsufficientStockError(CheckoutError):
+    """Raised when another till or a correction got to the stock first.
+
+    shortages maps each ProductID that could not be decremented to a
+    (requested, available) pair; available is None if the product is gone.
+    """
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        details = ", ".join(
+            f"product {product_id}: requested {requested}, "
+            + ("no longer exists" if available is None else f"{available} in stock")
+            for product_id, (requested, available) in shortages.items()
+        )
+        super().__init__(f"Not enough stock ({details})")
+
+
+def decrement_stock(cursor, quantities):
+    """Subtract quantities ({ProductID: Quantity}) from Product.StockLevel with one UPDATE.
+
+    Each row is only decremented if it still holds at least the requested
+    quantity, so the check and the write are one atomic step. If any row is
+    short, InsufficientStockError is raised and the caller must roll back.
+    """
+    updated = cursor.execute(DECREMENT_STOCK_QUERY, (json.dumps(list(quantities.items())),)).fetchall()
+    if len(updated) != len(quantities):
+        updated_ids = {row[0] for row in updated}
+        raise InsufficientStockError(_shortages(
+            cursor, {pid: qty for pid, qty in quantities.items() if pid not in updated_ids}))
+
+
+def _shortages(cursor, quantities):
+    # The rows in quantities were left untouched by the UPDATE, so StockLevel is what the sale saw
+    available = dict(cursor.execute(SHORTAGES_QUERY, (json.dumps(list(quantities)),)).fetchall())
+    return {product_id: (requested, available.get(product_id)) for product_id, requested in quantities.items()}
+
+
+def commit_sale(conn, lines, total_amount, payment_method, amount_paid, sale_date):
+    """Write one sale (Sales, SaleDetails, stock, Invoices, BillArchive) in a single transaction.
+
+    lines is a sequence of (ProductID, Quantity, UnitPrice, DiscountID) tuples.
+    Returns (SalesID, InvoiceID). On any database error the whole sale is rolled
+    back and CheckoutError is raised; InsufficientStockError if a product no
+    longer has enough stock.
+    """
+    if not lines:
+        raise CheckoutError("No products added to the bill")
+
+    balance_due = amount_paid - total_amount
+    quantities = {}
+    for product_id, quantity, _, _ in lines:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("""
+            INSERT INTO Sales (SaleDate, TotalAmount, PaymentMethod, AmountPaid, BalanceDue)
+            VALUES (?, ?, ?, ?, ?)
+        """, (sale_date, total_amount, payment_method, amount_paid, balance_due))
+        sales_id = cursor.lastrowid
+
+        cursor.executemany("""
+            INSERT INTO SaleDetails (SalesID, ProductID, Quantity, UnitPrice, Subtotal, DiscountID)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (sales_id, product_id, quantity, unit_price, unit_price * quantity,
+             discount_id if discount_id is not None else 1)
+            for product_id, quantity, unit_price, discount_id in lines
+        ])
+
+        decrement_stock(cursor, quantities)
+
+        cursor.execute("""
+            INSERT INTO Invoices (SalesID, InvoiceDate, TotalAmount, AmountPaid, BalanceDue, PaymentMethod)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (sales_id, sale_date, total_amount, amount_paid, balance_due, payment_method))
+        invoice_id = cursor.lastrowid
+
+        # The bill's file is written after the sale commits, at the path recorded here
+        record_bill(cursor, sales_id, invoice_id, sale_date)
+
+        cursor.execute("COMMIT")
+    except InsufficientStockError:
+        conn.execute("ROLLBACK")
+        raise
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise CheckoutError(str(e)) from e
+    finally:
+        cursor.close()
+
+    return sales_id, invoice_id
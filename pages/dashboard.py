@@ -5,15 +5,23 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtSql import QSqlDatabase, QSqlQuery, QSqlError
+import importlib
+import sys
 
-# Import the page classes
-from billing import BillingPage
-from discount import DiscountPage
-from report import ReportPage
-from stocks import StockPage
-from category import CategoryPage
-from products import ProductPage
-from supplier import SuppliersPage
+from catalog import get_catalog
+
+# Page key -> (module, class). Pages are imported and built on first
+# navigation, so logging in doesn't pay for every page's imports and
+# initial table load.
+PAGES = {
+    "billing": ("billing", "BillingPage"),
+    "discount": ("discount", "DiscountPage"),
+    "category": ("category", "CategoryPage"),
+    "products": ("products", "ProductPage"),
+    "stocks": ("stocks", "StockPage"),
+    "suppliers": ("supplier", "SuppliersPage"),
+    "report": ("report", "ReportPage"),
+}
 
 
 class MainPage(QWidget):
@@ -70,24 +78,10 @@ class MainWindow(QMainWindow):
         # Create the main page
         self.main_page = MainPage()
 
-        # Create instances of other pages
-        self.billing_page = BillingPage(self)
-        self.discount_page = DiscountPage(self)
-        self.category_page = CategoryPage(self)
-        self.products_page = ProductPage(self)
-        self.stocks_page = StockPage(self)
-        self.suppliers_page = SuppliersPage(self)
-        self.report_page = ReportPage(self)
-
-        # Add all pages to the stacked widget
         self.stack.addWidget(self.main_page)
-        self.stack.addWidget(self.billing_page)
-        self.stack.addWidget(self.discount_page)
-        self.stack.addWidget(self.category_page)
-        self.stack.addWidget(self.products_page)
-        self.stack.addWidget(self.stocks_page)
-        self.stack.addWidget(self.suppliers_page)
-        self.stack.addWidget(self.report_page)
+
+        # Other pages are added to the stack by page() on first navigation
+        self.pages = {}
 
         # Connect main page buttons to navigation functions
         self.main_page.billing_btn.clicked.connect(self.show_billing)
@@ -102,41 +96,68 @@ class MainWindow(QMainWindow):
         # Set the initial page to the main page
         self.stack.setCurrentWidget(self.main_page)
 
+    def page(self, key):
+        """The page for key, importing and building it the first time it is shown.
+
+        Catalog changes made by other tills are picked up first, so the page
+        loads current products, stock and prices.
+        """
+        get_catalog().refresh()
+        page = self.pages.get(key)
+        if page is None:
+            module_name, class_name = PAGES[key]
+            page_class = getattr(importlib.import_module(module_name), class_name)
+            page = page_class(self)
+            self.stack.addWidget(page)
+            self.pages[key] = page
+        return page
+
     def show_billing(self):
         self.setWindowTitle("Billing Page")
-        self.billing_page.load_product_list()
-        self.stack.setCurrentWidget(self.billing_page)
+        billing_page = self.page("billing")
+        billing_page.load_product_list()
+        self.stack.setCurrentWidget(billing_page)
 
     def show_products(self):
         self.setWindowTitle("Products Page")
-        self.products_page.load_table()
-        self.stack.setCurrentWidget(self.products_page)
+        products_page = self.page("products")
+        products_page.load_table()
+        self.stack.setCurrentWidget(products_page)
 
     def show_stocks(self):
         self.setWindowTitle("Stock Page")
-        self.stocks_page.load_table()
-        self.stack.setCurrentWidget(self.stocks_page)
+        stocks_page = self.page("stocks")
+        stocks_page.load_table()
+        self.stack.setCurrentWidget(stocks_page)
 
     def show_report(self):
         self.setWindowTitle("Report Page")
-        self.stack.setCurrentWidget(self.report_page)
+        self.stack.setCurrentWidget(self.page("report"))
 
     def show_discount(self):
         self.setWindowTitle("Discount Page")
-        self.stack.setCurrentWidget(self.discount_page)
+        self.stack.setCurrentWidget(self.page("discount"))
 
     def show_suppliers(self):
         self.setWindowTitle("Suppliers Page")
-        self.stack.setCurrentWidget(self.suppliers_page)
+        self.stack.setCurrentWidget(self.page("suppliers"))
 
     def show_category(self):
         self.setWindowTitle("Category Page")
-        self.stack.setCurrentWidget(self.category_page)
+        self.stack.setCurrentWidget(self.page("category"))
 
     def show_main(self):
         self.setWindowTitle("Shop Management System")
         self.stack.setCurrentWidget(self.main_page)
 
+    def closeEvent(self, event):
+        """Stop the chart worker processes, if a report has started them."""
+        # Looked up rather than imported: importing it here would load matplotlib just to quit
+        report_charts = sys.modules.get("report_charts")
+        if report_charts is not None:
+            report_charts.shutdown_pool()
+        super().closeEvent(event)
+
     def logout(self):
         """Handle logout functionality"""
         self.hide()  # Hide dashboard
@@ -0,0 +1,32 @@
+"""Connection factory for sms.db.
+
+Every SQLite connection, whether it is opened by a LocalStore on a till or
+by store_server.py for remote tills, gets the same profile. WAL lets report
+reads run while a till commits a sale. busy_timeout makes a writer wait for
+another writer instead of failing with "database is locked".
+"""
+import sqlite3
+
+DB_PATH = "sms.db"
+BUSY_TIMEOUT_MS = 5000
+
+# Applied in order on every new connection. journal_mode is stored in the
+# database file; the rest are per connection.
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",  # WAL stays consistent on crash; fsync at checkpoints only
+    "PRAGMA cache_size = -16000",  # 16 MB page cache
+    "PRAGMA mmap_size = 268435456",  # map up to 256 MB of the file
+    "PRAGMA temp_store = MEMORY",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA foreign_keys = ON",
+]
+
+
+def connect(db_path=DB_PATH, check_same_thread=True):
+    """Open a sqlite3 connection in autocommit mode (transactions are explicit) with the shared profile."""
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=BUSY_TIMEOUT_MS / 1000,
+                           check_same_thread=check_same_thread)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
@@ -1,9 +1,13 @@
 # Import Modules
 from PyQt5.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QWidget, QHeaderView, \
-    QLabel, QPushButton, QLineEdit, QTableWidget, QMessageBox, QTableWidgetItem
+    QLabel, QPushButton, QLineEdit, QTableView, QMessageBox
 from PyQt5.QtSql import QSqlDatabase, QSqlQuery
 from PyQt5.QtCore import Qt
+import sqlite3
 import sys
+from catalog import get_catalog, DISCOUNT, PRODUCT
+from store import get_store
+from table_models import CatalogTableModel
 
 class DiscountPage(QWidget):
     def __init__(self, parent=None):
@@ -27,15 +31,15 @@ class DiscountPage(QWidget):
         self.add_btn.clicked.connect(self.add_discount)
         self.del_btn.clicked.connect(self.delete_discount)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(2)
-        self.table.setHorizontalHeaderLabels(["Discount ID", "Discount Value"])
+        self.model = CatalogTableModel([("Discount ID", "discount_id"), ("Discount Value", "value")], parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
 
         # Make the table read-only
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
 
         # Make the entire row get selected when any item in it is clicked
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
 
         # Fit the table within the screen (remove horizontal scrollbar)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
@@ -64,13 +68,7 @@ class DiscountPage(QWidget):
         self.load_table()
 
     def load_table(self):
-        self.table.setRowCount(0)
-        query = QSqlQuery("SELECT DiscountID, DiscountValue FROM Discount")
-        while query.next():
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(str(query.value(0))))  # DiscountID
-            self.table.setItem(row, 1, QTableWidgetItem(str(query.value(1))))  # DiscountValue
+        self.model.set_rows(get_catalog().discounts())
 
     def add_discount(self):
         discount = self.discount.text().strip()
@@ -85,33 +83,30 @@ class DiscountPage(QWidget):
             QMessageBox.critical(self, "Error", "Invalid Discount Value - must be a number!")
             return
 
-        # Check if discount value already exists
-        check_query = QSqlQuery()
-        check_query.prepare("SELECT COUNT(*) FROM Discount WHERE DiscountValue = ?")
-        check_query.addBindValue(discount_value)
-        if check_query.exec_() and check_query.next():
-            if check_query.value(0) > 0:
-                QMessageBox.warning(self, "Error", "A discount with this value already exists!")
-                return
-
-        query = QSqlQuery()
-        query.prepare("INSERT INTO Discount (DiscountValue) VALUES (?)")
-        query.addBindValue(discount_value)
-        if query.exec_():
-            self.load_table()
-            self.discount.clear()
-            QMessageBox.information(self, "Success", "Discount added successfully")
-        else:
-            QMessageBox.critical(self, "Error", f"Error adding discount: {query.lastError().text()}")
+        try:
+            with get_store().connection() as conn:
+                # Check if discount value already exists
+                if conn.execute("SELECT COUNT(*) FROM Discount WHERE DiscountValue = ?",
+                                (discount_value,)).fetchone()[0] > 0:
+                    QMessageBox.warning(self, "Error", "A discount with this value already exists!")
+                    return
+                conn.execute("INSERT INTO Discount (DiscountValue) VALUES (?)", (discount_value,))
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Error adding discount: {e}")
+            return
+
+        get_catalog().invalidate(DISCOUNT)
+        self.load_table()
+        self.discount.clear()
+        QMessageBox.information(self, "Success", "Discount added successfully")
 
     def delete_discount(self):
-        selected_row = self.table.currentRow()
-        if selected_row == -1:
+        index = self.table.currentIndex()
+        if not index.isValid():
             QMessageBox.warning(self, "No row selected", "Please select a row to delete")
             return
         
-        # Get DiscountValue from column 1 (not column 0 which is DiscountID)
-        discount_value = float(self.table.item(selected_row, 1).text())
+        discount_value = float(self.model.row_at(index.row()).value)
 
         confirm = QMessageBox.question(self, "Are you sure?", f"Delete discount value {discount_value}?", 
                                      QMessageBox.Yes | QMessageBox.No)
@@ -119,18 +114,17 @@ class DiscountPage(QWidget):
         if confirm == QMessageBox.No:
             return
         
-        query = QSqlQuery()
-        query.prepare("DELETE FROM Discount WHERE DiscountValue = ?")
-        query.addBindValue(discount_value)
-        if query.exec_():
-            self.load_table()
-            QMessageBox.information(self, "Success", "Discount deleted successfully")
-        else:
-            QMessageBox.critical(self, "Error", f"Error deleting discount: {query.lastError().text()}")
-
-# Database setup
-database = QSqlDatabase.addDatabase("QSQLITE")
-database.setDatabaseName("sms.db")
+        try:
+            with get_store().connection() as conn:
+                conn.execute("DELETE FROM Discount WHERE DiscountValue = ?", (discount_value,))
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Error deleting discount: {e}")
+            return
+
+        # Product_DiscountID_Default resets the DiscountID of affected products
+        get_catalog().invalidate(DISCOUNT, PRODUCT)
+        self.load_table()
+        QMessageBox.information(self, "Success", "Discount deleted successfully")
 
 # if not database.open():
 #     QMessageBox.critical(None, "Error", "Could not open database")
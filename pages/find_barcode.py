@@ -1,5 +1,5 @@
 import cv2
-from pyzbar.pyzbar import decode
+from barcode_decoder import AdaptiveDecoder
 
 def scan_barcode():
     # Open the default camera (index 0)
@@ -13,6 +13,7 @@ def scan_barcode():
 
     # Variable to store the last scanned barcode
     last_barcode = None
+    decoder = AdaptiveDecoder()
 
     while True:
         # Capture frame-by-frame
@@ -24,20 +25,19 @@ def scan_barcode():
         # Convert the frame to grayscale for barcode detection
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
 
-        # Decode barcodes in the frame
-        barcodes = decode(gray)
-        for barcode in barcodes:
-            # Extract barcode data
-            barcode_data = barcode.data.decode('utf-8')
-            barcode_type = barcode.type
+        # Decode barcodes in the frame, skipping unchanged frames
+        detections, stage = decoder.decode(gray)
+        for detection in detections:
+            barcode_data = detection.data
+            barcode_type = detection.type
 
             # Only print if this is a new barcode
             if barcode_data != last_barcode:
-                print(f"Barcode Detected - Type: {barcode_type}, Data: {barcode_data}")
+                print(f"Barcode Detected - Type: {barcode_type}, Data: {barcode_data} ({stage})")
                 last_barcode = barcode_data
 
             # Draw a rectangle around the barcode
-            (x, y, w, h) = barcode.rect
+            (x, y, w, h) = detection.rect
             cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
 
             # Display the barcode data on the frame
@@ -53,6 +53,7 @@ def scan_barcode():
             break
         elif key == ord('r'):  # Reset the last scanned barcode
             last_barcode = None
+            decoder.reset()
             print("Reset: Ready to scan a new barcode.")
 
     # Release the camera and close windows
@@ -2,21 +2,49 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import sqlite3
-from matplotlib.table import Table
 import os
+import tempfile
 from datetime import datetime
+from io import BytesIO
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 import sys
+from store import get_store, LocalStore
+import rollups
+import sales_queries
+import report_charts
+
+class ReportCancelled(Exception):
+    """Raised inside SalesAnalyzer when the caller cancels a report run."""
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
 
 class SalesAnalyzer:
-    def __init__(self, db_path="sms.db"):
-        """Initialize the SalesAnalyzer with the database path and load data."""
+    def __init__(self, db_path=None, use_rollups=True, headless=False, progress=None, is_cancelled=None,
+                 workers=None, store=None):
+        """Initialize the SalesAnalyzer with the database path and load data.
+
+        Queries run against store, or the configured store (SMS_STORE_URL) if none
+        is given. db_path opens a local database file instead.
+
+        headless renders charts without pyplot or plt.show so the analyzer can run off
+        the GUI thread. progress(percent, message) is called between stages, and
+        is_cancelled() is polled at the same points to abandon the run. workers
+        caps the headless rendering pool (default: one process per core).
+        """
         self.db_path = db_path
-        self.sales_df = None
-        self.sale_details_df = None
-        self.product_df = None
+        self.store = store
+        self.conn = None
+        self.headless = headless
+        self.progress = progress
+        self.is_cancelled = is_cancelled
+        self.workers = workers
+        self.charts = []
+        # Query layer: rollups.py reads pre-aggregated rows, sales_queries.py aggregates raw rows in SQLite
+        self.use_rollups = use_rollups
+        self.queries = rollups if use_rollups else sales_queries
         # Place the report directory inside the user's Documents folder
         documents_dir = os.path.expanduser("~/Documents")
         self.report_dir = os.path.join(documents_dir, "report")
@@ -42,221 +70,206 @@ class SalesAnalyzer:
                 print(f"Created directory: {dir_path}")
 
     def load_data_from_db(self):
-        """Load data from the SQLite database and preprocess it."""
+        """Borrow a connection from the store; raises sqlite3.Error if the database can't be opened."""
         try:
-            # Connect to the SQLite database
-            # base_path = os.path.dirname(sys.executable)
-            base_path = os.getcwd()
-            db_path = os.path.join(base_path, "sms.db")
-            print(db_path)
-            conn = sqlite3.connect(db_path)
-            print(f"Successfully connected to the database: {db_path}")
-
-            # Fetch Sales data
-            sales_query = "SELECT * FROM Sales"
-            self.sales_df = pd.read_sql_query(sales_query, conn)
-
-            # Fetch SaleDetails data
-            sale_details_query = "SELECT * FROM SaleDetails"
-            self.sale_details_df = pd.read_sql_query(sale_details_query, conn)
-
-            # Fetch Product data
-            product_query = "SELECT * FROM Product"
-            self.product_df = pd.read_sql_query(product_query, conn)
-
-            # Close the connection
-            conn.close()
-            print("Database connection closed.")
-
-            # Convert SaleDate to datetime and extract the date part
-            self.sales_df['SaleDate'] = pd.to_datetime(self.sales_df['SaleDate'])
-            self.sales_df['Date'] = self.sales_df['SaleDate'].dt.date
-            self.sales_df['YearMonth'] = self.sales_df['SaleDate'].dt.to_period('M')  # e.g., 2025-03
-            self.sales_df['Year'] = self.sales_df['SaleDate'].dt.year  # e.g., 2025
-            self.sales_df['MonthName'] = self.sales_df['SaleDate'].dt.strftime('%B')  # e.g., March
-            self.sales_df['MonthNumber'] = self.sales_df['SaleDate'].dt.month  # e.g., 3 for March
+            if self.store is None:
+                if self.db_path is not None:
+                    # base_path = os.path.dirname(sys.executable)
+                    base_path = os.getcwd()
+                    self.store = LocalStore(os.path.join(base_path, self.db_path), pool_size=1)
+                else:
+                    self.store = get_store()
+            self.conn = self.store.acquire()
+            print(f"Successfully connected to the database: {self.store!r}")
 
         except sqlite3.Error as e:
             print(f"Database error: {str(e)}")
-            exit(1)
-        except Exception as e:
-            print(f"Error loading data from database: {str(e)}")
-            exit(1)
+            raise
+
+    def close(self):
+        """Return the database connection to the store."""
+        if self.conn is not None:
+            self.store.release(self.conn)
+            self.conn = None
+            print("Database connection closed.")
 
-    def save_and_show_plot(self, fig, filename, analysis_type):
-        """Save the plot to the appropriate directory and display it."""
+    def query_sales_summary(self, analysis_type, period):
+        """(total sales, number of transactions) for the period."""
+        return self.queries.sales_summary(self.conn, analysis_type, period)
+
+    def query_product_sales(self, analysis_type, period):
+        """Per-product Quantity and Subtotal for the period as a DataFrame."""
+        return pd.DataFrame(self.queries.product_sales(self.conn, analysis_type, period),
+                            columns=['ProductID', 'ProductName', 'Quantity', 'Subtotal'])
+
+    def query_monthly_totals(self, target_year):
+        """Total sales per month number for the year as a DataFrame."""
+        return pd.DataFrame(self.queries.monthly_totals(self.conn, target_year),
+                            columns=['MonthNumber', 'TotalSales'])
+
+    def report_progress(self, percent, message):
+        """Forward progress to the caller and stop the run if it has been cancelled."""
+        if self.is_cancelled is not None and self.is_cancelled():
+            raise ReportCancelled()
+        if self.progress is not None:
+            self.progress(percent, message)
+
+    def add_chart(self, spec):
+        """Queue a report_charts spec; the queued charts are drawn together by render_charts()."""
+        self.charts.append(spec)
+
+    def render_charts(self):
+        """Draw every queued chart and return the PNGs in queue order.
+
+        Headless runs render the independent figures in parallel worker processes;
+        otherwise each figure is drawn through pyplot and shown, one at a time.
+        Charts that fail to render are left out.
+        """
+        specs, self.charts = self.charts, []
+        if self.headless:
+            def on_rendered(done, total):
+                self.report_progress(30 + 55 * done // total, f"Rendered chart {done} of {total}")
+
+            images = report_charts.render_charts(specs, workers=self.workers,
+                                                 on_rendered=on_rendered, is_cancelled=self.is_cancelled)
+            if images is None:
+                raise ReportCancelled()
+            return [image for image in images if image is not None]
+
+        images = []
+        sns.set(style="whitegrid")
+        for spec in specs:
+            try:
+                fig = plt.figure(figsize=spec['figsize'])
+                report_charts.draw_chart(fig, spec)
+                images.append(self.save_and_show_plot(fig))
+            except Exception as e:
+                print(f"Error plotting {spec['filename']}: {str(e)}")
+        return images
+
+    def save_and_show_plot(self, fig):
+        """Render the plot to PNG bytes in memory, display it and return the bytes."""
         try:
-            output_dir = self.output_dirs[analysis_type]
-            filepath = os.path.join(output_dir, filename)
-            fig.savefig(filepath, bbox_inches='tight')
-            print(f"Saved plot: {filepath}")
+            image = report_charts.figure_png(fig)
             plt.show()
-        except Exception as e:
-            print(f"Error saving plot {filename}: {str(e)}")
+            return image
         finally:
             plt.close(fig)
 
     def create_summary_table(self, data, title, time_frame_str, analysis_type):
-        """Create a table visualization for summary data and save it."""
-        try:
-            fig, ax = plt.subplots(figsize=(6, 2))
-            ax.axis('off')  # Hide axes
-            table_data = [list(data.keys()), list(data.values())]
-            table = Table(ax, bbox=[0, 0, 1, 1])
-            n_rows, n_cols = 2, len(data)
-            for i in range(n_rows):
-                for j in range(n_cols):
-                    table.add_cell(i, j, 1, 1, text=table_data[i][j], loc='center')
-            ax.add_table(table)
-            plt.title(f"{title} for {time_frame_str}")
-            plt.tight_layout()
-            filename = f"{title.replace(' ', '_').lower()}_{time_frame_str.replace(' ', '_')}.png"
-            self.save_and_show_plot(fig, filename, analysis_type)
-        except Exception as e:
-            print(f"Error creating summary table: {str(e)}")
+        """Queue a table visualization for summary data."""
+        self.add_chart({
+            'kind': 'table',
+            'title': f"{title} for {time_frame_str}",
+            'filename': f"{title.replace(' ', '_').lower()}_{time_frame_str.replace(' ', '_')}.png",
+            'figsize': (6, 2),
+            'rows': [list(data.keys()), list(data.values())],
+        })
 
     def create_product_sales_table(self, product_sales, title, time_frame_str, analysis_type):
-        """Create a table visualization for product sales data and save it."""
-        try:
-            fig, ax = plt.subplots(figsize=(10, len(product_sales) * 0.5 + 1))
-            ax.axis('off')  # Hide axes
-            table_data = [product_sales.columns.tolist()] + product_sales.values.tolist()
-            table = Table(ax, bbox=[0, 0, 1, 1])
-            n_rows, n_cols = len(table_data), len(table_data[0])
-            for i in range(n_rows):
-                for j in range(n_cols):
-                    table.add_cell(i, j, 1, 1, text=table_data[i][j], loc='center')
-            ax.add_table(table)
-            plt.title(f"{title} in {time_frame_str}")
-            plt.tight_layout()
-            filename = f"{title.replace(' ', '_').lower()}_{time_frame_str.replace(' ', '_')}.png"
-            self.save_and_show_plot(fig, filename, analysis_type)
-        except Exception as e:
-            print(f"Error creating product sales table: {str(e)}")
+        """Queue a table visualization for product sales data."""
+        self.add_chart({
+            'kind': 'table',
+            'title': f"{title} in {time_frame_str}",
+            'filename': f"{title.replace(' ', '_').lower()}_{time_frame_str.replace(' ', '_')}.png",
+            'figsize': (10, len(product_sales) * 0.5 + 1),
+            'rows': [product_sales.columns.tolist()] + product_sales.values.tolist(),
+        })
 
     def plot_monthly_sales(self, monthly_sales, target_year):
-        """Create a bar plot for monthly sales in yearly analysis and save it."""
-        try:
-            fig = plt.figure(figsize=(10, 6))
-            sns.barplot(x='TotalSales', y='MonthName', hue='MonthName', data=monthly_sales, palette='Blues_d', legend=False)
-            plt.title(f'Monthly Sales Breakdown for {target_year}')
-            plt.xlabel('Total Sales ($)')
-            plt.ylabel('Month')
-            plt.tight_layout()
-            filename = f"monthly_sales_breakdown_{target_year}.png"
-            self.save_and_show_plot(fig, filename, 'year')
-        except Exception as e:
-            print(f"Error plotting monthly sales breakdown: {str(e)}")
+        """Queue a bar plot for monthly sales in yearly analysis."""
+        self.add_chart({
+            'kind': 'bar',
+            'title': f'Monthly Sales Breakdown for {target_year}',
+            'filename': f"monthly_sales_breakdown_{target_year}.png",
+            'figsize': (10, 6),
+            'values': monthly_sales['TotalSales'].tolist(),
+            'labels': monthly_sales['MonthName'].tolist(),
+            'palette': 'Blues_d',
+            'xlabel': 'Total Sales ($)',
+            'ylabel': 'Month',
+        })
 
     def generate_visualizations(self, product_sales, time_frame_str, analysis_type):
-        """Generate visualizations for product sales and save them."""
-        try:
-            # Determine the number of unique products sold
-            num_products = len(product_sales)
-            print(f"Number of unique products sold: {num_products}")
-
-            # Show all distinct products for tables and histograms
-            top_n = num_products
-            print(f"Showing all {top_n} distinct products sold in {time_frame_str} (for tables and histograms).")
-
-            # Sort by quantity sold
-            top_products_by_quantity = product_sales.sort_values(by='Quantity', ascending=False)
-
-            # Sort by revenue (Subtotal)
-            top_products_by_revenue = product_sales.sort_values(by='Subtotal', ascending=False)
-
-            # Create table visualizations for product sales data
-            self.create_product_sales_table(top_products_by_quantity, "Products by Quantity Sold", time_frame_str, analysis_type)
-            self.create_product_sales_table(top_products_by_revenue, "Products by Revenue", time_frame_str, analysis_type)
-
-            # Set up the plotting style
-            sns.set(style="whitegrid")
-
-            # Histogram 1: Products by Quantity Sold
-            try:
-                fig = plt.figure(figsize=(10, len(top_products_by_quantity) * 0.5 + 1))
-                sns.barplot(x='Quantity', y='ProductName', hue='ProductName', data=top_products_by_quantity, palette='Blues_d', legend=False)
-                plt.title(f'Products by Quantity Sold in {time_frame_str}')
-                plt.xlabel('Quantity Sold')
-                plt.ylabel('Product Name')
-                plt.tight_layout()
-                filename = f"products_by_quantity_sold_{time_frame_str.replace(' ', '_')}.png"
-                self.save_and_show_plot(fig, filename, analysis_type)
-            except Exception as e:
-                print(f"Error plotting histogram for quantity sold: {str(e)}")
-
-            # Histogram 2: Products by Revenue
-            try:
-                fig = plt.figure(figsize=(10, len(top_products_by_revenue) * 0.5 + 1))
-                sns.barplot(x='Subtotal', y='ProductName', hue='ProductName', data=top_products_by_revenue, palette='Greens_d', legend=False)
-                plt.title(f'Products by Revenue in {time_frame_str}')
-                plt.xlabel('Revenue ($)')
-                plt.ylabel('Product Name')
-                plt.tight_layout()
-                filename = f"products_by_revenue_{time_frame_str.replace(' ', '_')}.png"
-                self.save_and_show_plot(fig, filename, analysis_type)
-            except Exception as e:
-                print(f"Error plotting histogram for revenue: {str(e)}")
-
-            # Pie Chart: Top 5 Products by Quantity Sold, with "Others" category
-            try:
-                max_pie_products = 5
-                if num_products > max_pie_products:
-                    top_5_products = top_products_by_quantity.head(max_pie_products)
-                    others_quantity = top_products_by_quantity['Quantity'].iloc[max_pie_products:].sum()
-                    pie_data = pd.DataFrame({
-                        'ProductName': list(top_5_products['ProductName']) + ['Others'],
-                        'Quantity': list(top_5_products['Quantity']) + [others_quantity]
-                    })
-                else:
-                    pie_data = top_products_by_quantity
-
-                fig = plt.figure(figsize=(8, 8))
-                plt.pie(pie_data['Quantity'], labels=pie_data['ProductName'], autopct='%1.1f%%', startangle=140, colors=sns.color_palette('Pastel1'))
-                plt.title(f'Distribution of Top Products by Quantity Sold in {time_frame_str} (Top 5, Others Combined)')
-                plt.tight_layout()
-                filename = f"distribution_by_quantity_sold_{time_frame_str.replace(' ', '_')}.png"
-                self.save_and_show_plot(fig, filename, analysis_type)
-            except Exception as e:
-                print(f"Error plotting pie chart: {str(e)}")
-
-        except Exception as e:
-            print(f"An unexpected error occurred during visualization: {str(e)}")
+        """Queue the tables, bar charts and pie chart for product sales."""
+        # Determine the number of unique products sold
+        num_products = len(product_sales)
+        print(f"Number of unique products sold: {num_products}")
+
+        # Show all distinct products for tables and histograms
+        top_n = num_products
+        print(f"Showing all {top_n} distinct products sold in {time_frame_str} (for tables and histograms).")
+
+        # Sort by quantity sold
+        top_products_by_quantity = product_sales.sort_values(by='Quantity', ascending=False)
+
+        # Sort by revenue (Subtotal)
+        top_products_by_revenue = product_sales.sort_values(by='Subtotal', ascending=False)
+
+        # Create table visualizations for product sales data
+        self.create_product_sales_table(top_products_by_quantity, "Products by Quantity Sold", time_frame_str, analysis_type)
+        self.create_product_sales_table(top_products_by_revenue, "Products by Revenue", time_frame_str, analysis_type)
+
+        # Histogram 1: Products by Quantity Sold
+        self.add_chart({
+            'kind': 'bar',
+            'title': f'Products by Quantity Sold in {time_frame_str}',
+            'filename': f"products_by_quantity_sold_{time_frame_str.replace(' ', '_')}.png",
+            'figsize': (10, len(top_products_by_quantity) * 0.5 + 1),
+            'values': top_products_by_quantity['Quantity'].tolist(),
+            'labels': top_products_by_quantity['ProductName'].tolist(),
+            'palette': 'Blues_d',
+            'xlabel': 'Quantity Sold',
+            'ylabel': 'Product Name',
+        })
+
+        # Histogram 2: Products by Revenue
+        self.add_chart({
+            'kind': 'bar',
+            'title': f'Products by Revenue in {time_frame_str}',
+            'filename': f"products_by_revenue_{time_frame_str.replace(' ', '_')}.png",
+            'figsize': (10, len(top_products_by_revenue) * 0.5 + 1),
+            'values': top_products_by_revenue['Subtotal'].tolist(),
+            'labels': top_products_by_revenue['ProductName'].tolist(),
+            'palette': 'Greens_d',
+            'xlabel': 'Revenue ($)',
+            'ylabel': 'Product Name',
+        })
+
+        # Pie Chart: Top 5 Products by Quantity Sold, with "Others" category
+        max_pie_products = 5
+        pie_labels = top_products_by_quantity['ProductName'].tolist()
+        pie_values = top_products_by_quantity['Quantity'].tolist()
+        if num_products > max_pie_products:
+            others_quantity = sum(pie_values[max_pie_products:])
+            pie_labels = pie_labels[:max_pie_products] + ['Others']
+            pie_values = pie_values[:max_pie_products] + [others_quantity]
+        self.add_chart({
+            'kind': 'pie',
+            'title': f'Distribution of Top Products by Quantity Sold in {time_frame_str} (Top 5, Others Combined)',
+            'filename': f"distribution_by_quantity_sold_{time_frame_str.replace(' ', '_')}.png",
+            'figsize': (8, 8),
+            'values': pie_values,
+            'labels': pie_labels,
+        })
 
     def analyze_sales_for_day(self, target_date):
         """Analyze sales for a specific day."""
         try:
             target_date_str = target_date
-            daily_sales = self.sales_df[self.sales_df['Date'].astype(str) == target_date_str]
+            total_sales, num_transactions = self.query_sales_summary('day', target_date_str)
 
-            if daily_sales.empty:
+            if num_transactions == 0:
                 print(f"No sales found for {target_date_str}")
                 return False
 
-            total_sales = daily_sales['TotalAmount'].sum()
-            num_transactions = len(daily_sales)
-
             summary_data = {
                 "Total Sales ($)": f"{total_sales:.2f}",
                 "Number of Transactions": num_transactions
             }
             self.create_summary_table(summary_data, "Daily Sales Summary", target_date_str, 'day')
 
-            daily_sale_details = self.sale_details_df[self.sale_details_df['SalesID'].isin(daily_sales['SalesID'])]
-            if daily_sale_details.empty:
-                print("No sale details found for the selected date.")
-                return False
-
-            daily_sale_details = daily_sale_details.merge(self.product_df[['ProductID', 'ProductName']], on='ProductID')
-            if daily_sale_details.empty:
-                print("No matching products found in sale details.")
-                return False
-
-            product_sales = daily_sale_details.groupby(['ProductID', 'ProductName']).agg({
-                'Quantity': 'sum',
-                'Subtotal': 'sum'
-            }).reset_index()
-
+            product_sales = self.query_product_sales('day', target_date_str)
             if product_sales.empty:
                 print("No products sold on the selected date.")
                 return False
@@ -264,6 +277,8 @@ class SalesAnalyzer:
             self.generate_visualizations(product_sales, target_date_str, 'day')
             return True
 
+        except ReportCancelled:
+            raise
         except Exception as e:
             print(f"An unexpected error occurred during daily analysis: {str(e)}")
             return False
@@ -272,36 +287,19 @@ class SalesAnalyzer:
         """Analyze sales for a specific month."""
         try:
             target_year_month_str = target_year_month
-            monthly_sales = self.sales_df[self.sales_df['YearMonth'].astype(str) == target_year_month_str]
+            total_sales, num_transactions = self.query_sales_summary('month', target_year_month_str)
 
-            if monthly_sales.empty:
+            if num_transactions == 0:
                 print(f"No sales found for {target_year_month_str}")
                 return False
 
-            total_sales = monthly_sales['TotalAmount'].sum()
-            num_transactions = len(monthly_sales)
-
             summary_data = {
                 "Total Sales ($)": f"{total_sales:.2f}",
                 "Number of Transactions": num_transactions
             }
             self.create_summary_table(summary_data, "Monthly Sales Summary", target_year_month_str, 'month')
 
-            monthly_sale_details = self.sale_details_df[self.sale_details_df['SalesID'].isin(monthly_sales['SalesID'])]
-            if monthly_sale_details.empty:
-                print("No sale details found for the selected month.")
-                return False
-
-            monthly_sale_details = monthly_sale_details.merge(self.product_df[['ProductID', 'ProductName']], on='ProductID')
-            if monthly_sale_details.empty:
-                print("No matching products found in sale details.")
-                return False
-
-            product_sales = monthly_sale_details.groupby(['ProductID', 'ProductName']).agg({
-                'Quantity': 'sum',
-                'Subtotal': 'sum'
-            }).reset_index()
-
+            product_sales = self.query_product_sales('month', target_year_month_str)
             if product_sales.empty:
                 print("No products sold in the selected month.")
                 return False
@@ -309,6 +307,8 @@ class SalesAnalyzer:
             self.generate_visualizations(product_sales, target_year_month_str, 'month')
             return True
 
+        except ReportCancelled:
+            raise
         except Exception as e:
             print(f"An unexpected error occurred during monthly analysis: {str(e)}")
             return False
@@ -317,15 +317,12 @@ class SalesAnalyzer:
         """Analyze sales for a specific year."""
         try:
             target_year_int = int(target_year)
-            yearly_sales = self.sales_df[self.sales_df['Year'] == target_year_int]
+            total_sales, num_transactions = self.query_sales_summary('year', f"{target_year_int:04d}")
 
-            if yearly_sales.empty:
+            if num_transactions == 0:
                 print(f"No sales found for {target_year}")
                 return False
 
-            total_sales = yearly_sales['TotalAmount'].sum()
-            num_transactions = len(yearly_sales)
-
             summary_data = {
                 "Total Sales ($)": f"{total_sales:.2f}",
                 "Number of Transactions": num_transactions
@@ -333,34 +330,18 @@ class SalesAnalyzer:
             self.create_summary_table(summary_data, "Yearly Sales Summary", str(target_year), 'year')
 
             all_months = pd.DataFrame({
-                'MonthName': ['January', 'February', 'March', 'April', 'May', 'June', 
-                              'July', 'August', 'September', 'October', 'November', 'December'],
+                'MonthName': MONTH_NAMES,
                 'MonthNumber': range(1, 13)
             })
 
-            monthly_sales = yearly_sales.groupby(['MonthName', 'MonthNumber'])['TotalAmount'].sum().reset_index()
-            monthly_sales = monthly_sales.rename(columns={'TotalAmount': 'TotalSales'})
-            monthly_sales = all_months.merge(monthly_sales, on=['MonthName', 'MonthNumber'], how='left')
+            monthly_sales = self.query_monthly_totals(f"{target_year_int:04d}")
+            monthly_sales = all_months.merge(monthly_sales, on='MonthNumber', how='left')
             monthly_sales['TotalSales'] = monthly_sales['TotalSales'].fillna(0)
             monthly_sales = monthly_sales.sort_values('MonthNumber')
 
             self.plot_monthly_sales(monthly_sales, target_year)
 
-            yearly_sale_details = self.sale_details_df[self.sale_details_df['SalesID'].isin(yearly_sales['SalesID'])]
-            if yearly_sale_details.empty:
-                print("No sale details found for the selected year.")
-                return False
-
-            yearly_sale_details = yearly_sale_details.merge(self.product_df[['ProductID', 'ProductName']], on='ProductID')
-            if yearly_sale_details.empty:
-                print("No matching products found in sale details.")
-                return False
-
-            product_sales = yearly_sale_details.groupby(['ProductID', 'ProductName']).agg({
-                'Quantity': 'sum',
-                'Subtotal': 'sum'
-            }).reset_index()
-
+            product_sales = self.query_product_sales('year', f"{target_year_int:04d}")
             if product_sales.empty:
                 print("No products sold in the selected year.")
                 return False
@@ -368,17 +349,24 @@ class SalesAnalyzer:
             self.generate_visualizations(product_sales, str(target_year), 'year')
             return True
 
+        except ReportCancelled:
+            raise
         except Exception as e:
             print(f"An unexpected error occurred during yearly analysis: {str(e)}")
             return False
 
-    def generate_pdf(self, analysis_type, time_frame_str):
-        """Generate a PDF file containing all images from the specified analysis type directory and delete the images."""
+    def generate_pdf(self, analysis_type, time_frame_str, images):
+        """Generate a PDF file with a title page followed by one page per PNG in images.
+
+        The PDF is built in memory and moved into place in one step, so a concurrent
+        run for the same period never sees a half-written file. Returns the path of
+        the PDF, or None if it could not be written.
+        """
         try:
             output_dir = self.output_dirs[analysis_type]
-            # Save the PDF in the same directory as the images
             pdf_filename = os.path.join(output_dir, f"{analysis_type}_report_{time_frame_str.replace(' ', '_')}.pdf")
-            c = canvas.Canvas(pdf_filename, pagesize=letter)
+            pdf_buffer = BytesIO()
+            c = canvas.Canvas(pdf_buffer, pagesize=letter)
             page_width, page_height = letter
 
             # Add a title page
@@ -408,16 +396,11 @@ class SalesAnalyzer:
 
             c.showPage()  # End the title page
 
-            # Get all image files in the directory
-            image_files = [f for f in os.listdir(output_dir) if f.endswith('.png')]
-            if not image_files:
-                print(f"No images found in {output_dir} to include in the PDF.")
-                c.save()
-                return
+            if not images:
+                print("No charts were rendered to include in the PDF.")
 
-            for image_file in image_files:
-                image_path = os.path.join(output_dir, image_file)
-                img = ImageReader(image_path)
+            for image in images:
+                img = ImageReader(BytesIO(image))
                 img_width, img_height = img.getSize()
 
                 # Scale the image to fit the page while maintaining aspect ratio
@@ -433,37 +416,37 @@ class SalesAnalyzer:
                 x = (page_width - scaled_width) / 2
                 y = (page_height - scaled_height) / 2
 
-                c.drawImage(image_path, x, y, width=scaled_width, height=scaled_height)
+                c.drawImage(img, x, y, width=scaled_width, height=scaled_height)
                 c.showPage()
 
             c.save()
+            # Write next to the target under a unique name, then swap it in atomically
+            fd, tmp_path = tempfile.mkstemp(suffix='.pdf', dir=output_dir)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(pdf_buffer.getvalue())
+                os.replace(tmp_path, pdf_filename)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
             print(f"Generated PDF: {pdf_filename}")
-
-            # Delete all images in the directory after creating the PDF
-            for image_file in image_files:
-                image_path = os.path.join(output_dir, image_file)
-                os.remove(image_path)
-                print(f"Deleted image: {image_path}")
+            return pdf_filename
 
         except Exception as e:
             print(f"Error generating PDF: {str(e)}")
+            return None
 
     def main(self, target_date, target_year_month, target_year, analysis_type):
-        """Run the sales analysis for the specified analysis type."""
+        """Run the sales analysis for the specified analysis type and return the PDF path (None if no report)."""
         if analysis_type not in ['day', 'month', 'year']:
             print(f"Invalid analysis type: {analysis_type}. Must be 'day', 'month', or 'year'.")
-            return
-
-        # Clear the output directory for the analysis type to avoid including old images in the PDF
-        output_dir = self.output_dirs[analysis_type]
-        for file in os.listdir(output_dir):
-            if file.endswith('.png'):
-                os.remove(os.path.join(output_dir, file))
-                print(f"Removed old file: {file}")
+            return None
 
         # Perform the analysis based on the type
         success = False
         time_frame_str = ""
+        pdf_path = None
+        self.report_progress(5, "Querying sales")
         if analysis_type == 'day':
             success = self.analyze_sales_for_day(target_date)
             time_frame_str = target_date
@@ -476,7 +459,13 @@ class SalesAnalyzer:
 
         # Generate PDF if the analysis was successful
         if success:
-            self.generate_pdf(analysis_type, time_frame_str)
+            self.report_progress(30, "Rendering charts")
+            images = self.render_charts()
+            self.report_progress(90, "Writing PDF")
+            pdf_path = self.generate_pdf(analysis_type, time_frame_str, images)
+        self.close()
+        self.report_progress(100, "Done")
+        return pdf_path
 
 # if __name__ == '__main__':
 #     # Example values for testing when running directly
@@ -0,0 +1,251 @@
+"""Invoice search and bill reprints.
+
+search() pages through Invoices newest first with keyset pagination: each
+page carries the (InvoiceDate, InvoiceID) of its last row, and the next
+page starts below it. Filters on dates, payment method, amount and SalesID
+are served by the indexes from migration 6, so a page costs the same at
+the end of the table as at the start.
+
+Bills are rebuilt from Sales and SaleDetails when needed. Rendered PDFs
+are kept in a small LRU cache, so a cashier reprinting the last few
+receipts doesn't render them again.
+"""
+import os
+import sqlite3
+import tempfile
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from bill_archive import get_bill_archive, record_bill
+from cart import to_paise
+from receipts import PdfReceiptTemplate, Receipt
+from store import get_store
+
+PAGE_SIZE = 50
+PDF_CACHE_SIZE = 128  # bills of a few KB each
+
+
+class InvoiceRow:
+    __slots__ = ("invoice_id", "sales_id", "invoice_date", "total_amount", "amount_paid", "balance_due",
+                 "payment_method")
+
+    def __init__(self, invoice_id, sales_id, invoice_date, total_amount, amount_paid, balance_due, payment_method):
+        self.invoice_id = invoice_id
+        self.sales_id = sales_id
+        self.invoice_date = invoice_date
+        self.total_amount = total_amount
+        self.amount_paid = amount_paid
+        self.balance_due = balance_due
+        self.payment_method = payment_method
+
+
+class InvoicePage:
+    __slots__ = ("rows", "next_after")
+
+    def __init__(self, rows, next_after):
+        self.rows = rows
+        self.next_after = next_after  # pass as after= for the next page; None on the last page
+
+
+# One statement per leading filter, so the planner can pick that filter's
+# index (benchmarks/check_query_plans.py fails if one falls back to a full
+# scan); the other filters are always bound, with open-ended bounds when
+# they aren't set
+SEARCH_QUERIES = {
+    "sale": """
+        SELECT InvoiceID, SalesID, InvoiceDate, TotalAmount, AmountPaid, BalanceDue, PaymentMethod
+        FROM Invoices
+        WHERE SalesID = ? AND InvoiceDate >= ? AND InvoiceDate < ? AND TotalAmount >= ? AND TotalAmount <= ?
+          AND (InvoiceDate, InvoiceID) < (?, ?)
+        ORDER BY InvoiceDate DESC, InvoiceID DESC
+        LIMIT ?
+    """,
+    "method": """
+        SELECT InvoiceID, SalesID, InvoiceDate, TotalAmount, AmountPaid, BalanceDue, PaymentMethod
+        FROM Invoices
+        WHERE PaymentMethod = ? AND InvoiceDate >= ? AND InvoiceDate < ? AND TotalAmount >= ? AND TotalAmount <= ?
+          AND (InvoiceDate, InvoiceID) < (?, ?)
+        ORDER BY InvoiceDate DESC, InvoiceID DESC
+        LIMIT ?
+    """,
+    "amount": """
+        SELECT InvoiceID, SalesID, InvoiceDate, TotalAmount, AmountPaid, BalanceDue, PaymentMethod
+        FROM Invoices
+        WHERE TotalAmount >= ? AND TotalAmount <= ? AND InvoiceDate >= ? AND InvoiceDate < ?
+          AND (InvoiceDate, InvoiceID) < (?, ?)
+        ORDER BY InvoiceDate DESC, InvoiceID DESC
+        LIMIT ?
+    """,
+    "date": """
+        SELECT InvoiceID, SalesID, InvoiceDate, TotalAmount, AmountPaid, BalanceDue, PaymentMethod
+        FROM Invoices
+        WHERE InvoiceDate >= ? AND InvoiceDate < ? AND TotalAmount >= ? AND TotalAmount <= ?
+          AND (InvoiceDate, InvoiceID) < (?, ?)
+        ORDER BY InvoiceDate DESC, InvoiceID DESC
+        LIMIT ?
+    """,
+}
+RECEIPT_QUERIES = {
+    "sale": """
+        SELECT s.SaleDate, s.TotalAmount, i.InvoiceID FROM Sales s
+        LEFT JOIN Invoices i ON i.SalesID = s.SalesID
+        WHERE s.SalesID = ?
+    """,
+    "lines": """
+        SELECT p.ProductName, d.Quantity, d.UnitPrice FROM SaleDetails d
+        JOIN Product p ON p.ProductID = d.ProductID
+        WHERE d.SalesID = ?
+        ORDER BY d.SaleDetailID
+    """,
+}
+NO_DATE_FROM = ""
+NO_DATE_TO = "9999-99-99"  # sorts after every real date
+NO_MIN_AMOUNT = -1e308
+NO_MAX_AMOUNT = 1e308
+
+
+def search_invoices(conn, date_from=None, date_to=None, payment_method=None, min_amount=None, max_amount=None,
+                    sales_id=None, after=None, limit=PAGE_SIZE):
+    """One InvoicePage of invoices matching every given filter, newest first.
+
+    date_from and date_to are inclusive yyyy-MM-dd days; amounts are rupees.
+    """
+    dates = [date.fromisoformat(date_from).isoformat() if date_from else NO_DATE_FROM,
+             (date.fromisoformat(date_to) + timedelta(days=1)).isoformat() if date_to else NO_DATE_TO]
+    amounts = [min_amount if min_amount is not None else NO_MIN_AMOUNT,
+               max_amount if max_amount is not None else NO_MAX_AMOUNT]
+    page = list(after) if after is not None else [NO_DATE_TO, 0]
+    if sales_id is not None:
+        query, params = "sale", [sales_id] + dates + amounts
+    elif payment_method:
+        query, params = "method", [payment_method] + dates + amounts
+    elif (min_amount is not None or max_amount is not None) and not (date_from or date_to):
+        query, params = "amount", amounts + dates
+    else:
+        query, params = "date", dates + amounts
+    rows = conn.execute(SEARCH_QUERIES[query], params + page + [limit + 1]).fetchall()
+
+    # One extra row tells whether there is another page
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = (rows[-1][2], rows[-1][0])
+    return InvoicePage([InvoiceRow(*row) for row in rows], next_after)
+
+
+def load_receipt(conn, sales_id):
+    """Receipt of a sale rebuilt from Sales, SaleDetails and Invoices, or None if there is no such sale."""
+    sale = conn.execute(RECEIPT_QUERIES["sale"], (sales_id,)).fetchone()
+    if sale is None:
+        return None
+    sale_date, total_amount, invoice_id = sale
+    # Names are today's; a product renamed since the sale prints under its new name
+    lines = [(name, to_paise(unit_price) * quantity)
+             for name, quantity, unit_price in conn.execute(RECEIPT_QUERIES["lines"], (sales_id,))]
+    return Receipt(sale_date[:10], sale_date[11:], lines, to_paise(total_amount), sales_id, invoice_id)
+
+
+class PdfCache:
+    """Least recently used bill PDFs, keyed by SalesID."""
+
+    def __init__(self, capacity=PDF_CACHE_SIZE):
+        self.capacity = capacity
+        self.pdfs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sales_id):
+        pdf = self.pdfs.get(sales_id)
+        if pdf is None:
+            self.misses += 1
+            return None
+        self.pdfs.move_to_end(sales_id)
+        self.hits += 1
+        return pdf
+
+    def put(self, sales_id, pdf):
+        self.pdfs[sales_id] = pdf
+        self.pdfs.move_to_end(sales_id)
+        while len(self.pdfs) > self.capacity:
+            self.pdfs.popitem(last=False)
+
+
+class InvoiceService:
+    """Searches invoices and hands out their bills, rebuilding any that are missing."""
+
+    def __init__(self, store=None, archive=None, template=None, cache_size=PDF_CACHE_SIZE):
+        self.store = store or get_store()
+        self.archive = archive or get_bill_archive()
+        self.template = template or PdfReceiptTemplate()
+        self.cache = PdfCache(cache_size)
+
+    def search(self, **filters):
+        """search_invoices() with the shared store; takes the same keyword arguments."""
+        with self.store.connection() as conn:
+            return search_invoices(conn, **filters)
+
+    def invoice(self, invoice_id):
+        with self.store.connection() as conn:
+            row = conn.execute("""
+                SELECT InvoiceID, SalesID, InvoiceDate, TotalAmount, AmountPaid, BalanceDue, PaymentMethod
+                FROM Invoices WHERE InvoiceID = ?
+            """, (invoice_id,)).fetchone()
+        return InvoiceRow(*row) if row is not None else None
+
+    def bill_pdf(self, sales_id):
+        """PDF bytes of a sale's bill, rendered from the database unless cached; None for an unknown sale."""
+        pdf = self.cache.get(sales_id)
+        if pdf is not None:
+            return pdf
+        with self.store.connection() as conn:
+            receipt = load_receipt(conn, sales_id)
+        if receipt is None:
+            return None
+        pdf = self.template.render_bytes(receipt)
+        self.cache.put(sales_id, pdf)
+        return pdf
+
+    def reprint(self, invoice_id):
+        """Path of the archived bill of an invoice, rewriting it if the file is missing.
+
+        Sales from before the archive get a BillArchive row the first time
+        they are reprinted. Returns None for an unknown invoice.
+        """
+        with self.store.connection() as conn:
+            record = self.archive.lookup(conn, invoice_id=invoice_id)
+            if record is None:
+                row = conn.execute("SELECT SalesID, InvoiceDate FROM Invoices WHERE InvoiceID = ?",
+                                   (invoice_id,)).fetchone()
+                if row is None:
+                    return None
+                sales_id, invoice_date = row
+                try:
+                    record_bill(conn, sales_id, invoice_id, invoice_date)
+                except sqlite3.IntegrityError:
+                    pass  # another till indexed it first
+                record = self.archive.lookup(conn, invoice_id=invoice_id)
+        if record.exists():
+            return record.path
+
+        pdf = self.bill_pdf(record.sales_id)
+        os.makedirs(os.path.dirname(record.path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix=".pdf", dir=os.path.dirname(record.path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf)
+            os.replace(temp_path, record.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return record.path
+
+
+_service = None
+
+
+def get_invoice_service():
+    """Return the shared InvoiceService, creating it on first use."""
+    global _service
+    if _service is None:
+        _service = InvoiceService()
+    return _service
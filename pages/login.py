@@ -8,11 +8,16 @@ from PyQt5.QtSql import QSqlDatabase
 from PyQt5.QtSql import QSqlDatabase, QSqlQuery
 
 from dashboard import MainWindow
+from store import get_store
+from migrations import migrate, MigrationError
+from bill_archive import get_bill_archive
 
 import sys
 import os
 import shutil
 import logging
+import multiprocessing
+import sqlite3
 
 # Helper function to locate resources
 def resource_path(relative_path):
@@ -141,29 +146,43 @@ class LoginForm(QWidget):
         self.show()
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # report chart workers are spawned from the frozen app
     # db_path = get_writable_db_path()
     # if db_path is None:
     #     QMessageBox.critical(None, "Error", "Could not copy database file")
     #     sys.exit(1)
-    database = QSqlDatabase.addDatabase("QSQLITE")
-    database.setDatabaseName("sms.db")
 
-    if not database.open():
-        QMessageBox.critical(None, "Database Error", "Could not open database")
-        sys.exit(1)
+    # Created first so the error boxes below can be shown
+    app = QApplication(sys.argv)
+
+    # sms.db on this machine, or the shared store server set by SMS_STORE_URL
+    store = get_store()
 
-    query = QSqlQuery()
-    if not query.exec("PRAGMA foreign_keys = ON;"):
-        QMessageBox.critical(None, "Database Error", "Error enabling foreign keys:")
+    # Bring older databases up to the current schema before any page reads them
+    try:
+        with store.connection() as conn:
+            migrate(conn)
+    except MigrationError as e:
+        QMessageBox.critical(None, "Database Error", f"Could not upgrade the database: {e}")
+        sys.exit(1)
+    except sqlite3.Error as e:
+        QMessageBox.critical(None, "Database Error", f"Could not open database: {e}")
         sys.exit(1)
 
-    app = QApplication(sys.argv)
+    # File bills saved by older versions (flat bill_<date time>.pdf names) into the archive
+    try:
+        with store.connection() as conn:
+            moved = get_bill_archive().import_legacy_bills(conn)
+        if moved:
+            print(f"Moved {moved} old bills into {get_bill_archive().root}")
+    except (OSError, sqlite3.Error) as e:
+        print(f"Could not move old bills into the archive: {e}")
+
     window = LoginForm()
     window.show()
     
     exit_code = app.exec_()
 
-    database.close()
-    QSqlDatabase.removeDatabase("qt_sql_default_connection")
+    store.close()
 
     sys.exit(exit_code)
@@ -0,0 +1,294 @@
+"""Versioned schema migrations for sms.db.
+
+Each migration has a version number, a description and a list of
+statements. The versions already applied are recorded in SchemaMigrations,
+and migrate() applies the missing ones in order, each in its own
+transaction, so it is safe to run on every start-up against both fresh
+databases built from init.sql and older sms.db files.
+"""
+import sys
+from datetime import datetime
+
+from db import connect
+
+MIGRATIONS = [
+    (1, "Index sale dates and sale detail lookups used by the reports", [
+        "CREATE INDEX IF NOT EXISTS idx_Sales_SaleDate ON Sales (SaleDate)",
+        "CREATE INDEX IF NOT EXISTS idx_SaleDetails_SalesID ON SaleDetails (SalesID)",
+    ]),
+    (2, "Unique product names", [
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_Product_ProductName ON Product (ProductName)",
+    ]),
+    (3, "Index lookup and foreign key columns", [
+        "CREATE INDEX IF NOT EXISTS idx_Discount_DiscountValue ON Discount (DiscountValue)",
+        "CREATE INDEX IF NOT EXISTS idx_Category_CategoryName ON Category (CategoryName)",
+        "CREATE INDEX IF NOT EXISTS idx_Suppliers_SupplierName ON Suppliers (SupplierName)",
+        "CREATE INDEX IF NOT EXISTS idx_InventoryTransactions_ProductID ON InventoryTransactions (ProductID)",
+        "CREATE INDEX IF NOT EXISTS idx_SaleDetails_ProductID ON SaleDetails (ProductID)",
+    ]),
+    (4, "Product barcodes", [
+        """
+        CREATE TABLE IF NOT EXISTS ProductBarcode (
+            Barcode TEXT PRIMARY KEY NOT NULL,
+            ProductID INTEGER NOT NULL,
+            FOREIGN KEY (ProductID) REFERENCES Product(ProductID) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_ProductBarcode_ProductID ON ProductBarcode (ProductID)",
+        # The two codes the scanner dialog used to hardcode
+        """
+        INSERT OR IGNORE INTO ProductBarcode (Barcode, ProductID)
+        SELECT '9780241389324', ProductID FROM Product WHERE ProductName = 'iPhone 15 Pro'
+        """,
+        """
+        INSERT OR IGNORE INTO ProductBarcode (Barcode, ProductID)
+        SELECT '8905631871208', ProductID FROM Product WHERE ProductName = 'Samsung Galaxy S24 Ultra'
+        """,
+    ]),
+    (5, "Bill archive index", [
+        """
+        CREATE TABLE IF NOT EXISTS BillArchive (
+            SalesID INTEGER PRIMARY KEY NOT NULL,
+            InvoiceID INTEGER NOT NULL UNIQUE,
+            FilePath TEXT NOT NULL,
+            FOREIGN KEY (SalesID) REFERENCES Sales(SalesID) ON DELETE RESTRICT,
+            FOREIGN KEY (InvoiceID) REFERENCES Invoices(InvoiceID) ON DELETE RESTRICT
+        )
+        """,
+    ]),
+    (6, "Index invoice searches", [
+        "CREATE INDEX IF NOT EXISTS idx_Invoices_InvoiceDate ON Invoices (InvoiceDate)",
+        "CREATE INDEX IF NOT EXISTS idx_Invoices_SalesID ON Invoices (SalesID)",
+        "CREATE INDEX IF NOT EXISTS idx_Invoices_PaymentMethod ON Invoices (PaymentMethod, InvoiceDate)",
+        "CREATE INDEX IF NOT EXISTS idx_Invoices_TotalAmount ON Invoices (TotalAmount)",
+    ]),
+    (7, "Catalog change counters read by every till's catalog cache", [
+        """
+        CREATE TABLE IF NOT EXISTS CatalogVersion (
+            TableName TEXT PRIMARY KEY NOT NULL,
+            Version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT OR IGNORE INTO CatalogVersion (TableName)
+        VALUES ('Product'), ('Category'), ('Suppliers'), ('Discount'), ('ProductBarcode')
+        """,
+        "CREATE TRIGGER IF NOT EXISTS Product_Version_Insert AFTER INSERT ON Product "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Product'; END",
+        "CREATE TRIGGER IF NOT EXISTS Product_Version_Update AFTER UPDATE ON Product "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Product'; END",
+        "CREATE TRIGGER IF NOT EXISTS Product_Version_Delete AFTER DELETE ON Product "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Product'; END",
+        "CREATE TRIGGER IF NOT EXISTS Category_Version_Insert AFTER INSERT ON Category "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Category'; END",
+        "CREATE TRIGGER IF NOT EXISTS Category_Version_Update AFTER UPDATE ON Category "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Category'; END",
+        "CREATE TRIGGER IF NOT EXISTS Category_Version_Delete AFTER DELETE ON Category "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Category'; END",
+        "CREATE TRIGGER IF NOT EXISTS Suppliers_Version_Insert AFTER INSERT ON Suppliers "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Suppliers'; END",
+        "CREATE TRIGGER IF NOT EXISTS Suppliers_Version_Update AFTER UPDATE ON Suppliers "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Suppliers'; END",
+        "CREATE TRIGGER IF NOT EXISTS Suppliers_Version_Delete AFTER DELETE ON Suppliers "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Suppliers'; END",
+        "CREATE TRIGGER IF NOT EXISTS Discount_Version_Insert AFTER INSERT ON Discount "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Discount'; END",
+        "CREATE TRIGGER IF NOT EXISTS Discount_Version_Update AFTER UPDATE ON Discount "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Discount'; END",
+        "CREATE TRIGGER IF NOT EXISTS Discount_Version_Delete AFTER DELETE ON Discount "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Discount'; END",
+        "CREATE TRIGGER IF NOT EXISTS ProductBarcode_Version_Insert AFTER INSERT ON ProductBarcode "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'ProductBarcode'; END",
+        "CREATE TRIGGER IF NOT EXISTS ProductBarcode_Version_Update AFTER UPDATE ON ProductBarcode "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'ProductBarcode'; END",
+        "CREATE TRIGGER IF NOT EXISTS ProductBarcode_Version_Delete AFTER DELETE ON ProductBarcode "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'ProductBarcode'; END",
+    ]),
+    (8, "Stock changes no longer bump the Product catalog counter", [
+        # Every sale and restock updates StockLevel; the tills patch their own
+        # cached stock and checkout rechecks it, so only catalog columns count
+        "DROP TRIGGER IF EXISTS Product_Version_Update",
+        "CREATE TRIGGER Product_Version_Update "
+        "AFTER UPDATE OF ProductName, Price, CategoryID, SupplierID, DiscountID, RestockLevel ON Product "
+        "BEGIN UPDATE CatalogVersion SET Version = Version + 1 WHERE TableName = 'Product'; END",
+    ]),
+    (9, "Sales rollups read by the reports, kept current by triggers", [
+        """
+        CREATE TABLE IF NOT EXISTS SalesDaily (
+            SaleDay TEXT PRIMARY KEY,
+            TotalAmount REAL NOT NULL DEFAULT 0,
+            Transactions INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS SalesMonthly (
+            YearMonth TEXT PRIMARY KEY,
+            TotalAmount REAL NOT NULL DEFAULT 0,
+            Transactions INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ProductSalesDaily (
+            SaleDay TEXT NOT NULL,
+            ProductID INTEGER NOT NULL,
+            Quantity INTEGER NOT NULL DEFAULT 0,
+            Subtotal REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (SaleDay, ProductID)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ProductSalesMonthly (
+            YearMonth TEXT NOT NULL,
+            ProductID INTEGER NOT NULL,
+            Quantity INTEGER NOT NULL DEFAULT 0,
+            Subtotal REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (YearMonth, ProductID)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS Sales_Rollup
+        AFTER INSERT ON Sales
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO SalesDaily (SaleDay, TotalAmount, Transactions)
+            VALUES (substr(NEW.SaleDate, 1, 10), NEW.TotalAmount, 1)
+            ON CONFLICT (SaleDay) DO UPDATE SET
+                TotalAmount = TotalAmount + excluded.TotalAmount,
+                Transactions = Transactions + 1;
+
+            INSERT INTO SalesMonthly (YearMonth, TotalAmount, Transactions)
+            VALUES (substr(NEW.SaleDate, 1, 7), NEW.TotalAmount, 1)
+            ON CONFLICT (YearMonth) DO UPDATE SET
+                TotalAmount = TotalAmount + excluded.TotalAmount,
+                Transactions = Transactions + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS SaleDetails_Rollup
+        AFTER INSERT ON SaleDetails
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO ProductSalesDaily (SaleDay, ProductID, Quantity, Subtotal)
+            SELECT substr(SaleDate, 1, 10), NEW.ProductID, NEW.Quantity, NEW.Subtotal
+            FROM Sales WHERE SalesID = NEW.SalesID
+            ON CONFLICT (SaleDay, ProductID) DO UPDATE SET
+                Quantity = Quantity + excluded.Quantity,
+                Subtotal = Subtotal + excluded.Subtotal;
+
+            INSERT INTO ProductSalesMonthly (YearMonth, ProductID, Quantity, Subtotal)
+            SELECT substr(SaleDate, 1, 7), NEW.ProductID, NEW.Quantity, NEW.Subtotal
+            FROM Sales WHERE SalesID = NEW.SalesID
+            ON CONFLICT (YearMonth, ProductID) DO UPDATE SET
+                Quantity = Quantity + excluded.Quantity,
+                Subtotal = Subtotal + excluded.Subtotal;
+        END
+        """,
+        # Backfill from history in the same transaction, so no sale committed
+        # by another till falls between the triggers and the backfill
+        "DELETE FROM SalesDaily",
+        "DELETE FROM SalesMonthly",
+        "DELETE FROM ProductSalesDaily",
+        "DELETE FROM ProductSalesMonthly",
+        """
+        INSERT INTO SalesDaily (SaleDay, TotalAmount, Transactions)
+        SELECT substr(SaleDate, 1, 10), SUM(TotalAmount), COUNT(*)
+        FROM Sales GROUP BY 1
+        """,
+        """
+        INSERT INTO SalesMonthly (YearMonth, TotalAmount, Transactions)
+        SELECT substr(SaleDate, 1, 7), SUM(TotalAmount), COUNT(*)
+        FROM Sales GROUP BY 1
+        """,
+        """
+        INSERT INTO ProductSalesDaily (SaleDay, ProductID, Quantity, Subtotal)
+        SELECT substr(s.SaleDate, 1, 10), d.ProductID, SUM(d.Quantity), SUM(d.Subtotal)
+        FROM SaleDetails d JOIN Sales s ON s.SalesID = d.SalesID
+        GROUP BY 1, 2
+        """,
+        """
+        INSERT INTO ProductSalesMonthly (YearMonth, ProductID, Quantity, Subtotal)
+        SELECT substr(SaleDay, 1, 7), ProductID, SUM(Quantity), SUM(Subtotal)
+        FROM ProductSalesDaily GROUP BY 1, 2
+        """,
+    ]),
+]
+
+
+class MigrationError(Exception):
+    pass
+
+
+def _check_unique_product_names(cursor):
+    duplicates = cursor.execute("""
+        SELECT ProductName, COUNT(*) FROM Product
+        GROUP BY ProductName HAVING COUNT(*) > 1
+    """).fetchall()
+    if duplicates:
+        names = ", ".join(f"'{name}' ({count})" for name, count in duplicates)
+        raise MigrationError(f"Rename the duplicate products before upgrading: {names}")
+
+
+# Checks that must pass before a migration runs, keyed by version
+PRECHECKS = {
+    2: _check_unique_product_names,
+}
+
+
+def schema_version(conn):
+    """Highest migration version applied to the database, 0 if none."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS SchemaMigrations (
+            Version INTEGER PRIMARY KEY,
+            Description TEXT NOT NULL,
+            AppliedAt TEXT NOT NULL
+        )
+    """)
+    return conn.execute("SELECT COALESCE(MAX(Version), 0) FROM SchemaMigrations").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply every pending migration in version order and return the versions applied.
+
+    conn must be in autocommit mode (isolation_level=None), as returned by
+    db.connect(). Raises MigrationError if a migration cannot be applied;
+    earlier migrations stay applied.
+    """
+    current = schema_version(conn)
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            if version in PRECHECKS:
+                PRECHECKS[version](cursor)
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute("INSERT INTO SchemaMigrations (Version, Description, AppliedAt) VALUES (?, ?, ?)",
+                           (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            cursor.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if isinstance(e, MigrationError):
+                raise
+            raise MigrationError(f"Migration {version} ({description}) failed: {e}") from e
+        finally:
+            cursor.close()
+        applied.append(version)
+    return applied
+
+
+if __name__ == '__main__':
+    # python migrations.py [path/to/sms.db]
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "sms.db"
+    conn = connect(db_path)
+    try:
+        applied = migrate(conn)
+    except MigrationError as e:
+        print(f"Migration error: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+    print(f"Applied migrations {applied} to {db_path}" if applied else f"{db_path} is up to date")
@@ -1,19 +1,25 @@
 from PyQt5.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QWidget, QHeaderView, \
-    QLabel, QPushButton, QLineEdit, QTableWidget, QMessageBox, QTableWidgetItem, QScrollArea, QDialog, QFormLayout, QComboBox
+    QLabel, QPushButton, QLineEdit, QTableView, QMessageBox, QScrollArea, QDialog, QFormLayout, QComboBox
 from PyQt5.QtSql import QSqlDatabase, QSqlQuery, QSqlError
 from PyQt5.QtCore import Qt
+import sqlite3
 import sys
+from catalog import get_catalog, PRODUCT, BARCODE
+from store import get_store
+from table_models import CatalogTableModel, ProductFilterProxy, DebouncedFilter
 
 class AddProductDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Add New Product")
-        self.setFixedSize(400, 300)
+        self.setFixedSize(400, 330)
 
         self.product_name = QLineEdit()
         self.price = QLineEdit()
         self.stock_level = QLineEdit()
         self.restock_level = QLineEdit()
+        self.barcodes = QLineEdit()
+        self.barcodes.setPlaceholderText("Optional, comma separated")
         self.category_combo = QComboBox()
         self.supplier_combo = QComboBox()
         self.discount_combo = QComboBox()
@@ -37,6 +43,7 @@ class AddProductDialog(QDialog):
         layout.addRow("Restock Level:", self.restock_level)
         layout.addRow("Supplier:", self.supplier_combo)
         layout.addRow("Discount:", self.discount_combo)
+        layout.addRow("Barcodes:", self.barcodes)
 
         self.button_box = QHBoxLayout()
         self.ok_btn = QPushButton("OK")
@@ -55,29 +62,20 @@ class AddProductDialog(QDialog):
     def load_categories(self):
         self.category_combo.clear()
         self.category_combo.addItem("None", None)
-        query = QSqlQuery("SELECT CategoryID, CategoryName FROM Category")
-        while query.next():
-            category_id = query.value(0)
-            category_name = query.value(1)
-            self.category_combo.addItem(category_name, category_id)
+        for category in get_catalog().categories():
+            self.category_combo.addItem(category.name, category.category_id)
 
     def load_suppliers(self):
         self.supplier_combo.clear()
         self.supplier_combo.addItem("None", None)
-        query = QSqlQuery("SELECT SupplierID, SupplierName FROM Suppliers")
-        while query.next():
-            supplier_id = query.value(0)
-            supplier_name = query.value(1)
-            self.supplier_combo.addItem(supplier_name, supplier_id)
+        for supplier in get_catalog().suppliers():
+            self.supplier_combo.addItem(supplier.name, supplier.supplier_id)
 
     def load_discounts(self):
         self.discount_combo.clear()
         self.discount_combo.addItem("None", None)
-        query = QSqlQuery("SELECT DiscountID, DiscountValue FROM Discount")
-        while query.next():
-            discount_id = query.value(0)
-            discount_value = query.value(1)
-            self.discount_combo.addItem(str(discount_value), discount_id)
+        for discount in get_catalog().discounts():
+            self.discount_combo.addItem(str(discount.value), discount.discount_id)
 
     def get_category_id(self):
         return self.category_combo.currentData()
@@ -118,11 +116,8 @@ class DeleteProductDialog(QDialog):
 
     def load_products(self):
         self.product_combo.clear()
-        query = QSqlQuery("SELECT ProductID, ProductName FROM Product")
-        while query.next():
-            product_id = query.value(0)
-            product_name = query.value(1)
-            self.product_combo.addItem(product_name, product_id)
+        for product in get_catalog().products():
+            self.product_combo.addItem(product.name, product.product_id)
 
     def get_selected_product_id(self):
         return self.product_combo.currentData()
@@ -140,6 +135,8 @@ class UpdateProductDialog(QDialog):
         self.product_name = QLineEdit()
         self.price = QLineEdit()
         self.restock_level = QLineEdit()
+        self.barcodes = QLineEdit()
+        self.barcodes.setPlaceholderText("Comma separated")
         self.supplier_combo = QComboBox()
         self.category_combo = QComboBox()
         self.discount_combo = QComboBox()
@@ -166,6 +163,7 @@ class UpdateProductDialog(QDialog):
         layout.addRow("Supplier:", self.supplier_combo)
         layout.addRow("Category:", self.category_combo)
         layout.addRow("Discount:", self.discount_combo)
+        layout.addRow("Barcodes:", self.barcodes)
 
         self.button_box = QHBoxLayout()
         self.ok_btn = QPushButton("Update")
@@ -183,62 +181,44 @@ class UpdateProductDialog(QDialog):
 
     def load_products(self):
         self.product_combo.clear()
-        query = QSqlQuery("SELECT ProductID, ProductName FROM Product")
-        while query.next():
-            product_id = query.value(0)
-            product_name = query.value(1)
-            self.product_combo.addItem(product_name, product_id)
+        for product in get_catalog().products():
+            self.product_combo.addItem(product.name, product.product_id)
 
     def load_suppliers(self):
         self.supplier_combo.clear()
         self.supplier_combo.addItem("None", None)
-        query = QSqlQuery("SELECT SupplierID, SupplierName FROM Suppliers")
-        while query.next():
-            supplier_id = query.value(0)
-            supplier_name = query.value(1)
-            self.supplier_combo.addItem(supplier_name, supplier_id)
+        for supplier in get_catalog().suppliers():
+            self.supplier_combo.addItem(supplier.name, supplier.supplier_id)
 
     def load_categories(self):
         self.category_combo.clear()
         self.category_combo.addItem("None", None)
-        query = QSqlQuery("SELECT CategoryID, CategoryName FROM Category")
-        while query.next():
-            category_id = query.value(0)
-            category_name = query.value(1)
-            self.category_combo.addItem(category_name, category_id)
+        for category in get_catalog().categories():
+            self.category_combo.addItem(category.name, category.category_id)
 
     def load_discounts(self):
         self.discount_combo.clear()
         self.discount_combo.addItem("None", None)
-        query = QSqlQuery("SELECT DiscountID, DiscountValue FROM Discount")
-        while query.next():
-            discount_id = query.value(0)
-            discount_value = query.value(1)
-            self.discount_combo.addItem(str(discount_value), discount_id)
+        for discount in get_catalog().discounts():
+            self.discount_combo.addItem(str(discount.value), discount.discount_id)
 
     def populate_fields(self):
         product_id = self.product_combo.currentData()
-        if product_id:
-            query = QSqlQuery()
-            query.prepare("""
-                SELECT ProductName, Price, SupplierID, CategoryID, RestockLevel, DiscountID 
-                FROM Product 
-                WHERE ProductID = ?
-            """)
-            query.addBindValue(product_id)
-            if query.exec_() and query.next():
-                self.product_name.setText(query.value(0) or "")
-                self.price.setText(str(query.value(1) or "0.0"))
-                self.restock_level.setText(str(query.value(4) or "0"))
-                self.supplier_combo.setCurrentIndex(
-                    self.supplier_combo.findData(query.value(2)) if query.value(2) else 0
-                )
-                self.category_combo.setCurrentIndex(
-                    self.category_combo.findData(query.value(3)) if query.value(3) else 0
-                )
-                self.discount_combo.setCurrentIndex(
-                    self.discount_combo.findData(query.value(5)) if query.value(5) else 0
-                )
+        product = get_catalog().product(product_id) if product_id else None
+        if product is not None:
+            self.product_name.setText(product.name or "")
+            self.price.setText(str(product.price or "0.0"))
+            self.restock_level.setText(str(product.restock_level or "0"))
+            self.supplier_combo.setCurrentIndex(
+                self.supplier_combo.findData(product.supplier_id) if product.supplier_id else 0
+            )
+            self.category_combo.setCurrentIndex(
+                self.category_combo.findData(product.category_id) if product.category_id else 0
+            )
+            self.discount_combo.setCurrentIndex(
+                self.discount_combo.findData(product.discount_id) if product.discount_id else 0
+            )
+            self.barcodes.setText(", ".join(get_catalog().barcodes_for(product.product_id)))
 
     def get_product_id(self):
         return self.product_combo.currentData()
@@ -271,7 +251,6 @@ class ProductPage(QWidget):
 
         self.search_field = QLineEdit()
         self.search_field.setPlaceholderText("Enter product name...")
-        self.search_field.textChanged.connect(self.filter_table)
         
         self.add_btn = QPushButton("Add Product")
         self.add_btn.setFixedSize(150, 30)
@@ -286,13 +265,19 @@ class ProductPage(QWidget):
         self.del_btn.clicked.connect(self.show_delete_product_dialog)
         self.update_btn.clicked.connect(self.show_update_product_dialog)
         
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels(["ProductID", "Product Name", "Category", "Price",
-                                              "Stock Level", "Restock Level", "Supplier", "Discount"])
-
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.model = CatalogTableModel([("ProductID", "product_id"), ("Product Name", "name"),
+                                         ("Category", "category_id"), ("Price", "price"),
+                                         ("Stock Level", "stock_level"), ("Restock Level", "restock_level"),
+                                         ("Supplier", "supplier_id"), ("Discount", "discount_id")], parent=self)
+        self.proxy = ProductFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.search_filter = DebouncedFilter(self.search_field, self.proxy, parent=self)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
 
@@ -332,40 +317,10 @@ class ProductPage(QWidget):
         self.setLayout(self.master_layout)
         self.load_table()
 
-    def load_table(self, filter_text=""):
-        self.table.setRowCount(0)
-        query = QSqlQuery()
-        if filter_text:
-            query.prepare("""
-                SELECT ProductID, ProductName, CategoryID, Price, StockLevel, RestockLevel, SupplierID, DiscountID 
-                FROM Product 
-                WHERE ProductName LIKE ?
-            """)
-            query.addBindValue(f"%{filter_text}%")
-        else:
-            query.prepare("""
-                SELECT ProductID, ProductName, CategoryID, Price, StockLevel, RestockLevel, SupplierID, DiscountID 
-                FROM Product
-            """)
-        
-        if not query.exec_():
-            print(f"Load table error: {query.lastError().text()}")
-            return
-            
-        while query.next():
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(str(query.value(0) or "")))  # ProductID
-            self.table.setItem(row, 1, QTableWidgetItem(str(query.value(1) or "")))  # ProductName
-            self.table.setItem(row, 2, QTableWidgetItem(str(query.value(2) or "")))  # CategoryID
-            self.table.setItem(row, 3, QTableWidgetItem(str(query.value(3) or "")))  # Price
-            self.table.setItem(row, 4, QTableWidgetItem(str(query.value(4) or "")))  # StockLevel
-            self.table.setItem(row, 5, QTableWidgetItem(str(query.value(5) or "")))  # RestockLevel
-            self.table.setItem(row, 6, QTableWidgetItem(str(query.value(6) or "")))  # SupplierID
-            self.table.setItem(row, 7, QTableWidgetItem(str(query.value(7) or "")))  # DiscountID
-
-    def filter_table(self, text):
-        self.load_table(text)
+    def load_table(self):
+        self.model.set_rows(get_catalog().products())
+        # Re-match the current search against the reloaded products
+        self.proxy.refresh_matches()
 
     def show_add_product_dialog(self):
         dialog = AddProductDialog(self)
@@ -377,7 +332,8 @@ class ProductPage(QWidget):
                 dialog.stock_level.text(),
                 dialog.restock_level.text(),
                 dialog.get_supplier_id(),
-                dialog.get_discount_id()
+                dialog.get_discount_id(),
+                dialog.barcodes.text()
             )
 
     def show_delete_product_dialog(self):
@@ -395,20 +351,22 @@ class ProductPage(QWidget):
                 dialog.get_restock_level(),
                 dialog.get_supplier_id(),
                 dialog.get_category_id(),
-                dialog.get_discount_id()
+                dialog.get_discount_id(),
+                dialog.barcodes.text()
             )
 
-    def add_product(self, name, category_id, price, stock, restock, supplier_id, discount_id):
-        check_query = QSqlQuery()
-        check_query.prepare("SELECT COUNT(*) FROM Product WHERE ProductName = ?")
-        check_query.addBindValue(name)
-        if check_query.exec_() and check_query.next():
-            if check_query.value(0) > 0:
-                QMessageBox.warning(self, "Error", "A product with this name already exists!")
-                return
+    def add_product(self, name, category_id, price, stock, restock, supplier_id, discount_id, barcodes=None):
+        store = get_store()
+        try:
+            with store.connection() as conn:
+                duplicates = conn.execute("SELECT COUNT(*) FROM Product WHERE ProductName = ?", (name,)).fetchone()[0]
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Error adding product: {e}")
+            return
+        if duplicates > 0:
+            QMessageBox.warning(self, "Error", "A product with this name already exists!")
+            return
 
-        query = QSqlQuery()
-        
         name = name.strip() if name.strip() else None
         if not name:
             QMessageBox.warning(self, "Error", "Product name cannot be empty!")
@@ -428,49 +386,73 @@ class ProductPage(QWidget):
             return
 
         if discount_id is None:
-            check_discount = QSqlQuery("SELECT DiscountID FROM Discount LIMIT 1")
-            if check_discount.exec_() and check_discount.next():
-                discount_id = check_discount.value(0)
-            else:
+            discount_id = self.default_discount_id()
+            if discount_id is None:
                 QMessageBox.critical(self, "Error", "No discounts available. Please add a discount first.")
                 return
 
-        values = [name, category_id, price, stock, restock, supplier_id, discount_id]
-        print("Attempting to insert values:", values)
-        
-        query.prepare("""
-            INSERT INTO Product (ProductName, CategoryID, Price, StockLevel, RestockLevel, SupplierID, DiscountID)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """)
-        
-        query.addBindValue(name)
-        query.addBindValue(category_id if category_id else None)
-        query.addBindValue(price)
-        query.addBindValue(stock)
-        query.addBindValue(restock)
-        query.addBindValue(supplier_id if supplier_id else None)
-        query.addBindValue(discount_id)
-        
-        if not query.exec_():
-            error = query.lastError().text()
-            print(f"Query error: {error}")
-            print(f"Bound values: {query.boundValues()}")
-            QMessageBox.critical(self, "Error", f"Error adding product: {error}")
-        else:
-            self.load_table()
-            QMessageBox.information(self, "Success", "Product added successfully")
+        try:
+            with store.connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                product_id = conn.execute("""
+                    INSERT INTO Product (ProductName, CategoryID, Price, StockLevel, RestockLevel, SupplierID, DiscountID)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (name, category_id if category_id else None, price, stock, restock,
+                      supplier_id if supplier_id else None, discount_id)).lastrowid
+                if barcodes is not None:
+                    self.set_barcodes(conn, product_id, barcodes)
+                conn.execute("COMMIT")
+        except sqlite3.IntegrityError as e:
+            QMessageBox.critical(self, "Error", f"Error adding product (is a barcode already in use?): {e}")
+            return
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Error adding product: {e}")
+            return
+
+        get_catalog().invalidate(PRODUCT, BARCODE)
+        self.load_table()
+        QMessageBox.information(self, "Success", "Product added successfully")
+
+    def set_barcodes(self, conn, product_id, barcodes):
+        """Replace product_id's barcodes with the comma separated codes, inside the caller's transaction."""
+        codes = {code.strip() for code in barcodes.split(",") if code.strip()}
+        conn.execute("DELETE FROM ProductBarcode WHERE ProductID = ?", (product_id,))
+        conn.executemany("INSERT INTO ProductBarcode (Barcode, ProductID) VALUES (?, ?)",
+                         [(code, product_id) for code in sorted(codes)])
+
+    def default_discount_id(self):
+        """DiscountID used when none is picked, or None if there are no discounts."""
+        discounts = get_catalog().discounts()
+        return discounts[0].discount_id if discounts else None
+
+    def product_name(self, product_id):
+        """Current ProductName of product_id, or None if it no longer exists."""
+        try:
+            with get_store().connection() as conn:
+                row = conn.execute("SELECT ProductName FROM Product WHERE ProductID = ?", (product_id,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def remove_product(self, product_id):
+        """DELETE the product; returns True, or False after showing the error."""
+        try:
+            with get_store().connection() as conn:
+                conn.execute("DELETE FROM Product WHERE ProductID = ?", (product_id,))
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Error deleting product: {e}")
+            return False
+        # ProductBarcode rows go with the product (ON DELETE CASCADE)
+        get_catalog().invalidate(PRODUCT, BARCODE)
+        return True
 
     def delete_product(self, product_id):
         if not product_id:
             QMessageBox.warning(self, "Error", "No product selected")
             return
 
-        query = QSqlQuery()
-        query.prepare("SELECT ProductName FROM Product WHERE ProductID = ?")
-        query.addBindValue(product_id)
-        if query.exec_() and query.next():
-            product_name = query.value(0)
-        else:
+        product_name = self.product_name(product_id)
+        if product_name is None:
             QMessageBox.warning(self, "Error", "Product not found")
             return
 
@@ -478,31 +460,29 @@ class ProductPage(QWidget):
                                        QMessageBox.Yes | QMessageBox.No)
         if confirm == QMessageBox.No:
             return
-            
-        query = QSqlQuery()
-        query.prepare("DELETE FROM Product WHERE ProductID = ?")
-        query.addBindValue(product_id)
-        
-        if not query.exec_():
-            QMessageBox.critical(self, "Error", f"Error deleting product: {query.lastError().text()}")
-        else:
+
+        if self.remove_product(product_id):
             self.load_table()
             QMessageBox.information(self, "Success", "Product deleted successfully")
 
-    def update_product(self, product_id, name, price, restock_level, supplier_id, category_id, discount_id):
+    def update_product(self, product_id, name, price, restock_level, supplier_id, category_id, discount_id,
+                       barcodes=None):
         if not product_id:
             QMessageBox.warning(self, "Error", "No product selected")
             return
 
+        store = get_store()
         if name != product_id:
-            check_query = QSqlQuery()
-            check_query.prepare("SELECT COUNT(*) FROM Product WHERE ProductName = ? AND ProductID != ?")
-            check_query.addBindValue(name)
-            check_query.addBindValue(product_id)
-            if check_query.exec_() and check_query.next():
-                if check_query.value(0) > 0:
-                    QMessageBox.warning(self, "Error", "Another product with this name already exists!")
-                    return
+            try:
+                with store.connection() as conn:
+                    duplicates = conn.execute("SELECT COUNT(*) FROM Product WHERE ProductName = ? AND ProductID != ?",
+                                              (name, product_id)).fetchone()[0]
+            except sqlite3.Error as e:
+                QMessageBox.critical(self, "Error", f"Error updating product: {e}")
+                return
+            if duplicates > 0:
+                QMessageBox.warning(self, "Error", "Another product with this name already exists!")
+                return
 
         try:
             price = float(price.strip()) if price.strip() else 0.0
@@ -512,51 +492,48 @@ class ProductPage(QWidget):
             return
 
         if discount_id is None:
-            check_discount = QSqlQuery("SELECT DiscountID FROM Discount LIMIT 1")
-            if check_discount.exec_() and check_discount.next():
-                discount_id = check_discount.value(0)
-            else:
+            discount_id = self.default_discount_id()
+            if discount_id is None:
                 QMessageBox.critical(self, "Error", "No discounts available. Please add a discount first.")
                 return
 
-        query = QSqlQuery()
-        query.prepare("""
-            UPDATE Product 
-            SET ProductName = ?, Price = ?, RestockLevel = ?, SupplierID = ?, CategoryID = ?, DiscountID = ?
-            WHERE ProductID = ?
-        """)
-        
         name = name.strip() if name.strip() else None
         if not name:
             QMessageBox.warning(self, "Error", "Product name cannot be empty!")
             return
-        query.addBindValue(name)
-        query.addBindValue(price)
-        query.addBindValue(restock_level)
-        query.addBindValue(supplier_id if supplier_id else None)
-        query.addBindValue(category_id if category_id else None)
-        query.addBindValue(discount_id)
-        query.addBindValue(product_id)
-
-        if not query.exec_():
-            QMessageBox.critical(self, "Error", f"Error updating product: {query.lastError().text()}")
-        else:
-            self.load_table()
-            QMessageBox.information(self, "Success", "Product updated successfully")
+
+        try:
+            with store.connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("""
+                    UPDATE Product 
+                    SET ProductName = ?, Price = ?, RestockLevel = ?, SupplierID = ?, CategoryID = ?, DiscountID = ?
+                    WHERE ProductID = ?
+                """, (name, price, restock_level, supplier_id if supplier_id else None,
+                      category_id if category_id else None, discount_id, product_id))
+                if barcodes is not None:
+                    self.set_barcodes(conn, product_id, barcodes)
+                conn.execute("COMMIT")
+        except sqlite3.IntegrityError as e:
+            QMessageBox.critical(self, "Error", f"Error updating product (is a barcode already in use?): {e}")
+            return
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Error updating product: {e}")
+            return
+
+        get_catalog().invalidate(PRODUCT, BARCODE)
+        self.load_table()
+        QMessageBox.information(self, "Success", "Product updated successfully")
 
     def delete_discount(self):
-        selected_row = self.table.currentRow()
-        if selected_row == -1:
+        index = self.table.currentIndex()
+        if not index.isValid():
             QMessageBox.warning(self, "No row selected", "Please select a row to delete")
             return
-        product_id = self.table.item(selected_row, 0).text()
-
-        query = QSqlQuery()
-        query.prepare("SELECT ProductName FROM Product WHERE ProductID = ?")
-        query.addBindValue(product_id)
-        if query.exec_() and query.next():
-            product_name = query.value(0)
-        else:
+        product_id = self.model.row_at(self.proxy.mapToSource(index).row()).product_id
+
+        product_name = self.product_name(product_id)
+        if product_name is None:
             QMessageBox.warning(self, "Error", "Product not found")
             return
 
@@ -565,23 +542,20 @@ class ProductPage(QWidget):
 
         if confirm == QMessageBox.No:
             return
-            
-        query = QSqlQuery()
-        query.prepare("DELETE FROM Product WHERE ProductID = ?")
-        query.addBindValue(product_id)
-        if not query.exec_():
-            QMessageBox.critical(self, "Error", f"Error deleting product: {query.lastError().text()}")
-        else:
+
+        if self.remove_product(product_id):
             self.load_table()
 
 def check_table_schema():
-    query = QSqlQuery()
-    if query.exec_("PRAGMA table_info(Product);"):
-        print("Product table schema:")
-        while query.next():
-            print(f"Column: {query.value(1)}, Type: {query.value(2)}, NotNull: {query.value(3)}, Default: {query.value(4)}, PK: {query.value(5)}")
-    else:
-        print(f"Schema check error: {query.lastError().text()}")
+    try:
+        with get_store().connection() as conn:
+            columns = conn.execute("PRAGMA table_info(Product);").fetchall()
+    except sqlite3.Error as e:
+        print(f"Schema check error: {e}")
+        return
+    print("Product table schema:")
+    for column in columns:
+        print(f"Column: {column[1]}, Type: {column[2]}, NotNull: {column[3]}, Default: {column[4]}, PK: {column[5]}")
 
 # def create_product_table():
 #     query = QSqlQuery()
@@ -605,8 +579,6 @@ def check_table_schema():
 #     else:
 #         print("Product table created or already exists.")
 
-database = QSqlDatabase.addDatabase("QSQLITE")
-database.setDatabaseName("sms.db")
 
 # if not database.open():
 #     QMessageBox.critical(None, "Error", "Could not open database")
@@ -0,0 +1,339 @@
+"""Receipt rendering: PDF bills, thermal-printer text and ESC/POS bytes.
+
+Every receipt shares its shop header, column headings and footer, so those
+are built once into a template and each receipt only renders its own date,
+lines and subtotal:
+
+    PdfReceiptTemplate      writes a letter-size PDF straight to a file,
+                            page by page, from pre-serialized fonts, header
+                            and footer
+    ThermalReceiptTemplate  plain text or ESC/POS bytes for a receipt printer
+    ReceiptWriter           renders and saves receipts on a background
+                            thread so checkout doesn't wait for the disk
+
+The PDF uses the standard Helvetica fonts and needs no PDF library.
+"""
+import atexit
+import io
+import os
+import queue
+import tempfile
+import threading
+
+from cart import format_rupees
+
+SHOP_NAME = "Company Inc."
+SHOP_ADDRESS = "1234 Fake Street, Imaginary City, IC 56789"
+FOOTER_MESSAGE = "Visit us again!"
+RECEIPT_PRINTER_ENV = "SMS_RECEIPT_PRINTER"  # "escpos:/dev/usb/lp0", "text:/path/receipts.txt", or unset
+
+PAGE_WIDTH = 612  # US letter in points
+PAGE_HEIGHT = 792
+MARGIN = 50
+LINE_HEIGHT = 20
+THERMAL_COLUMNS = 42  # Font A on 80mm paper
+
+
+class Receipt:
+    """What a bill shows, copied out of the cart so it can be rendered after the cart is cleared."""
+    __slots__ = ("date", "time", "lines", "total_paise", "sales_id", "invoice_id")
+
+    def __init__(self, date, time, lines, total_paise, sales_id=None, invoice_id=None):
+        self.date = date
+        self.time = time
+        self.lines = lines  # [(name, gross_paise)]
+        self.total_paise = total_paise
+        self.sales_id = sales_id
+        self.invoice_id = invoice_id
+
+    @classmethod
+    def from_cart(cls, cart, date, time, sales_id=None, invoice_id=None):
+        return cls(date, time, [(line.name, line.gross_paise) for line in cart], cart.total_paise,
+                   sales_id, invoice_id)
+
+
+def _pdf_string(text):
+    # The standard fonts are WinAnsi encoded; anything else prints as '?'
+    data = text.encode("cp1252", errors="replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _pdf_text(font, size, x, y, text):
+    return b"BT /%s %d Tf %d %d Td %s Tj ET\n" % (font, size, x, y, _pdf_string(text))
+
+
+REGULAR, BOLD, OBLIQUE = b"F1", b"F2", b"F3"
+FONTS = ((REGULAR, b"Helvetica"), (BOLD, b"Helvetica-Bold"), (OBLIQUE, b"Helvetica-Oblique"))
+CATALOG_ID, PAGES_ID, RESOURCES_ID = 1, 2, 3
+FIRST_FONT_ID = 4
+FIRST_PAGE_ID = FIRST_FONT_ID + len(FONTS)
+
+
+class PdfReceiptTemplate:
+    """Writes receipts as PDFs laid out like the original reportlab bill.
+
+    The file header, catalog, fonts and resources are the same bytes in
+    every receipt and are serialized once, along with the content-stream
+    operators of the shop header, column headings and footer. render()
+    appends each page's objects to the output as soon as the page is full,
+    so long receipts are never held in memory.
+    """
+
+    def __init__(self, shop_name=SHOP_NAME, address=SHOP_ADDRESS, footer=FOOTER_MESSAGE):
+        objects = [
+            (CATALOG_ID, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES_ID),
+            (RESOURCES_ID, b"<< /Font << " + b" ".join(
+                b"/%s %d 0 R" % (name, FIRST_FONT_ID + n) for n, (name, _) in enumerate(FONTS)) + b" >> >>"),
+        ] + [
+            (FIRST_FONT_ID + n, b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % base)
+            for n, (_, base) in enumerate(FONTS)
+        ]
+        prefix = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.prefix_offsets = {}
+        for object_id, body in objects:
+            self.prefix_offsets[object_id] = len(prefix)
+            prefix += b"%d 0 obj\n%s\nendobj\n" % (object_id, body)
+        self.prefix = bytes(prefix)
+
+        y = PAGE_HEIGHT - MARGIN
+        self.header = (_pdf_text(BOLD, 16, 50, y, shop_name)
+                       + _pdf_text(REGULAR, 12, 50, y - 20, address))
+        self.date_y = y - 40
+        self.time_y = y - 60
+        y -= 100
+        self.column_headings = (_pdf_text(BOLD, 12, 50, y, "Item No.")
+                                + _pdf_text(BOLD, 12, 150, y, "Name")
+                                + _pdf_text(BOLD, 12, 350, y, "Price")
+                                + b"50 %d m 550 %d l S\n" % (y - 10, y - 10))
+        self.first_item_y = y - 30
+        # Drawn at y = 0 and moved into place with a translation
+        self.footer = _pdf_text(OBLIQUE, 12, 50, -40, footer)
+        self.footer_height = 40
+        self.page_dict = (b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources %d 0 R /Contents "
+                          % (PAGES_ID, PAGE_WIDTH, PAGE_HEIGHT, RESOURCES_ID))
+
+    def pages(self, receipt):
+        """Content stream of each page, generated one page at a time."""
+        content = [self.header,
+                   _pdf_text(REGULAR, 12, 50, self.date_y, f"Date: {receipt.date}"),
+                   _pdf_text(REGULAR, 12, 50, self.time_y, f"Time: {receipt.time}"),
+                   self.column_headings]
+        y = self.first_item_y
+        for row, (name, gross_paise) in enumerate(receipt.lines):
+            content.append(_pdf_text(REGULAR, 12, 50, y, str(row + 1))
+                           + _pdf_text(REGULAR, 12, 150, y, name)
+                           + _pdf_text(REGULAR, 12, 350, y, f"${format_rupees(gross_paise)}"))
+            y -= LINE_HEIGHT
+            if y < MARGIN:
+                yield b"".join(content)
+                content = []
+                y = PAGE_HEIGHT - MARGIN
+
+        y -= LINE_HEIGHT
+        if y - self.footer_height < MARGIN:
+            yield b"".join(content)
+            content = []
+            y = PAGE_HEIGHT - MARGIN
+        content.append(_pdf_text(BOLD, 12, 50, y, f"Subtotal: ${format_rupees(receipt.total_paise)}"))
+        content.append(b"q 1 0 0 1 0 %d cm\n%sQ\n" % (y, self.footer))
+        yield b"".join(content)
+
+    def render(self, receipt, out):
+        """Write receipt as a PDF to the binary file out; returns the number of bytes written."""
+        out.write(self.prefix)
+        offsets = dict(self.prefix_offsets)
+        position = len(self.prefix)
+        page_ids = []
+        object_id = FIRST_PAGE_ID
+        for stream in self.pages(receipt):
+            contents_id, page_id = object_id, object_id + 1
+            object_id += 2
+            chunk = (b"%d 0 obj\n<< /Length %d >>\nstream\n%s\nendstream\nendobj\n"
+                     % (contents_id, len(stream), stream))
+            offsets[contents_id] = position
+            position += len(chunk)
+            page = b"%d 0 obj\n%s%d 0 R >>\nendobj\n" % (page_id, self.page_dict, contents_id)
+            offsets[page_id] = position
+            position += len(page)
+            out.write(chunk + page)
+            page_ids.append(page_id)
+
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+        pages = b"%d 0 obj\n<< /Type /Pages /Kids [%s] /Count %d >>\nendobj\n" % (PAGES_ID, kids, len(page_ids))
+        offsets[PAGES_ID] = position
+        position += len(pages)
+
+        xref = [b"xref\n0 %d\n" % object_id, b"0000000000 65535 f \n"]
+        xref.extend(b"%010d 00000 n \n" % offsets[n] for n in range(1, object_id))
+        xref.append(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (object_id, CATALOG_ID, position))
+        xref = b"".join(xref)
+        out.write(pages + xref)
+        return position + len(xref)
+
+    def render_bytes(self, receipt):
+        out = io.BytesIO()
+        self.render(receipt, out)
+        return out.getvalue()
+
+
+ESC_INIT = b"\x1b@"
+ESC_ALIGN_LEFT = b"\x1ba\x00"
+ESC_ALIGN_CENTER = b"\x1ba\x01"
+ESC_BOLD_ON = b"\x1bE\x01"
+ESC_BOLD_OFF = b"\x1bE\x00"
+ESC_DOUBLE_SIZE = b"\x1d!\x11"
+ESC_NORMAL_SIZE = b"\x1d!\x00"
+ESC_FEED_AND_CUT = b"\x1bd\x04\x1dVB\x00"
+
+
+class ThermalReceiptTemplate:
+    """Receipts for a roll printer, as plain text or as ESC/POS bytes."""
+
+    def __init__(self, columns=THERMAL_COLUMNS, shop_name=SHOP_NAME, address=SHOP_ADDRESS,
+                 footer=FOOTER_MESSAGE):
+        self.columns = columns
+        self.rule = "-" * columns
+        self.text_header = f"{shop_name:^{columns}}\n{address[:columns]:^{columns}}\n"
+        self.text_footer = f"{footer:^{columns}}\n"
+        self.escpos_header = (ESC_INIT + ESC_ALIGN_CENTER + ESC_BOLD_ON + ESC_DOUBLE_SIZE
+                              + self.encode(shop_name + "\n") + ESC_NORMAL_SIZE + ESC_BOLD_OFF
+                              + self.encode(address[:columns] + "\n") + ESC_ALIGN_LEFT)
+        self.escpos_footer = ESC_ALIGN_CENTER + self.encode(footer + "\n") + ESC_FEED_AND_CUT
+
+    @staticmethod
+    def encode(text):
+        # Code page 437 is the power-on default of ESC/POS printers
+        return text.encode("cp437", errors="replace")
+
+    def body(self, receipt):
+        """The lines between header and footer."""
+        amount_width = 12
+        name_width = self.columns - amount_width - 1
+        rows = [self.rule, f"Date: {receipt.date}  Time: {receipt.time}"]
+        if receipt.invoice_id is not None:
+            rows.append(f"Invoice: {receipt.invoice_id}")
+        rows.append(self.rule)
+        for name, gross_paise in receipt.lines:
+            rows.append(f"{name[:name_width]:<{name_width}} {format_rupees(gross_paise):>{amount_width}}")
+        rows.append(self.rule)
+        rows.append(f"{'Subtotal':<{name_width}} {format_rupees(receipt.total_paise):>{amount_width}}")
+        rows.append(self.rule)
+        return "\n".join(rows) + "\n"
+
+    def render_text(self, receipt):
+        return self.text_header + self.body(receipt) + self.text_footer
+
+    def render_escpos(self, receipt):
+        return self.escpos_header + self.encode(self.body(receipt)) + self.escpos_footer
+
+
+class ReceiptPrinter:
+    """Appends each receipt to a printer device or file, as ESC/POS bytes or plain text."""
+
+    def __init__(self, path, escpos=True, template=None):
+        self.path = path
+        self.escpos = escpos
+        self.template = template or ThermalReceiptTemplate()
+
+    def print_receipt(self, receipt):
+        if self.escpos:
+            data = self.template.render_escpos(receipt)
+        else:
+            data = self.template.render_text(receipt).encode("utf-8")
+        with open(self.path, "ab") as device:
+            device.write(data)
+
+
+def printer_from_spec(spec):
+    """ReceiptPrinter for an SMS_RECEIPT_PRINTER value, or None when unset."""
+    if not spec:
+        return None
+    kind, _, path = spec.partition(":")
+    if kind in ("escpos", "text") and path:
+        return ReceiptPrinter(path, escpos=kind == "escpos")
+    raise ValueError(f"Unsupported {RECEIPT_PRINTER_ENV}: {spec}")
+
+
+class ReceiptWriter:
+    """Saves receipts as PDFs, and prints them if a printer is set, on a background thread.
+
+    submit() only queues the job, so checkout can return at once. Jobs are
+    written in order; each PDF is written to a temporary file and renamed,
+    so a bill file is never seen half written. on_saved(path) or
+    on_failed(path, message) is called on the writer thread.
+    """
+
+    def __init__(self, template=None, printer=None):
+        self.template = template or PdfReceiptTemplate()
+        self.printer = printer
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="receipt-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, receipt, pdf_path, on_saved=None, on_failed=None):
+        self.jobs.put((receipt, pdf_path, on_saved, on_failed))
+
+    def flush(self):
+        """Wait until every submitted receipt has been written."""
+        self.jobs.join()
+
+    def close(self):
+        """Write the receipts still queued, then stop the thread."""
+        if self.thread.is_alive():
+            self.jobs.put(None)
+            self.thread.join()
+
+    def write(self, receipt, pdf_path):
+        os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+        # Unique name next to the target, so two writers of one bill never share a temp file
+        fd, temp_path = tempfile.mkstemp(suffix=".pdf", dir=os.path.dirname(pdf_path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                self.template.render(receipt, f)
+            os.replace(temp_path, pdf_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        if self.printer is not None:
+            self.printer.print_receipt(receipt)
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                if job is None:
+                    return
+                receipt, pdf_path, on_saved, on_failed = job
+                try:
+                    self.write(receipt, pdf_path)
+                except Exception as e:
+                    print(f"Could not write bill {pdf_path}: {e}")
+                    if on_failed is not None:
+                        on_failed(pdf_path, str(e))
+                    continue
+                if on_saved is not None:
+                    on_saved(pdf_path)
+            finally:
+                self.jobs.task_done()
+
+
+_writer = None
+
+
+def get_receipt_writer():
+    """Return the shared ReceiptWriter, starting it on first use.
+
+    It prints to the SMS_RECEIPT_PRINTER printer, if set, and finishes the
+    queued receipts when the application exits.
+    """
+    global _writer
+    if _writer is None:
+        try:
+            printer = printer_from_spec(os.environ.get(RECEIPT_PRINTER_ENV, ""))
+        except ValueError as e:
+            print(f"Receipt printing disabled: {e}")
+            printer = None
+        _writer = ReceiptWriter(printer=printer)
+        atexit.register(_writer.close)
+    return _writer
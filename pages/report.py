@@ -1,16 +1,13 @@
 # Import Modules
 from PyQt5.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QWidget, QHeaderView,\
     QLabel, QPushButton, QTableWidget, QMessageBox, QTableWidgetItem, QComboBox, QDialog,\
-    QLineEdit, QDialogButtonBox, QSpinBox, QCalendarWidget, QSizePolicy, QSpacerItem
+    QLineEdit, QDialogButtonBox, QSpinBox, QCalendarWidget, QSizePolicy, QSpacerItem, QProgressBar
 from PyQt5.QtSql import QSqlDatabase, QSqlQuery
 from PyQt5.QtCore import Qt, QDateTime
 from PyQt5.QtGui import QFont
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
 import os
 import sys
-from gen_report import SalesAnalyzer
+from report_worker import ReportWorker
 
 class DailyReportDialog(QDialog):
     def __init__(self, parent=None):
@@ -161,6 +158,19 @@ class ReportPage(QWidget):
         self.master_layout.addWidget(self.monthly_btn)
         self.master_layout.addWidget(self.yearly_btn)
 
+        # Inline progress of the running report; the rest of the app stays usable meanwhile
+        self.progress_label = QLabel()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_cancel_btn = QPushButton("Cancel")
+        self.progress_cancel_btn.clicked.connect(self.cancel_report)
+        self.progress_layout = QHBoxLayout()
+        self.progress_layout.addWidget(self.progress_label)
+        self.progress_layout.addWidget(self.progress_bar, 1)
+        self.progress_layout.addWidget(self.progress_cancel_btn)
+        self.master_layout.addLayout(self.progress_layout)
+        self.show_progress(False)
+
         # Spacer to push "Back" button to the bottom
         self.master_layout.addItem(QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding))
 
@@ -173,6 +183,10 @@ class ReportPage(QWidget):
 
         # Set main layout
         self.setLayout(self.master_layout)
+
+        # Report generation runs on a worker thread, one report at a time;
+        # it keeps running if the user leaves this page
+        self.worker = None
     
     def daily_report(self):
         # Show the date selection dialog
@@ -180,8 +194,7 @@ class ReportPage(QWidget):
         if dialog.exec_():  # If the user clicks OK
             target_date = dialog.get_selected_date()
             print(f"Selected date for daily report: {target_date}")
-            analyzer = SalesAnalyzer(db_path="sms.db")
-            analyzer.main(target_date, None, None, 'day')
+            self.start_report('day', target_date=target_date)
 
     def monthly_report(self):
         # Show the month selection dialog
@@ -189,8 +202,7 @@ class ReportPage(QWidget):
         if dialog.exec_():  # If the user clicks OK
             target_month = dialog.get_selected_month()
             print(f"Selected month for monthly report: {target_month}")
-            analyzer = SalesAnalyzer(db_path="sms.db")
-            analyzer.main(None, target_month, None, 'month')
+            self.start_report('month', target_year_month=target_month)
 
     def yearly_report(self):
         # Show the year selection dialog
@@ -198,8 +210,59 @@ class ReportPage(QWidget):
         if dialog.exec_():  # If the user clicks OK
             target_year = dialog.get_selected_year()
             print(f"Selected year for yearly report: {target_year}")
-            analyzer = SalesAnalyzer(db_path="sms.db")
-            analyzer.main(None, None, target_year, 'year')
+            self.start_report('year', target_year=target_year)
+
+    def start_report(self, analysis_type, target_date=None, target_year_month=None, target_year=None):
+        """Generate the report on a ReportWorker and follow it with the inline progress bar."""
+        if self.worker is not None:
+            return
+
+        self.worker = ReportWorker(analysis_type, target_date, target_year_month, target_year, parent=self)
+        self.worker.progress.connect(self.report_progress)
+        self.worker.completed.connect(self.report_completed)
+        self.worker.failed.connect(self.report_failed)
+        self.worker.finished.connect(self.report_finished)
+
+        self.progress_label.setText("Generating report...")
+        self.progress_bar.setValue(0)
+        self.progress_cancel_btn.setEnabled(True)
+        self.show_progress(True)
+
+        self.set_buttons_enabled(False)
+        self.worker.start()
+
+    def set_buttons_enabled(self, enabled):
+        # Back stays enabled: a report can finish while the user is on another page
+        for btn in [self.daily_btn, self.monthly_btn, self.yearly_btn]:
+            btn.setEnabled(enabled)
+
+    def show_progress(self, visible):
+        for widget in [self.progress_label, self.progress_bar, self.progress_cancel_btn]:
+            widget.setVisible(visible)
+
+    def cancel_report(self):
+        if self.worker is not None:
+            self.progress_cancel_btn.setEnabled(False)
+            self.progress_label.setText("Cancelling...")
+            self.worker.cancel()
+
+    def report_progress(self, percent, message):
+        if self.progress_cancel_btn.isEnabled():
+            self.progress_label.setText(message)
+            self.progress_bar.setValue(percent)
+
+    def report_completed(self, pdf_path):
+        # Parented to the main window so it shows up on whichever page is open
+        QMessageBox.information(self.window(), "Report", f"Report saved to:\n{pdf_path}")
+
+    def report_failed(self, message):
+        QMessageBox.warning(self.window(), "Report", f"Report could not be generated: {message}")
+
+    def report_finished(self):
+        self.show_progress(False)
+        self.worker.deleteLater()
+        self.worker = None
+        self.set_buttons_enabled(True)
 
 # if __name__ == '__main__':
 #     app = QApplication([])
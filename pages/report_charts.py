@@ -0,0 +1,149 @@
+"""Chart rendering for the sales reports.
+
+SalesAnalyzer describes each chart as a spec: a plain dict holding the
+chart kind, title, file name, figure size and the data as lists. That keeps
+specs cheap to pickle, so the independent figures of a report can be drawn
+in parallel by a pool of worker processes using the Agg backend. Charts come
+back as PNG bytes rendered in memory; nothing is written to disk.
+
+Spec kinds:
+    table  rows (first row is the header)
+    bar    values, labels, palette, xlabel, ylabel
+    pie    values, labels
+"""
+import multiprocessing
+import os
+from io import BytesIO
+from itertools import islice
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.table import Table
+import seaborn as sns
+
+_pool = None
+
+
+def draw_chart(fig, spec):
+    """Draw spec onto an empty figure."""
+    ax = fig.add_subplot()
+    kind = spec['kind']
+    if kind == 'table':
+        ax.axis('off')  # Hide axes
+        rows = spec['rows']
+        table = Table(ax, bbox=[0, 0, 1, 1])
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                table.add_cell(i, j, 1, 1, text=value, loc='center')
+        ax.add_table(table)
+    elif kind == 'bar':
+        sns.barplot(x=spec['values'], y=spec['labels'], hue=spec['labels'], palette=spec['palette'],
+                    legend=False, orient='h', ax=ax)
+        ax.set_xlabel(spec['xlabel'])
+        ax.set_ylabel(spec['ylabel'])
+    elif kind == 'pie':
+        ax.pie(spec['values'], labels=spec['labels'], autopct='%1.1f%%', startangle=140,
+               colors=sns.color_palette('Pastel1'))
+    else:
+        raise ValueError(f"Unknown chart kind: {kind}")
+    ax.set_title(spec['title'])
+    fig.tight_layout()
+
+
+def figure_png(fig):
+    """PNG bytes of fig, rendered into an in-memory buffer."""
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def render_chart(spec):
+    """Render spec on an Agg canvas, without pyplot, and return the PNG bytes."""
+    fig = Figure(figsize=spec['figsize'])
+    FigureCanvasAgg(fig)
+    draw_chart(fig, spec)
+    return figure_png(fig)
+
+
+def _init_worker():
+    matplotlib.use('Agg')
+    sns.set(style="whitegrid")
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def get_pool():
+    """Process pool shared by every report in this process, so workers pay the matplotlib import once."""
+    global _pool
+    if _pool is None:
+        # spawn rather than fork: the GUI process has Qt and report threads running
+        _pool = ProcessPoolExecutor(max_workers=default_workers(), mp_context=multiprocessing.get_context('spawn'),
+                                    initializer=_init_worker)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def render_charts(specs, workers=None, on_rendered=None, is_cancelled=None):
+    """Render specs to PNG bytes, in parallel when workers > 1.
+
+    The shared pool is always default_workers() wide; workers only caps how
+    many of these charts are in flight at once, so a smaller report doesn't
+    respawn the pool.
+
+    on_rendered(done, total) is called as each chart finishes. If is_cancelled()
+    turns true, charts not yet started are dropped and None is returned;
+    otherwise the list of PNGs in spec order is returned (None for a chart
+    that failed to render).
+    """
+    workers = min(workers or default_workers(), len(specs))
+    images = [None] * len(specs)
+    if workers <= 1:
+        sns.set(style="whitegrid")
+        for index, spec in enumerate(specs):
+            if is_cancelled is not None and is_cancelled():
+                return None
+            images[index] = _render_safely(spec)
+            if on_rendered is not None:
+                on_rendered(index + 1, len(specs))
+        return images
+
+    pool = get_pool()
+    queued = iter(enumerate(specs))
+    futures = {pool.submit(render_chart, spec): index for index, spec in islice(queued, workers)}
+    done = 0
+    while futures:
+        finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+        if is_cancelled is not None and is_cancelled():
+            for pending in futures:
+                pending.cancel()
+            return None
+        for future in finished:
+            index = futures.pop(future)
+            try:
+                images[index] = future.result()
+            except Exception as e:
+                print(f"Error rendering {specs[index]['filename']}: {str(e)}")
+            done += 1
+            if on_rendered is not None:
+                on_rendered(done, len(specs))
+            for next_index, spec in islice(queued, 1):
+                futures[pool.submit(render_chart, spec)] = next_index
+    return images
+
+
+def _render_safely(spec):
+    try:
+        return render_chart(spec)
+    except Exception as e:
+        print(f"Error rendering {spec['filename']}: {str(e)}")
+        return None
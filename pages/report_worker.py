@@ -0,0 +1,54 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class ReportWorker(QThread):
+    """Runs one SalesAnalyzer report off the GUI thread.
+
+    The analyzer (and its SQLite connection) is created inside run(), so it
+    belongs to the worker thread. Charts are rendered headless; cancel() asks
+    the analyzer to stop at its next progress checkpoint.
+
+    gen_report (pandas, matplotlib, seaborn) is imported by the first report
+    run, on the worker thread, not when the Report page is opened.
+    """
+    progress = pyqtSignal(int, str)
+    completed = pyqtSignal(str)  # path of the generated PDF
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, analysis_type, target_date=None, target_year_month=None, target_year=None,
+                 store=None, parent=None):
+        super().__init__(parent)
+        self.analysis_type = analysis_type
+        self.target_date = target_date
+        self.target_year_month = target_year_month
+        self.target_year = target_year
+        self.store = store
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def run(self):
+        from gen_report import SalesAnalyzer, ReportCancelled
+
+        analyzer = None
+        try:
+            analyzer = SalesAnalyzer(store=self.store, headless=True,
+                                     progress=self.progress.emit,
+                                     is_cancelled=self.isInterruptionRequested)
+            pdf_path = analyzer.main(self.target_date, self.target_year_month,
+                                     self.target_year, self.analysis_type)
+        except ReportCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        finally:
+            if analyzer is not None:
+                analyzer.close()
+
+        if pdf_path:
+            self.completed.emit(pdf_path)
+        else:
+            self.failed.emit("No sales were found for the selected period.")
@@ -0,0 +1,126 @@
+"""Pre-aggregated sales rollups used by the day, month and year reports.
+
+SalesDaily / SalesMonthly hold per-period totals and transaction counts,
+ProductSalesDaily / ProductSalesMonthly hold per-product quantities and
+subtotals. The tables and the triggers on Sales and SaleDetails that keep
+them current as each sale is committed are created, and backfilled from
+history, by migration 9; rebuild_rollups() is the catch-up job that
+recomputes them from the raw tables.
+"""
+import sys
+
+from db import connect
+from migrations import migrate
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM SalesDaily",
+    "DELETE FROM SalesMonthly",
+    "DELETE FROM ProductSalesDaily",
+    "DELETE FROM ProductSalesMonthly",
+    """
+    INSERT INTO SalesDaily (SaleDay, TotalAmount, Transactions)
+    SELECT substr(SaleDate, 1, 10), SUM(TotalAmount), COUNT(*)
+    FROM Sales GROUP BY 1
+    """,
+    """
+    INSERT INTO SalesMonthly (YearMonth, TotalAmount, Transactions)
+    SELECT substr(SaleDate, 1, 7), SUM(TotalAmount), COUNT(*)
+    FROM Sales GROUP BY 1
+    """,
+    """
+    INSERT INTO ProductSalesDaily (SaleDay, ProductID, Quantity, Subtotal)
+    SELECT substr(s.SaleDate, 1, 10), d.ProductID, SUM(d.Quantity), SUM(d.Subtotal)
+    FROM SaleDetails d JOIN Sales s ON s.SalesID = d.SalesID
+    GROUP BY 1, 2
+    """,
+    """
+    INSERT INTO ProductSalesMonthly (YearMonth, ProductID, Quantity, Subtotal)
+    SELECT substr(SaleDay, 1, 7), ProductID, SUM(Quantity), SUM(Subtotal)
+    FROM ProductSalesDaily GROUP BY 1, 2
+    """,
+]
+
+
+def rebuild_rollups(conn):
+    """Catch-up job: recompute every rollup table from Sales and SaleDetails."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        for statement in REBUILD_STATEMENTS:
+            cursor.execute(statement)
+        cursor.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        cursor.close()
+
+
+def _year_bounds(year):
+    return f"{year}-01", f"{year}-12"
+
+
+def sales_summary(conn, analysis_type, period):
+    """(TotalAmount, Transactions) for a 'day' (yyyy-MM-dd), 'month' (yyyy-MM) or 'year' (yyyy)."""
+    if analysis_type == 'day':
+        row = conn.execute("SELECT TotalAmount, Transactions FROM SalesDaily WHERE SaleDay = ?",
+                           (period,)).fetchone()
+    elif analysis_type == 'month':
+        row = conn.execute("SELECT TotalAmount, Transactions FROM SalesMonthly WHERE YearMonth = ?",
+                           (period,)).fetchone()
+    else:
+        row = conn.execute("""
+            SELECT SUM(TotalAmount), SUM(Transactions) FROM SalesMonthly
+            WHERE YearMonth BETWEEN ? AND ?
+        """, _year_bounds(period)).fetchone()
+    if row is None or not row[1]:
+        return 0.0, 0
+    return row[0], row[1]
+
+
+def product_sales(conn, analysis_type, period):
+    """[(ProductID, ProductName, Quantity, Subtotal)] for the period, ordered by ProductID."""
+    if analysis_type == 'day':
+        return conn.execute("""
+            SELECT r.ProductID, p.ProductName, r.Quantity, r.Subtotal
+            FROM ProductSalesDaily r JOIN Product p ON p.ProductID = r.ProductID
+            WHERE r.SaleDay = ?
+            ORDER BY r.ProductID
+        """, (period,)).fetchall()
+    if analysis_type == 'month':
+        return conn.execute("""
+            SELECT r.ProductID, p.ProductName, r.Quantity, r.Subtotal
+            FROM ProductSalesMonthly r JOIN Product p ON p.ProductID = r.ProductID
+            WHERE r.YearMonth = ?
+            ORDER BY r.ProductID
+        """, (period,)).fetchall()
+    return conn.execute("""
+        SELECT r.ProductID, p.ProductName, SUM(r.Quantity), SUM(r.Subtotal)
+        FROM ProductSalesMonthly r JOIN Product p ON p.ProductID = r.ProductID
+        WHERE r.YearMonth BETWEEN ? AND ?
+        GROUP BY r.ProductID
+        ORDER BY r.ProductID
+    """, _year_bounds(period)).fetchall()
+
+
+def monthly_totals(conn, year):
+    """[(MonthNumber, TotalAmount)] for the months of year that had sales."""
+    return [
+        (int(year_month[5:7]), total)
+        for year_month, total in conn.execute("""
+            SELECT YearMonth, TotalAmount FROM SalesMonthly
+            WHERE YearMonth BETWEEN ? AND ?
+            ORDER BY YearMonth
+        """, _year_bounds(year))
+    ]
+
+
+if __name__ == '__main__':
+    # Catch-up job: python rollups.py [path/to/sms.db]
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "sms.db"
+    conn = connect(db_path)
+    if 9 not in migrate(conn):  # migration 9 has just built them
+        rebuild_rollups(conn)
+    conn.close()
+    print(f"Sales rollups rebuilt for {db_path}")
@@ -0,0 +1,59 @@
+"""Report queries against the raw Sales and SaleDetails tables.
+
+Same interface as the rollup queries in rollups.py. The period becomes a
+SaleDate range predicate served by idx_Sales_SaleDate (migration 1), and
+the joins and aggregation run inside SQLite, so only the aggregated rows for
+the period come back to Python.
+"""
+from datetime import date, timedelta
+
+SUMMARY_QUERY = """
+    SELECT SUM(TotalAmount), COUNT(*) FROM Sales
+    WHERE SaleDate >= ? AND SaleDate < ?
+"""
+PRODUCT_SALES_QUERY = """
+    SELECT d.ProductID, p.ProductName, SUM(d.Quantity), SUM(d.Subtotal)
+    FROM Sales s
+    JOIN SaleDetails d ON d.SalesID = s.SalesID
+    JOIN Product p ON p.ProductID = d.ProductID
+    WHERE s.SaleDate >= ? AND s.SaleDate < ?
+    GROUP BY d.ProductID
+    ORDER BY d.ProductID
+"""
+MONTHLY_TOTALS_QUERY = """
+    SELECT CAST(substr(SaleDate, 6, 2) AS INTEGER), SUM(TotalAmount)
+    FROM Sales
+    WHERE SaleDate >= ? AND SaleDate < ?
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+def period_bounds(analysis_type, period):
+    """Half-open [start, end) SaleDate bounds for a day (yyyy-MM-dd), month (yyyy-MM) or year (yyyy)."""
+    if analysis_type == 'day':
+        day = date.fromisoformat(period)
+        return day.isoformat(), (day + timedelta(days=1)).isoformat()
+    if analysis_type == 'month':
+        year, month = (int(part) for part in period.split("-"))
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return f"{year:04d}-{month:02d}-01", f"{next_year:04d}-{next_month:02d}-01"
+    year = int(period)
+    return f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+
+
+def sales_summary(conn, analysis_type, period):
+    """(TotalAmount, Transactions) for the period."""
+    total, count = conn.execute(SUMMARY_QUERY, period_bounds(analysis_type, period)).fetchone()
+    if not count:
+        return 0.0, 0
+    return total, count
+
+
+def product_sales(conn, analysis_type, period):
+    """[(ProductID, ProductName, Quantity, Subtotal)] for the period, ordered by ProductID."""
+    return conn.execute(PRODUCT_SALES_QUERY, period_bounds(analysis_type, period)).fetchall()
+
+
+def monthly_totals(conn, year):
+    """[(MonthNumber, TotalAmount)] for the months of year that had sales."""
+    return conn.execute(MONTHLY_TOTALS_QUERY, period_bounds('year', year)).fetchall()
@@ -0,0 +1,178 @@
+"""Hardware barcode scanner input: keyboard wedges, serial scanners and stdin.
+
+Lane scanners send each code as a burst of characters followed by Enter,
+either as keystrokes (HID keyboard wedge) or over a serial line. This module
+has the Qt-free parts of the pipeline so it can be driven by a simulated
+feed:
+
+    WedgeBuffer     tells scanner bursts apart from someone typing by the
+                    gap between keystrokes
+    StreamSource    reads newline-terminated codes from a serial device or
+                    stdin on a background thread
+    ScanDebouncer   drops the repeat reads a scanner makes of one item
+    ScanPipeline    debounces each code and resolves it against the catalog
+
+scanner_service.ScannerService wires these into the billing page.
+"""
+import sys
+import threading
+import time
+
+from catalog import LOOKUP_REFRESH_SECONDS
+
+SCANNER_ENV = "SMS_SCANNER"  # "wedge" (default), "stdin", "serial:/dev/ttyUSB0" or "serial:COM3@9600", "off"
+DEFAULT_BAUDRATE = 9600
+DEBOUNCE_SECONDS = 0.25  # the same code again within this window is one physical scan
+MAX_KEY_GAP = 0.05  # scanners type much faster than people
+MIN_CODE_LENGTH = 4
+
+
+class ScanDebouncer:
+    def __init__(self, window=DEBOUNCE_SECONDS):
+        self.window = window
+        self.last_code = None
+        self.last_time = float("-inf")
+
+    def accept(self, code, now=None):
+        """True if code is a new scan, False if it repeats the previous code within the window."""
+        now = time.monotonic() if now is None else now
+        repeated = code == self.last_code and now - self.last_time < self.window
+        self.last_code = code
+        self.last_time = now
+        return not repeated
+
+
+class WedgeBuffer:
+    """Collects keystrokes into codes.
+
+    feed() takes one character and its arrival time and returns a complete
+    code when Enter ends a burst typed faster than MAX_KEY_GAP per key, else
+    None. A slow keystroke starts a new burst, so ordinary typing is never
+    mistaken for a scan.
+
+    Every key is held (hold is True after feed()) until its burst is known
+    to be a scan, so no character of a scan reaches the focus widget. When
+    the burst turns out to be typing, because a key comes too late, Enter
+    ends it below min_length or expire() finds it stopped, the held keys are
+    handed back in order to be delivered: after feed() in released, before
+    the key just fed. A typed key is delivered at most max_key_gap late.
+    """
+
+    def __init__(self, max_key_gap=MAX_KEY_GAP, min_length=MIN_CODE_LENGTH):
+        self.max_key_gap = max_key_gap
+        self.min_length = min_length
+        self.chars = []
+        self.held = []  # keys withheld from the focus widget, as passed to feed()
+        self.last_time = None
+        self.hold = False
+        self.released = []
+
+    def feed(self, char, now=None, key=None):
+        """key is what to hold for this keystroke (e.g. a copy of the key event); char by default."""
+        now = time.monotonic() if now is None else now
+        self.released = []
+        if self.last_time is not None and now - self.last_time > self.max_key_gap:
+            self.released, self.held, self.chars = self.held, [], []
+        self.last_time = now
+        if char in ("\r", "\n"):
+            code = "".join(self.chars)
+            held, self.chars, self.held = self.held, [], []
+            self.last_time = None
+            if len(code) >= self.min_length:
+                self.hold = True
+                return code
+            self.released += held
+            self.hold = False
+            return None
+        self.hold = True
+        self.held.append(char if key is None else key)
+        self.chars.append(char)
+        return None
+
+    def expire(self, now=None):
+        """Held keys of a burst that stopped without Enter, due to the focus widget; [] while it may go on."""
+        now = time.monotonic() if now is None else now
+        if not self.held or now - self.last_time <= self.max_key_gap:
+            return []
+        released, self.held, self.chars = self.held, [], []
+        self.last_time = None
+        return released
+
+
+def open_serial(port, baudrate=DEFAULT_BAUDRATE):
+    """Open a serial scanner as a binary stream. Needs pyserial."""
+    try:
+        import serial
+    except ImportError:
+        raise RuntimeError("pyserial is required for serial scanners (pip install pyserial)")
+    return serial.Serial(port, baudrate, timeout=None)
+
+
+class StreamSource:
+    """Reads one code per line from a binary stream on a daemon thread and passes it to on_code."""
+
+    def __init__(self, stream, on_code, name="scanner"):
+        self.stream = stream
+        self.on_code = on_code
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.stopped = False
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped = True
+        try:
+            self.stream.close()
+        except Exception:
+            pass
+
+    def run(self):
+        try:
+            for line in iter(self.stream.readline, b""):
+                if self.stopped:
+                    return
+                code = line.decode("ascii", errors="ignore").strip()
+                if code:
+                    self.on_code(code)
+        except (OSError, ValueError):
+            # The stream was closed by stop() or the device went away
+            if not self.stopped:
+                print("Scanner input closed unexpectedly")
+
+
+def source_from_spec(spec, on_code):
+    """StreamSource for an SMS_SCANNER value, or None for wedge/off (the wedge is handled by Qt)."""
+    if spec.startswith("serial:"):
+        port, _, baudrate = spec[len("serial:"):].partition("@")
+        return StreamSource(open_serial(port, int(baudrate) if baudrate else DEFAULT_BAUDRATE), on_code)
+    if spec == "stdin":
+        return StreamSource(sys.stdin.buffer, on_code, name="scanner-stdin")
+    if spec in ("", "wedge", "off"):
+        return None
+    raise ValueError(f"Unsupported {SCANNER_ENV}: {spec}")
+
+
+class ScanPipeline:
+    """Debounces codes and resolves them to ProductRows through the catalog.
+
+    on_product(product) is called for registered barcodes, on_unknown(code)
+    for the rest. feed() must be called on the thread that owns the catalog.
+    """
+
+    def __init__(self, catalog, on_product, on_unknown, debouncer=None):
+        self.catalog = catalog
+        self.on_product = on_product
+        self.on_unknown = on_unknown
+        self.debouncer = debouncer or ScanDebouncer()
+
+    def feed(self, code, now=None):
+        if not self.debouncer.accept(code, now):
+            return
+        self.catalog.refresh(LOOKUP_REFRESH_SECONDS)
+        product = self.catalog.product_for_barcode(code)
+        if product is None:
+            self.on_unknown(code)
+        else:
+            self.on_product(product)
@@ -0,0 +1,101 @@
+from PyQt5.QtCore import QObject, QEvent, QTimer, pyqtSignal
+from PyQt5.QtGui import QKeyEvent, QWindow
+from PyQt5.QtWidgets import QApplication
+import os
+
+from scanner_input import SCANNER_ENV, WedgeBuffer, ScanPipeline, source_from_spec
+
+
+class ScannerService(QObject):
+    """Feeds hardware scanner codes into the billing page without dialogs.
+
+    Codes come from a keyboard wedge (an application event filter, active
+    between start_wedge() and stop_wedge()) and/or a serial or stdin
+    StreamSource chosen by SMS_SCANNER. Reader threads hand codes to the GUI
+    thread through a queued signal; ScanPipeline then debounces them and
+    resolves them against the catalog.
+    """
+    product_scanned = pyqtSignal(object)  # ProductRow
+    unknown_code = pyqtSignal(str)
+    code_received = pyqtSignal(str)
+
+    def __init__(self, catalog, spec=None, parent=None):
+        super().__init__(parent)
+        self.spec = os.environ.get(SCANNER_ENV, "wedge") if spec is None else spec
+        self.pipeline = ScanPipeline(catalog, self.product_scanned.emit, self.unknown_code.emit)
+        self.wedge = WedgeBuffer()
+        self.wedge_active = False
+        # Hands held keys back to the focus widget once a burst has stopped without Enter
+        self.expiry = QTimer(self)
+        self.expiry.setSingleShot(True)
+        self.expiry.setInterval(int(self.wedge.max_key_gap * 1000) + 1)
+        self.expiry.timeout.connect(self.expire_burst)
+        # Emitted from reader threads; Qt queues it onto this object's (the GUI) thread
+        self.code_received.connect(self.pipeline.feed)
+        self.source = None
+        if self.spec != "off":
+            try:
+                self.source = source_from_spec(self.spec, self.code_received.emit)
+            except (RuntimeError, ValueError, OSError) as e:
+                print(f"Scanner input disabled: {e}")
+            if self.source is not None:
+                self.source.start()
+
+    def start_wedge(self):
+        if self.spec == "off" or self.wedge_active:
+            return
+        QApplication.instance().installEventFilter(self)
+        self.wedge_active = True
+
+    def stop_wedge(self):
+        if self.wedge_active:
+            QApplication.instance().removeEventFilter(self)
+            self.wedge_active = False
+            self.flush_held()
+
+    def stop(self):
+        self.stop_wedge()
+        if self.source is not None:
+            self.source.stop()
+            self.source = None
+
+    def eventFilter(self, obj, event):
+        # Key events reach the window before Qt forwards them to the focus widget (and
+        # its parents); looking at the window's copy sees each keystroke exactly once
+        if event.type() != QEvent.KeyPress or not isinstance(obj, QWindow) or event.isAutoRepeat():
+            return False
+        text = event.text()
+        if len(text) != 1 or not (text.isprintable() or text in ("\r", "\n")):
+            # Arrows, Backspace, Tab and shortcuts go straight through, after any keys typed before them
+            self.flush_held()
+            return False
+        key = QKeyEvent(event.type(), event.key(), event.modifiers(), text, event.isAutoRepeat(), event.count())
+        code = self.wedge.feed(text, key=key)
+        self.replay(self.wedge.released)
+        if code is not None:
+            self.expiry.stop()
+            self.code_received.emit(code)
+            return True
+        # Hold the burst until it is a scan; the expiry timer hands typing back
+        if self.wedge.hold:
+            self.expiry.start()
+        return self.wedge.hold
+
+    def flush_held(self):
+        self.expiry.stop()
+        self.replay(self.wedge.expire(float("inf")))
+
+    def expire_burst(self):
+        released = self.wedge.expire()
+        if released:
+            self.replay(released)
+        elif self.wedge.held:
+            self.expiry.start()  # the timer fired a little early
+
+    def replay(self, keys):
+        # Keys held for a burst that turned out to be typing, delivered in order
+        target = QApplication.focusWidget()
+        if target is None:
+            return
+        for key in keys:
+            QApplication.sendEvent(target, key)
@@ -0,0 +1,193 @@
+"""In-memory product name search for type-ahead completion and table filtering.
+
+Three structures over the lower-cased names, all updated in place as
+products are added, renamed or removed:
+
+    prefix    sorted (name, ProductID) pairs, searched with bisect
+    token     sorted (word, ProductID) pairs for matching the start of any word
+    trigram   {three-character substring: {ProductID}} for substring matches
+
+search() ranks exact name, then name prefix, then word prefix, then
+substring matches, and stops as soon as it has `limit` results, so a
+lookup touches only a few entries even with 100k products.
+"""
+import re
+from bisect import bisect_left, insort
+
+TOKEN_RE = re.compile(r"[0-9a-z]+")
+DEFAULT_LIMIT = 20
+
+
+def _tokens(lower_name):
+    return set(TOKEN_RE.findall(lower_name))
+
+
+def _trigrams(lower_name):
+    return {lower_name[i:i + 3] for i in range(len(lower_name) - 2)}
+
+
+def _prefix_range(pairs, prefix):
+    """Slice bounds of the (key, ProductID) pairs whose key starts with prefix."""
+    return bisect_left(pairs, (prefix,)), bisect_left(pairs, (prefix + "\uffff",))
+
+
+def _walk_prefix(pairs, prefix):
+    """Yield the ProductIDs of the (key, ProductID) pairs whose key starts with prefix, in key order."""
+    for i in range(bisect_left(pairs, (prefix,)), len(pairs)):
+        key, product_id = pairs[i]
+        if not key.startswith(prefix):
+            return
+        yield product_id
+
+
+class ProductSearchIndex:
+    def __init__(self, names=None):
+        self._names = {}  # ProductID -> original name
+        self._lower = {}  # ProductID -> lower-cased name
+        self._tokens = {}  # ProductID -> words of the lower-cased name
+        self._by_name = []
+        self._by_token = []
+        self._trigrams = {}
+        if names:
+            self._build(names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def _build(self, names):
+        # Bulk load: sort once instead of inserting one pair at a time
+        for product_id, name in names.items():
+            lower = name.lower()
+            self._names[product_id] = name
+            self._lower[product_id] = lower
+            self._tokens[product_id] = tokens = _tokens(lower)
+            self._by_name.append((lower, product_id))
+            self._by_token.extend((token, product_id) for token in tokens)
+            for trigram in _trigrams(lower):
+                self._trigrams.setdefault(trigram, set()).add(product_id)
+        self._by_name.sort()
+        self._by_token.sort()
+
+    def name(self, product_id):
+        return self._names.get(product_id)
+
+    def add(self, product_id, name):
+        """Index a new product, or re-index one whose name changed."""
+        if product_id in self._names:
+            if self._names[product_id] == name:
+                return
+            self.remove(product_id)
+        lower = name.lower()
+        self._names[product_id] = name
+        self._lower[product_id] = lower
+        self._tokens[product_id] = tokens = _tokens(lower)
+        insort(self._by_name, (lower, product_id))
+        for token in tokens:
+            insort(self._by_token, (token, product_id))
+        for trigram in _trigrams(lower):
+            self._trigrams.setdefault(trigram, set()).add(product_id)
+
+    def remove(self, product_id):
+        name = self._names.pop(product_id, None)
+        if name is None:
+            return
+        lower = self._lower.pop(product_id)
+        del self._by_name[bisect_left(self._by_name, (lower, product_id))]
+        for token in self._tokens.pop(product_id):
+            del self._by_token[bisect_left(self._by_token, (token, product_id))]
+        for trigram in _trigrams(lower):
+            ids = self._trigrams[trigram]
+            ids.discard(product_id)
+            if not ids:
+                del self._trigrams[trigram]
+
+    def sync(self, names):
+        """Bring the index in line with names ({ProductID: name}), touching only what changed."""
+        for product_id in [pid for pid in self._names if pid not in names]:
+            self.remove(product_id)
+        for product_id, name in names.items():
+            if self._names.get(product_id) != name:
+                self.add(product_id, name)
+
+    def search(self, text, limit=DEFAULT_LIMIT):
+        """Up to limit ProductIDs matching text, best matches first."""
+        query = text.strip().lower()
+        if not query:
+            return []
+        results = []
+        seen = set()
+
+        def take(product_ids):
+            for product_id in product_ids:
+                if product_id not in seen:
+                    seen.add(product_id)
+                    results.append(product_id)
+                    if len(results) >= limit:
+                        return True
+            return False
+
+        # An exact name sorts first among the names starting with query
+        start = bisect_left(self._by_name, (query,))
+        exact = []
+        while start < len(self._by_name) and self._by_name[start][0] == query:
+            exact.append(self._by_name[start][1])
+            start += 1
+        if take(exact) or take(_walk_prefix(self._by_name, query)):
+            return results
+        if take(self._token_matches(query)):
+            return results
+        if len(query) >= 3:
+            substring = sorted(self._substring_matches(query, limit - len(results), seen),
+                               key=lambda pid: self._lower[pid])
+            take(substring)
+        return results
+
+    def _token_matches(self, query):
+        """Products where every word of query starts some word of the name."""
+        words = set(TOKEN_RE.findall(query))
+        if not words:
+            return
+        # Walk the word with the fewest candidates and check the others against each product's words
+        ranges = {word: _prefix_range(self._by_token, word) for word in words}
+        driver = min(words, key=lambda word: ranges[word][1] - ranges[word][0])
+        start, end = ranges[driver]
+        rest = [word for word in words if word != driver]
+        for i in range(start, end):
+            product_id = self._by_token[i][1]
+            if rest:
+                tokens = self._tokens[product_id]
+                if not all(any(token.startswith(word) for token in tokens) for word in rest):
+                    continue
+            yield product_id
+
+    def _substring_matches(self, query, limit=None, exclude=()):
+        """ProductIDs whose name contains query (len >= 3), walking the rarest trigram's postings."""
+        postings = []
+        for trigram in _trigrams(query):
+            ids = self._trigrams.get(trigram)
+            if not ids:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        rarest, others = postings[0], postings[1:]
+        found = []
+        for product_id in rarest:
+            if product_id in exclude or not all(product_id in ids for ids in others):
+                continue
+            if query in self._lower[product_id]:
+                found.append(product_id)
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    def contains(self, text):
+        """Every ProductID whose name contains text (case-insensitive), in ProductID order.
+
+        The same rows as ProductName LIKE '%text%', for filtering the product tables.
+        """
+        query = text.lower()
+        if not query:
+            return sorted(self._names)
+        if len(query) < 3:
+            return sorted(pid for pid, lower in self._lower.items() if query in lower)
+        return sorted(self._substring_matches(query))
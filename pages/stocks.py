@@ -1,10 +1,13 @@
 from PyQt5.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QWidget, QHeaderView, \
-    QLabel, QPushButton, QLineEdit, QTableWidget, QMessageBox, QTableWidgetItem, QScrollArea, QDialog, QFormLayout, QComboBox
+    QLabel, QPushButton, QLineEdit, QTableView, QMessageBox, QScrollArea, QDialog, QFormLayout, QComboBox
 from PyQt5.QtSql import QSqlDatabase, QSqlQuery, QSqlError
 from PyQt5.QtCore import Qt, QDateTime
-from PyQt5.QtGui import QColor, QBrush
 from datetime import datetime
+import sqlite3
 import sys
+from catalog import get_catalog
+from store import get_store
+from table_models import CatalogTableModel, ProductFilterProxy, DebouncedFilter, is_low_stock
 
 class AddStockDialog(QDialog):
     def __init__(self, parent=None):
@@ -24,6 +27,7 @@ class AddStockDialog(QDialog):
         self.load_products()
         # Initial load of suppliers based on first product
         self.update_suppliers()
+        self.product_combo.currentIndexChanged.connect(self.update_suppliers)
 
         layout = QFormLayout()
         layout.addRow("Product Name:", self.product_combo)
@@ -36,7 +40,7 @@ class AddStockDialog(QDialog):
         self.button_box.addWidget(self.ok_btn)
         self.button_box.addWidget(self.cancel_btn)
 
-        self.ok_btn.clicked.connect(self.accept)
+        self.ok_btn.clicked.connect(self.submit)
         self.cancel_btn.clicked.connect(self.reject)
 
         main_layout = QVBoxLayout()
@@ -46,11 +50,8 @@ class AddStockDialog(QDialog):
 
     def load_products(self):
         self.product_combo.clear()
-        query = QSqlQuery("SELECT ProductID, ProductName FROM Product")
-        while query.next():
-            product_id = query.value(0)
-            product_name = query.value(1)
-            self.product_combo.addItem(product_name, product_id)
+        for product in get_catalog().products():
+            self.product_combo.addItem(product.name, product.product_id)
 
     def update_suppliers(self):
         # Get the currently selected product ID
@@ -59,29 +60,23 @@ class AddStockDialog(QDialog):
             return
             
         self.supplier_combo.clear()
-        self.supplier_combo.addItem("None", None)
-        
-        # Query to get suppliers who have supplied this product
-        query = QSqlQuery()
-        query.prepare("""
-            SELECT s.SupplierID, s.SupplierName
-            FROM Suppliers s
-            WHERE s.SupplierID IN (
-                      SELECT p.SupplierID
-                      FROM Product p
-                      WHERE p.ProductID = ?
-                      )
-        """)
-        query.addBindValue(product_id)
-        
-        if not query.exec_():
-            print(f"Supplier query error: {query.lastError().text()}")
+        self.supplier_combo.addItem("Select supplier", None)
+
+        # The product's own supplier first and preselected; every restock is logged
+        # in InventoryTransactions, which needs a supplier, so the others are offered too
+        catalog = get_catalog()
+        product = catalog.product(product_id)
+        preferred = product.supplier_id if product is not None else None
+        for supplier in sorted(catalog.suppliers(), key=lambda row: row.supplier_id != preferred):
+            self.supplier_combo.addItem(supplier.name, supplier.supplier_id)
+        if preferred is not None and catalog.supplier(preferred) is not None:
+            self.supplier_combo.setCurrentIndex(1)
+
+    def submit(self):
+        if self.get_supplier_id() is None:
+            QMessageBox.warning(self, "Add Stock", "Select the supplier this stock came from")
             return
-            
-        while query.next():
-            supplier_id = query.value(0)
-            supplier_name = query.value(1)
-            self.supplier_combo.addItem(supplier_name, supplier_id)
+        self.accept()
 
     def get_product_id(self):
         return self.product_combo.currentData()
@@ -102,7 +97,6 @@ class StockPage(QWidget):
 
         self.search_field = QLineEdit()
         self.search_field.setPlaceholderText("Enter product name...")
-        self.search_field.textChanged.connect(self.filter_table)
         
         self.add_btn = QPushButton("Add Stock")
         self.add_btn.setFixedSize(100,30)
@@ -112,15 +106,22 @@ class StockPage(QWidget):
         
         # self.back_btn.setFixedSize(100, 30)
         
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["ProductID", "ProductName", "StockLevel", "RestockLevel"])
+        # Rows below their restock level are highlighted by the model
+        self.model = CatalogTableModel([("ProductID", "product_id"), ("ProductName", "name"),
+                                         ("StockLevel", "stock_level"), ("RestockLevel", "restock_level")],
+                                       highlight=is_low_stock, parent=self)
+        self.proxy = ProductFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.search_filter = DebouncedFilter(self.search_field, self.proxy, parent=self)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
 
         # Make the table read-only
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
 
         # Make the entire row get selected when any item in it is clicked
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
 
         # Fit the table within the screen (remove horizontal scrollbar)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)  # Stretch columns to fit the table width
@@ -162,57 +163,10 @@ class StockPage(QWidget):
         self.setLayout(self.master_layout)
         self.load_table()
 
-    def load_table(self, filter_text=None):
-        self.table.setRowCount(0)
-        query = QSqlQuery()
-        if filter_text:
-            query.prepare("""
-                SELECT ProductID, ProductName, StockLevel, RestockLevel
-                FROM Product
-                WHERE ProductName LIKE ?
-            """)
-            query.addBindValue(f"%{filter_text}%")
-        else:
-            query.prepare("SELECT ProductID, ProductName, StockLevel, RestockLevel FROM Product")
-        
-        if not query.exec_():
-            print(f"Load table error: {query.lastError().text()}")
-            return
-            
-        while query.next():
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            
-            product_id = query.value(0)
-            product_name = query.value(1)
-            stock_level = int(query.value(2) or 0)
-            restock_level = int(query.value(3) or 0)
-            
-            # Create table items with black text
-            item0 = QTableWidgetItem(str(product_id))
-            item1 = QTableWidgetItem(product_name)
-            item2 = QTableWidgetItem(str(stock_level))
-            item3 = QTableWidgetItem(str(restock_level))
-            
-            # Set items to the table
-            self.table.setItem(row, 0, item0)
-            self.table.setItem(row, 1, item1)
-            self.table.setItem(row, 2, item2)
-            self.table.setItem(row, 3, item3)
-            
-            # Highlight the row if stock level is below restock level
-            if stock_level < restock_level:
-                # Use a light blue background for highlighting
-                highlight_color = QColor(200, 220, 255)  # Light blue
-                
-                for col in range(4):
-                    # Set background color to blue
-                    self.table.item(row, col).setBackground(highlight_color)
-                    # Ensure text color remains black
-                    self.table.item(row, col).setForeground(QBrush(Qt.black))
-
-    def filter_table(self, text):
-        self.load_table(text)
+    def load_table(self):
+        self.model.set_rows(get_catalog().products())
+        # Re-match the current search against the reloaded products
+        self.proxy.refresh_matches()
 
     def show_add_stock_dialog(self):
         dialog = AddStockDialog(self)
@@ -224,51 +178,38 @@ class StockPage(QWidget):
             )
 
     def add_stock(self, product_id, quantity, supplier_id):
-        query = QSqlQuery()
-        
         try:
             quantity = int(quantity.strip()) if quantity.strip() else None
             if not product_id or quantity is None:
                 raise ValueError("Product and Quantity are required")
+            if not supplier_id:
+                raise ValueError("Supplier is required")
         except ValueError as e:
             QMessageBox.critical(self, "Error", f"Invalid input: {e}")
             return
 
-        # Get current stock level
-        query.prepare("SELECT StockLevel FROM Product WHERE ProductID = ?")
-        query.addBindValue(product_id)
-        if not query.exec_() or not query.next():
-            QMessageBox.critical(self, "Error", f"Error fetching stock level: {query.lastError().text()}")
-            return
-        current_stock = int(query.value(0) or 0)
-
-        # Update StockLevel in Product table
-        new_stock = current_stock + quantity
-        query.prepare("UPDATE Product SET StockLevel = ? WHERE ProductID = ?")
-        query.addBindValue(new_stock)
-        query.addBindValue(product_id)
-        if not query.exec_():
-            QMessageBox.critical(self, "Error", f"Error updating stock: {query.lastError().text()}")
+        # Relative update plus the InventoryTransactions row in one transaction, so
+        # tills adding or selling the same product at the same time never lose a change
+        transaction_time = QDateTime.currentDateTime().toString("yyyy-MM-dd hh:mm:ss")
+        try:
+            with get_store().connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                updated = conn.execute("UPDATE Product SET StockLevel = StockLevel + ? WHERE ProductID = ?",
+                                       (quantity, product_id)).rowcount
+                if updated != 1:
+                    conn.execute("ROLLBACK")
+                    QMessageBox.critical(self, "Error", "Product not found")
+                    return
+                conn.execute("""
+                    INSERT INTO InventoryTransactions (ProductID, TransactionType, Quantity, TransactionDate, SupplierID)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (product_id, "In", quantity, transaction_time, supplier_id))
+                conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Error adding stock: {e}")
             return
 
-        # Add entry to InventoryTransactions
-        transaction_time= QDateTime.currentDateTime().toString("yyyy-MM-dd hh:mm:ss")
-        query.prepare("""
-            INSERT INTO InventoryTransactions (ProductID, TransactionType, Quantity, TransactionDate, SupplierID)
-            VALUES (?, ?, ?, ?, ?)
-        """)
-        query.addBindValue(product_id)
-        query.addBindValue("In")
-        query.addBindValue(quantity)
-        query.addBindValue(transaction_time)
-        query.addBindValue(supplier_id if supplier_id else None)
-        
-        if not query.exec_():
-            error = query.lastError().text()
-            print(f"Query error: {error}")
-            print(f"Bound values: {query.boundValues()}")
-            QMessageBox.critical(self, "Error", f"Error adding transaction: {error}")
-        else:
-            self.load_table()
-
-            QMessageBox.information(self, "Success", "Stock added successfully")
+        get_catalog().apply_stock_deltas({product_id: quantity})
+        self.load_table()
+
+        QMessageBox.information(self, "Success", "Stock added successfully")
@@ -0,0 +1,283 @@
+"""Storage backends behind the pages.
+
+A store hands out DB-API style connections (execute, executemany, cursor,
+fetchone/fetchall, rowcount, lastrowid, in_transaction) from a small pool,
+so checkout, the catalog, the reports and the admin pages run the same SQL
+whichever backend is configured:
+
+    LocalStore   sms.db opened directly through db.connect()
+    RemoteStore  a shared database served by store_server.py, for shops
+                 running several tills against one inventory
+
+The backend is picked by the SMS_STORE_URL environment variable:
+
+    unset or sqlite:///path/to/sms.db   LocalStore
+    tcp://host:port                     RemoteStore
+
+A remote store only serves tills that prove they hold the shared key in
+SMS_STORE_KEY, and only runs the application's own statements, which the
+tills name rather than send as SQL (see store_statements.py).
+
+Errors raised by a remote database arrive as the matching sqlite3 exception
+class, and a lost connection raises sqlite3.OperationalError, so callers
+handle both backends with `except sqlite3.Error`.
+"""
+import hashlib
+import hmac
+import json
+import os
+import queue
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from db import DB_PATH, connect
+from store_statements import statement_name
+
+STORE_URL_ENV = "SMS_STORE_URL"
+STORE_KEY_ENV = "SMS_STORE_KEY"
+DEFAULT_POOL_SIZE = 4
+DEFAULT_PORT = 8765
+SOCKET_TIMEOUT = 30
+
+
+class ConnectionPool:
+    """At most `size` connections, created on demand and reused most-recently-released first."""
+
+    def __init__(self, factory, size=DEFAULT_POOL_SIZE):
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._factory()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        try:
+            broken = getattr(conn, "broken", False)
+            if not broken and conn.in_transaction:
+                # Never hand the next borrower a half-finished transaction
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    broken = True
+            if broken:
+                conn.close()
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class Store:
+    """Base class: a pool of connections to one database."""
+
+    def __init__(self, factory, pool_size=DEFAULT_POOL_SIZE):
+        self.pool = ConnectionPool(factory, pool_size)
+
+    def acquire(self):
+        """Borrow a connection; give it back with release()."""
+        return self.pool.acquire()
+
+    def release(self, conn):
+        self.pool.release(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with-block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        self.pool.close()
+
+
+class LocalStore(Store):
+    """The database file on this machine."""
+
+    def __init__(self, db_path=DB_PATH, pool_size=DEFAULT_POOL_SIZE):
+        self.db_path = db_path
+        # Pooled connections move between the GUI thread and the report worker
+        super().__init__(lambda: connect(db_path, check_same_thread=False), pool_size)
+
+    def __repr__(self):
+        return f"LocalStore({self.db_path!r})"
+
+
+class RemoteStore(Store):
+    """A database shared between tills through store_server.py."""
+
+    def __init__(self, host, port=DEFAULT_PORT, pool_size=DEFAULT_POOL_SIZE, key=None):
+        self.host = host
+        self.port = port
+        key = key or os.environ.get(STORE_KEY_ENV, "")
+        super().__init__(lambda: RemoteConnection(host, port, key), pool_size)
+
+    def __repr__(self):
+        return f"RemoteStore({self.host!r}, {self.port})"
+
+
+class RemoteConnection:
+    """Client side of the store_server.py protocol: one JSON request and one JSON reply per line."""
+
+    def __init__(self, host, port=DEFAULT_PORT, key=""):
+        if not key:
+            raise sqlite3.OperationalError(f"Set {STORE_KEY_ENV} to the key of the store at {host}:{port}")
+        try:
+            self._sock = socket.create_connection((host, port), timeout=SOCKET_TIMEOUT)
+        except OSError as e:
+            raise sqlite3.OperationalError(f"Could not reach the store at {host}:{port}: {e}") from e
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rwb")
+        self.in_transaction = False
+        self.broken = False
+        try:
+            self._authenticate(key)
+        except BaseException:
+            self.close()
+            raise
+
+    def _authenticate(self, key):
+        # The server opens with a random challenge; answering with its HMAC
+        # proves the key without sending it over the network
+        try:
+            line = self._file.readline()
+            challenge = json.loads(line)["challenge"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise sqlite3.OperationalError(f"Store did not send a challenge: {e}") from e
+        mac = hmac.new(key.encode(), challenge.encode(), hashlib.sha256).hexdigest()
+        self.call({"op": "auth", "mac": mac})
+
+    def call(self, request):
+        if self.broken:
+            raise sqlite3.OperationalError("Store connection is closed")
+        try:
+            self._file.write(json.dumps(request).encode() + b"\n")
+            self._file.flush()
+            line = self._file.readline()
+        except OSError as e:
+            self.broken = True
+            raise sqlite3.OperationalError(f"Store connection lost: {e}") from e
+        if not line:
+            self.broken = True
+            raise sqlite3.OperationalError("Store connection closed by the server")
+
+        reply = json.loads(line)
+        self.in_transaction = reply["in_transaction"]
+        if "error" in reply:
+            error = getattr(sqlite3, reply["error"], sqlite3.Error)
+            if not (isinstance(error, type) and issubclass(error, sqlite3.Error)):
+                error = sqlite3.Error
+            raise error(reply["message"])
+        return reply
+
+    def cursor(self):
+        return RemoteCursor(self)
+
+    def execute(self, sql, params=()):
+        return RemoteCursor(self).execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return RemoteCursor(self).executemany(sql, seq_of_params)
+
+    def close(self):
+        self.broken = True
+        try:
+            self._file.close()
+            self._sock.close()
+        except OSError:
+            pass
+
+
+class RemoteCursor:
+    """Holds the rows of the last reply; the server returns every row of a query at once."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = -1
+        self.lastrowid = None
+        self._rows = []
+        self._next = 0
+
+    def _load(self, reply):
+        self._rows = [tuple(row) for row in reply["rows"]]
+        self._next = 0
+        self.rowcount = reply["rowcount"]
+        self.lastrowid = reply["lastrowid"]
+        return self
+
+    def execute(self, sql, params=()):
+        return self._load(self.connection.call(
+            {"op": "execute", "statement": statement_name(sql), "params": list(params)}))
+
+    def executemany(self, sql, seq_of_params):
+        params = [list(p) for p in seq_of_params]
+        return self._load(self.connection.call(
+            {"op": "executemany", "statement": statement_name(sql), "params": params}))
+
+    def fetchone(self):
+        if self._next >= len(self._rows):
+            return None
+        row = self._rows[self._next]
+        self._next += 1
+        return row
+
+    def fetchall(self):
+        rows = self._rows[self._next:]
+        self._next = len(self._rows)
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._rows = []
+
+
+def store_from_url(url):
+    """Build the store described by url (see the module docstring)."""
+    if not url:
+        return LocalStore()
+    if url.startswith("sqlite:///"):
+        return LocalStore(url[len("sqlite:///"):])
+    if url.startswith("tcp://"):
+        host, _, port = url[len("tcp://"):].rstrip("/").partition(":")
+        return RemoteStore(host, int(port) if port else DEFAULT_PORT)
+    raise ValueError(f"Unsupported {STORE_URL_ENV}: {url}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide store configured by SMS_STORE_URL, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = store_from_url(os.environ.get(STORE_URL_ENV, ""))
+        return _store
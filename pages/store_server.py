@@ -0,0 +1,143 @@
+"""Shared database server for multi-till shops.
+
+Serves one sms.db to every RemoteStore client (see store.py). Each client
+connection gets its own SQLite connection on a server thread, opened with
+the usual WAL profile, so transactions from different tills interleave
+exactly as they would against a local file: BEGIN IMMEDIATE serialises
+writers and readers never block. The wire protocol is one JSON object per
+line in each direction.
+
+A client first answers a random challenge with its HMAC under the shared
+key in SMS_STORE_KEY; connections that can't are closed. After that it
+may only run statements from the catalogue in store_statements.py, named
+by their digest, never SQL text of its own.
+
+This is the stand-in for a dedicated database server; point the tills at
+it with SMS_STORE_URL=tcp://host:port and the same SMS_STORE_KEY. It
+listens on 127.0.0.1 unless --host gives the address to serve the shop
+network on.
+
+Usage: SMS_STORE_KEY=... python store_server.py [--db sms.db] [--host 127.0.0.1] [--port 8765]
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import socketserver
+import sqlite3
+
+from db import connect
+from migrations import migrate
+from store import DEFAULT_PORT, STORE_KEY_ENV
+from store_statements import build_catalogue
+
+
+class StoreRequestHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.conn = connect(self.server.db_path)
+
+    def handle(self):
+        if not self.authenticate():
+            return
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request["op"] == "close":
+                    return
+                reply = json.dumps(self.run(request))
+            except (ValueError, KeyError, TypeError) as e:
+                # A malformed request, or a row JSON can't carry (a BLOB), still gets
+                # an answer instead of a dropped connection
+                reply = json.dumps(self.error(sqlite3.InterfaceError(f"Bad store request: {e!r}")))
+            self.wfile.write(reply.encode() + b"\n")
+            self.wfile.flush()
+
+    def reply(self, message):
+        self.wfile.write(json.dumps(message).encode() + b"\n")
+        self.wfile.flush()
+
+    def error(self, e):
+        return {"error": type(e).__name__, "message": str(e), "in_transaction": self.conn.in_transaction}
+
+    def authenticate(self):
+        challenge = secrets.token_hex(16)
+        self.reply({"challenge": challenge})
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            request = {}
+        expected = hmac.new(self.server.key, challenge.encode(), hashlib.sha256).hexdigest()
+        if request.get("op") == "auth" and hmac.compare_digest(str(request.get("mac", "")), expected):
+            self.reply({"in_transaction": False})
+            return True
+        self.reply({"error": "OperationalError", "message": "Store key rejected", "in_transaction": False})
+        return False
+
+    def run(self, request):
+        try:
+            sql = self.server.statements.get(request["statement"])
+            if sql is None:
+                raise sqlite3.ProgrammingError("Statement is not served by this store")
+            if request["op"] == "execute":
+                cursor = self.conn.execute(sql, request["params"])
+            elif request["op"] == "executemany":
+                cursor = self.conn.executemany(sql, request["params"])
+            else:
+                raise sqlite3.ProgrammingError(f"Unknown op: {request['op']}")
+            rows = cursor.fetchall()
+            return {"rows": rows, "rowcount": cursor.rowcount, "lastrowid": cursor.lastrowid,
+                    "in_transaction": self.conn.in_transaction}
+        except sqlite3.Error as e:
+            return self.error(e)
+
+    def finish(self):
+        try:
+            # A till that disconnects mid-transaction must not keep the write lock
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            self.conn.close()
+        finally:
+            super().finish()
+
+
+class StoreServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    # Every till opens its pool at once at start-up; the default backlog of 5
+    # leaves the rest waiting for the server's challenge until TCP retries
+    request_queue_size = 128
+
+    def __init__(self, address, db_path, key, statements=None):
+        """key is the shared secret; statements the {name: SQL} catalogue, the application's by default."""
+        self.db_path = db_path
+        self.key = key.encode()
+        self.statements = statements if statements is not None else build_catalogue()
+        super().__init__(address, StoreRequestHandler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve sms.db to the tills")
+    parser.add_argument("--db", default="sms.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    key = os.environ.get(STORE_KEY_ENV)
+    if not key:
+        parser.error(f"set {STORE_KEY_ENV} to the key the tills will use")
+
+    conn = connect(args.db)
+    migrate(conn)
+    conn.close()
+
+    with StoreServer((args.host, args.port), args.db, key) as server:
+        print(f"Serving {args.db} on {args.host}:{args.port} ({len(server.statements)} statements)")
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
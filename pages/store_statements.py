@@ -0,0 +1,76 @@
+"""The SQL statements store_server.py will run for a till.
+
+RemoteConnection never sends SQL text. It sends the name of a statement,
+and the server runs it only if the name is in its catalogue. The catalogue
+is every SQL string literal in the application's modules (the .py files
+next to this one), so a statement written in a page is servable as it
+stands, while a client can't make the server run anything the tills don't
+run themselves: no ATTACH, no ad-hoc DELETE, no SELECT of another table.
+A literal holding several statements is also registered one statement at
+a time, split by split_script().
+
+A statement's name is the SHA-1 of its text with the whitespace collapsed,
+so client and server agree on names without a registry to keep in sync.
+"""
+import ast
+import hashlib
+import os
+import sqlite3
+from functools import lru_cache
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+SQL_KEYWORDS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK",
+                "CREATE", "DROP", "ALTER", "PRAGMA"}
+
+
+def split_script(script):
+    """The statements of an SQL script, one per complete_statement() boundary."""
+    statements = []
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            statements.append(statement)
+            statement = ""
+    return statements
+
+
+@lru_cache(maxsize=1024)
+def statement_name(sql):
+    return hashlib.sha1(" ".join(sql.split()).encode()).hexdigest()
+
+
+def _is_sql(text):
+    words = text.split(None, 1)
+    return bool(words) and words[0] in SQL_KEYWORDS
+
+
+def sql_literals(path):
+    """SQL string literals of one Python source file, docstrings excluded."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    docstrings = {id(node.value) for node in ast.walk(tree) if isinstance(node, ast.Expr)}
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Constant) and isinstance(node.value, str)
+                and id(node) not in docstrings and _is_sql(node.value)):
+            yield node.value
+
+
+def build_catalogue(extra=(), source_dir=SOURCE_DIR):
+    """{name: SQL} of every statement in the application, plus the extra ones given."""
+    catalogue = {}
+
+    def add(sql):
+        catalogue[statement_name(sql)] = sql
+        statements = split_script(sql)
+        if len(statements) > 1:
+            for statement in statements:
+                catalogue[statement_name(statement)] = statement
+
+    for filename in sorted(os.listdir(source_dir)):
+        if filename.endswith(".py"):
+            for sql in sql_literals(os.path.join(source_dir, filename)):
+                add(sql)
+    for sql in extra:
+        add(sql)
+    return catalogue
@@ -1,9 +1,13 @@
 # Johan
 from PyQt5.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QHeaderView, QWidget, \
-    QLabel, QPushButton, QLineEdit, QTableWidget, QMessageBox, QTableWidgetItem
+    QLabel, QPushButton, QLineEdit, QTableView, QMessageBox
 from PyQt5.QtCore import Qt
 from PyQt5.QtSql import QSqlDatabase, QSqlQuery
+import sqlite3
 import sys
+from catalog import get_catalog, SUPPLIERS, PRODUCT
+from store import get_store
+from table_models import CatalogTableModel
 
 class SuppliersPage(QWidget):
     def __init__(self, parent=None):
@@ -36,16 +40,17 @@ class SuppliersPage(QWidget):
         self.del_btn.clicked.connect(self.delete_supplier)
 
         # Table to display suppliers
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["SupplierID", "Name", "Contact", "Address"])
+        self.model = CatalogTableModel([("SupplierID", "supplier_id"), ("Name", "name"),
+                                        ("Contact", "contact_number"), ("Address", "address")], parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.clicked.connect(self.load_selected_row)  # Load row data into fields when clicked
 
         # Make the table read-only
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
 
         # Make the entire row get selected when any item in it is clicked
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
 
         # Fit the table within the screen (remove horizontal scrollbar)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
@@ -90,23 +95,16 @@ class SuppliersPage(QWidget):
 
     def load_table(self):
         """Load supplier data into the table."""
-        self.table.setRowCount(0)
-        query = QSqlQuery("SELECT SupplierID, SupplierName, ContactNumber, Address FROM Suppliers")
-        while query.next():
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(str(query.value(0))))  # SupplierID
-            self.table.setItem(row, 1, QTableWidgetItem(query.value(1)))       # SupplierName
-            self.table.setItem(row, 2, QTableWidgetItem(query.value(2)))       # ContactNumber
-            self.table.setItem(row, 3, QTableWidgetItem(query.value(3)))       # Address 
+        self.model.set_rows(get_catalog().suppliers())
 
     def load_selected_row(self):
         """Populate input fields with data from the selected row."""
-        selected_row = self.table.currentRow()
-        if selected_row != -1:
-            self.supplier_name.setText(self.table.item(selected_row, 1).text())
-            self.supplier_contact.setText(self.table.item(selected_row, 2).text())
-            self.supplier_address.setText(self.table.item(selected_row, 3).text())
+        index = self.table.currentIndex()
+        if index.isValid():
+            supplier = self.model.row_at(index.row())
+            self.supplier_name.setText(supplier.name)
+            self.supplier_contact.setText(supplier.contact_number)
+            self.supplier_address.setText(supplier.address)
 
     def add_supplier(self):
         """Add a new supplier to the database."""
@@ -118,52 +116,49 @@ class SuppliersPage(QWidget):
             QMessageBox.warning(self, "Input Error", "Please enter all fields: name, contact, and address.")
             return
 
-        # Check if supplier name already exists
-        check_query = QSqlQuery()
-        check_query.prepare("SELECT COUNT(*) FROM Suppliers WHERE SupplierName = ?")
-        check_query.addBindValue(name)
-        if check_query.exec_() and check_query.next():
-            if check_query.value(0) > 0:
-                QMessageBox.warning(self, "Error", "A supplier with this name already exists!")
-                return
-
-        query = QSqlQuery()
-        query.prepare("INSERT INTO Suppliers (SupplierName, ContactNumber, Address) VALUES (?, ?, ?)")
-        query.addBindValue(name)
-        query.addBindValue(contact)
-        query.addBindValue(address)
-
-        if query.exec_():
-            self.load_table()
-            self.clear_fields()
-            QMessageBox.information(self, "Success", "Supplier added successfully")
-        else:
-            QMessageBox.critical(self, "Error", f"Error adding supplier: {query.lastError().text()}")
+        try:
+            with get_store().connection() as conn:
+                # Check if supplier name already exists
+                if conn.execute("SELECT COUNT(*) FROM Suppliers WHERE SupplierName = ?", (name,)).fetchone()[0] > 0:
+                    QMessageBox.warning(self, "Error", "A supplier with this name already exists!")
+                    return
+                conn.execute("INSERT INTO Suppliers (SupplierName, ContactNumber, Address) VALUES (?, ?, ?)",
+                             (name, contact, address))
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Error adding supplier: {e}")
+            return
+
+        get_catalog().invalidate(SUPPLIERS)
+        self.load_table()
+        self.clear_fields()
+        QMessageBox.information(self, "Success", "Supplier added successfully")
 
     def delete_supplier(self):
         """Delete the selected supplier from the database."""
-        selected_row = self.table.currentRow()
-        if selected_row == -1:
+        index = self.table.currentIndex()
+        if not index.isValid():
             QMessageBox.warning(self, "No Selection", "Please select a supplier to delete.")
             return
 
-        supplier_name = self.table.item(selected_row, 1).text()  # Use SupplierName for confirmation
+        supplier_name = self.model.row_at(index.row()).name  # Use SupplierName for confirmation
         confirm = QMessageBox.question(self, "Confirm Delete", f"Are you sure you want to delete supplier '{supplier_name}'?",
                                        QMessageBox.Yes | QMessageBox.No)
 
         if confirm == QMessageBox.No:
             return
 
-        query = QSqlQuery()
-        query.prepare("DELETE FROM Suppliers WHERE SupplierName = ?")  # Changed to use SupplierName
-        query.addBindValue(supplier_name)
+        try:
+            with get_store().connection() as conn:
+                conn.execute("DELETE FROM Suppliers WHERE SupplierName = ?", (supplier_name,))  # Changed to use SupplierName
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Error deleting supplier: {e}")
+            return
 
-        if query.exec_():
-            self.load_table()
-            self.clear_fields()
-            QMessageBox.information(self, "Success", "Supplier deleted successfully")
-        else:
-            QMessageBox.critical(self, "Error", f"Error deleting supplier: {query.lastError().text()}")
+        # Products referencing the supplier are updated by ON DELETE SET NULL
+        get_catalog().invalidate(SUPPLIERS, PRODUCT)
+        self.load_table()
+        self.clear_fields()
+        QMessageBox.information(self, "Success", "Supplier deleted successfully")
 
     def clear_fields(self):
         """Clear the input fields."""
@@ -171,9 +166,6 @@ class SuppliersPage(QWidget):
         self.supplier_contact.clear()
         self.supplier_address.clear()
 
-# Database Setup
-database = QSqlDatabase.addDatabase("QSQLITE")
-database.setDatabaseName("sms.db")
 
 # if not database.open():
 #     QMessageBox.critical(None, "Error", "Could not open database")
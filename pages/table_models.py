@@ -0,0 +1,112 @@
+from PyQt5.QtCore import Qt, QObject, QTimer, QAbstractTableModel, QSortFilterProxyModel, QModelIndex, QVariant
+from PyQt5.QtGui import QColor, QBrush
+
+from catalog import get_catalog
+
+FILTER_DELAY_MS = 200
+LOW_STOCK_COLOR = QColor(200, 220, 255)  # Light blue
+
+
+class CatalogTableModel(QAbstractTableModel):
+    """Read-only table over catalog rows (ProductRow, CategoryRow, ...).
+
+    columns is a list of (header, row attribute). The model only holds
+    references to the cached rows; cell text is produced in data(), so the
+    view formats just the rows it is painting and there is no per-cell
+    object. highlight, if given, is called with a row and returns True for
+    rows to draw with the low-stock background.
+    """
+
+    def __init__(self, columns, highlight=None, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.highlight = highlight
+        self.rows = []
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def row_at(self, row):
+        return self.rows[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section][0]
+        return QVariant()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        row = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            value = getattr(row, self.columns[index.column()][1])
+            return "" if value is None else str(value)
+        if role in (Qt.BackgroundRole, Qt.ForegroundRole) and self.highlight is not None and self.highlight(row):
+            return QBrush(LOW_STOCK_COLOR) if role == Qt.BackgroundRole else QBrush(Qt.black)
+        return QVariant()
+
+
+def is_low_stock(product):
+    return int(product.stock_level or 0) < int(product.restock_level or 0)
+
+
+class ProductFilterProxy(QSortFilterProxyModel):
+    """Shows the source rows whose product name contains the filter text.
+
+    Matching ProductIDs come from the catalog's search index, so a filter
+    change is one set lookup per row instead of a query and a table rebuild.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.filter_text = ""
+        self.matches = None  # None shows every row
+
+    def set_filter_text(self, text):
+        if text == self.filter_text and self.matches is not None:
+            return
+        self.filter_text = text
+        self.refresh_matches()
+
+    def refresh_matches(self):
+        """Recompute the matching ProductIDs, e.g. after the source rows were reloaded."""
+        if self.filter_text:
+            self.matches = set(get_catalog().search_index().contains(self.filter_text))
+        else:
+            self.matches = None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.matches is None:
+            return True
+        return self.sourceModel().row_at(source_row).product_id in self.matches
+
+
+class DebouncedFilter(QObject):
+    """Applies a line edit's text to a ProductFilterProxy once typing pauses.
+
+    Every keystroke restarts the timer, so only the latest text is ever
+    matched; superseded searches never run.
+    """
+
+    def __init__(self, line_edit, proxy, delay_ms=FILTER_DELAY_MS, parent=None):
+        super().__init__(parent)
+        self.line_edit = line_edit
+        self.proxy = proxy
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.apply)
+        line_edit.textChanged.connect(lambda text: self.timer.start())
+
+    def apply(self):
+        self.timer.stop()
+        self.proxy.set_filter_text(self.line_edit.text())